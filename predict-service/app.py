@@ -6,6 +6,9 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error
 import joblib
 import os
 
+from app.config.env import Config_env
+from app.training.dataset_cache import dataset_cache
+
 app = Flask(__name__)
 
 @app.route("/train", methods=["POST"])
@@ -17,8 +20,11 @@ def train_model():
         if not dataset_path or not os.path.exists(dataset_path):
             return jsonify({"error": "Dataset not found"}), 400
 
-        # Load data
-        df = pd.read_csv(dataset_path)
+        # Load data (memory-mapped columns from the dataset cache, the CSV is parsed once per content)
+        try:
+            df = dataset_cache.load(dataset_path).frame() if Config_env.DATASET_CACHE else pd.read_csv(dataset_path)
+        except KeyError:
+            return jsonify({"error": "Dataset missing required columns"}), 400
         
         # Define feature columns explicitly (exclude both target and intermediate viability column)
         feature_columns = ['MXene (mg/mL)', 'Laminin peptide (ug/mL)', 'Electric stimulation (Hz)', 'Voltage (V)']
@@ -2,20 +2,41 @@ from flask import Flask
 from flask_cors import CORS
 from .routes.predict import predict_bp
 from .routes.train import train_bp
+from .routes.optimize import optimize_bp
+from .routes.metrics import metrics_bp
+from .routes.profile import profile_bp
+from .config.env import Config_env
+from .config.swagger import LazySwagger
+from .middlewares.metrics import init_request_metrics
+from .middlewares.profiling import init_request_profiling
+from .models.backends import start_prewarm
+from .models.warmup import start_model_warmup
 
 def create_app():
     app = Flask(__name__)
     CORS(app, origins=["*"])  # Use origins=["*"] for dev only, specify domain for production
 
-    # Initialize Swagger UI
-    try:
-        from .config.swagger import init_swagger
-        init_swagger(app)
-    except ImportError as e:
-        print(f"Warning: Could not load Swagger: {e}")
-
     # Import and register blueprints
     app.register_blueprint(predict_bp)
     app.register_blueprint(train_bp)
+    app.register_blueprint(optimize_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profile_bp)
+
+    # Response counts and latency of every request, exported at /metrics
+    init_request_metrics(app)
+
+    # On-demand request profiles (no hooks unless PROFILING_ENABLED=true)
+    init_request_profiling(app)
+
+    # Swagger UI, built on the first request to /api-docs/ (flasgger is not imported until then)
+    app.wsgi_app = LazySwagger(app)
+
+    # Import ML libraries in the background; gunicorn --preload forks only once this is done
+    start_prewarm(Config_env.PREWARM_BACKENDS)
+
+    # Load and warm up the preload manifest models in the background; with gunicorn
+    # --preload the master loads them before forking so workers share them
+    start_model_warmup()
 
     return app
\ No newline at end of file
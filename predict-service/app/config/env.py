@@ -5,4 +5,122 @@ class Config_env:
     MODEL_DIR = os.environ.get("MODEL_DIR", "ml_model")
     PORT = int(os.environ.get("PREDICT_PORT", 5000))
 
+    # Claims of verified bearer tokens, reused until the token's exp (see app/middlewares/auth.py)
+    JWT_CACHE = os.environ.get("JWT_CACHE", "true").lower() == "true"
+    JWT_CACHE_MAX_ENTRIES = int(os.environ.get("JWT_CACHE_MAX_ENTRIES", 1024))
+    JWT_CACHE_MAX_TTL_SECONDS = float(os.environ.get("JWT_CACHE_MAX_TTL_SECONDS", 300))
+
+    # Process-wide model cache (see app/models/dynamic_loader.py)
+    MODEL_CACHE_MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", 8))
+    MODEL_CACHE_MAX_BYTES = int(os.environ.get("MODEL_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+    # Replace scikit-learn forests by flat array-backed CompiledForest at load time
+    COMPILE_FORESTS = os.environ.get("COMPILE_FORESTS", "true").lower() == "true"
+    # Batches at least this large go to the original estimator (faster for big batches)
+    FOREST_LARGE_BATCH_ROWS = int(os.environ.get("FOREST_LARGE_BATCH_ROWS", 2048))
+
+    # Threads of each XGBoost prediction call (0: all cores, XGBoost's default); one per call
+    # keeps gunicorn workers and request threads from oversubscribing the CPUs
+    XGBOOST_NTHREAD = int(os.environ.get("XGBOOST_NTHREAD", 1))
+    # Replace XGBoost boosters by a flat array-backed CompiledForest at load time
+    COMPILE_XGBOOST = os.environ.get("COMPILE_XGBOOST", "false").lower() == "true"
+
+    # Intra-op threads of PyTorch in each worker process (0: torch's default of one per core)
+    TORCH_NUM_THREADS = int(os.environ.get("TORCH_NUM_THREADS", 1))
+    # Inter-op threads of PyTorch in each worker process (0: torch's default)
+    TORCH_INTEROP_THREADS = int(os.environ.get("TORCH_INTEROP_THREADS", 1))
+    # Trace eager PyTorch modules into frozen TorchScript at load time
+    TORCH_JIT_TRACE = os.environ.get("TORCH_JIT_TRACE", "true").lower() == "true"
+
+    # Serve supported Sequential .keras models with NumPy instead of TensorFlow
+    KERAS_NUMPY = os.environ.get("KERAS_NUMPY", "true").lower() == "true"
+    # Check the NumPy runtime at load time: auto (against the Keras outputs stored in <model>.keras.reference.json,
+    # recorded by the first load that can import Keras; structural check if neither is available),
+    # true (always load Keras) or false (structural check only)
+    KERAS_NUMPY_VERIFY = os.environ.get("KERAS_NUMPY_VERIFY", "auto").lower()
+
+    # ML libraries imported in a background thread at startup instead of by the first request
+    # Comma-separated names from app/models/backends.py: sklearn, xgboost, keras, pytorch, pandas
+    PREWARM_BACKENDS = [name.strip().lower() for name in os.environ.get("PREWARM_BACKENDS", "sklearn").split(",") if name.strip()]
+
+    # Models loaded and warmed up by create_app, before workers fork when gunicorn runs with --preload
+    # Comma-separated paths, each optionally suffixed with :model_type
+    MODEL_PRELOAD = [path.strip() for path in os.environ.get("MODEL_PRELOAD", "").split(",") if path.strip()]
+    # JSON manifest of more models to load and warm up at startup (see app/models/warmup.py)
+    MODEL_PRELOAD_MANIFEST = os.environ.get("MODEL_PRELOAD_MANIFEST", os.path.join(MODEL_DIR, "preload.json"))
+
+    # Prediction result cache of /predict/model (see app/models/result_cache.py)
+    RESULT_CACHE = os.environ.get("RESULT_CACHE", "true").lower() == "true"
+    RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "memory").lower()  # memory or sqlite
+    RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", "")  # default: predict-results.sqlite3 in the temp directory
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 10000))
+    RESULT_CACHE_SQLITE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_SQLITE_MAX_ENTRIES", 100000))
+    RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", 3600))  # 0: no expiry
+    RESULT_CACHE_DECIMALS = int(os.environ.get("RESULT_CACHE_DECIMALS", 6))
+
+    # Micro-batching of concurrent /predict/model requests (see app/models/micro_batcher.py)
+    MICRO_BATCH = os.environ.get("MICRO_BATCH", "false").lower() == "true"
+    MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 32))
+    MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", 2))
+
+    # Largest number of rows accepted by /predict/batch
+    BATCH_MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", 50000))
+
+    # Parameter sweeps (/predict/sweep)
+    SWEEP_MAX_POINTS = int(os.environ.get("SWEEP_MAX_POINTS", 1000000))
+    SWEEP_CHUNK_SIZE = int(os.environ.get("SWEEP_CHUNK_SIZE", 5000))
+
+    # Inverse-design optimizer (/optimize)
+    OPTIMIZE_TIME_BUDGET_MS = float(os.environ.get("OPTIMIZE_TIME_BUDGET_MS", 2000))
+    OPTIMIZE_MAX_TIME_BUDGET_MS = float(os.environ.get("OPTIMIZE_MAX_TIME_BUDGET_MS", 30000))
+    OPTIMIZE_MAX_TREE_CELLS = int(os.environ.get("OPTIMIZE_MAX_TREE_CELLS", 2000000))
+
+    # Directory where training writes models, scalers and pipelines
+    TRAINED_MODEL_DIR = os.environ.get("TRAINED_MODEL_DIR", "")  # default: app/ml_model
+    # Unreferenced model versions kept in TRAINED_MODEL_DIR/versions (see app/training/artifacts.py); 0 keeps all
+    ARTIFACT_KEEP_VERSIONS = int(os.environ.get("ARTIFACT_KEEP_VERSIONS", 20))
+
+    # Background training jobs (/train/jobs, see app/training/jobs.py)
+    TRAIN_JOBS_DIR = os.environ.get("TRAIN_JOBS_DIR", "")  # default: app/ml_model/jobs
+    TRAIN_JOBS_MAX_CONCURRENT = int(os.environ.get("TRAIN_JOBS_MAX_CONCURRENT", 1))
+    TRAIN_JOBS_MAX_ACTIVE = int(os.environ.get("TRAIN_JOBS_MAX_ACTIVE", 8))
+    TRAIN_JOB_N_JOBS = int(os.environ.get("TRAIN_JOB_N_JOBS", 2))
+    TRAIN_JOB_NICE = int(os.environ.get("TRAIN_JOB_NICE", 10))
+    TRAIN_JOBS_HISTORY = int(os.environ.get("TRAIN_JOBS_HISTORY", 100))
+
+    # Columnar cache of training datasets (see app/training/dataset_cache.py)
+    DATASET_CACHE = os.environ.get("DATASET_CACHE", "true").lower() == "true"
+    DATASET_CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", "")  # default: app/ml_model/datasets
+    DATASET_CACHE_MAX_ENTRIES = int(os.environ.get("DATASET_CACHE_MAX_ENTRIES", 32))
+
+    # Hyperparameter search jobs (/train/search)
+    SEARCH_MAX_WORKERS = int(os.environ.get("SEARCH_MAX_WORKERS", 0))  # 0: CPUs available to the container
+    SEARCH_MAX_TRIALS = int(os.environ.get("SEARCH_MAX_TRIALS", 500))
+
+    # ASGI serving mode (asgi:app, see app/serving/asgi.py): threads and queued requests per pool;
+    # a request arriving at a full pool is answered 429
+    ASGI_PREDICT_THREADS = int(os.environ.get("ASGI_PREDICT_THREADS", 0))  # 0: twice the CPUs available to the container
+    ASGI_PREDICT_QUEUE = int(os.environ.get("ASGI_PREDICT_QUEUE", 64))
+    ASGI_TRAIN_THREADS = int(os.environ.get("ASGI_TRAIN_THREADS", 1))
+    ASGI_TRAIN_QUEUE = int(os.environ.get("ASGI_TRAIN_QUEUE", 2))
+    ASGI_DEFAULT_THREADS = int(os.environ.get("ASGI_DEFAULT_THREADS", 4))
+    ASGI_DEFAULT_QUEUE = int(os.environ.get("ASGI_DEFAULT_QUEUE", 64))
+    # Comma-separated path prefixes of the POST requests run on the predict and train pools
+    ASGI_PREDICT_PATHS = os.environ.get("ASGI_PREDICT_PATHS", "/predict,/optimize")
+    ASGI_TRAIN_PATHS = os.environ.get("ASGI_TRAIN_PATHS", "/train")
+    ASGI_MAX_BODY_BYTES = int(os.environ.get("ASGI_MAX_BODY_BYTES", 32 * 1024 * 1024))
+    ASGI_RETRY_AFTER_SECONDS = int(os.environ.get("ASGI_RETRY_AFTER_SECONDS", 1))
+
+    # Prometheus metrics at /metrics (see app/monitoring/metrics.py)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")  # default: per server in the temp directory
+    METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+    # On-demand request profiling (see app/monitoring/profiling.py); no hooks are installed unless enabled
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "")  # default: predict-profiles in the temp directory
+    PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 100))
+    PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 0))  # 0: off, else sample every request and keep slower ones
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 1))
+
 config = Config_env()
\ No newline at end of file
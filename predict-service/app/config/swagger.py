@@ -1,7 +1,69 @@
-from flasgger import Swagger
+"""
+Swagger UI
+flasgger is only imported when the documentation is first requested: routes attach
+their specs with the lightweight swag_from below, and LazySwagger builds the Swagger
+app on the first request to /api-docs/, /apispec.json or /flasgger_static
+"""
+import threading
+
+from flask import Flask
+
+# Paths served by the Swagger app
+DOCS_PATH_PREFIXES = ('/api-docs', '/apispec', '/flasgger_static')
+
+
+def swag_from(specs):
+    """
+    Attach an OpenAPI spec dict to a view function
+
+    Same effect as flasgger.swag_from for dict specs (flasgger reads the function's
+    specs_dict attribute when it builds /apispec.json), without importing flasgger.
+    """
+    def decorator(function):
+        function.specs_dict = specs
+        return function
+    return decorator
+
+
+class LazySwagger:
+    """
+    WSGI middleware serving the Swagger UI from a separate Flask app built on first use
+
+    The docs app registers the same blueprints as the main app, so its spec lists the
+    same endpoints; every other path goes straight to the main app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.docs_app = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(DOCS_PATH_PREFIXES):
+            docs_app = self._get_docs_app()
+            if docs_app is not None:
+                return docs_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+    def _get_docs_app(self):
+        with self._lock:
+            if self.docs_app is None:
+                try:
+                    docs_app = Flask(self.app.import_name)
+                    for blueprint in self.app.blueprints.values():
+                        docs_app.register_blueprint(blueprint)
+                    init_swagger(docs_app)
+                    self.docs_app = docs_app.wsgi_app
+                except ImportError as e:
+                    print(f"Warning: Could not load Swagger: {e}")
+                    self.docs_app = False
+            return self.docs_app or None
+
 
 def init_swagger(app):
     """Initialize Swagger UI for the Flask app"""
+    from flasgger import Swagger
     
     # Swagger config - use api-docs endpoint only
     swagger_config = {
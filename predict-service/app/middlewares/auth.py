@@ -1,7 +1,117 @@
-from flask import request, jsonify
+from flask import g, request, jsonify
 from functools import wraps
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
 import jwt
+from jwt.algorithms import HMACAlgorithm
 from app.config.env import Config_env
+from app.monitoring.metrics import jwt_verifications
+
+# HMAC key prepared once instead of on every decode
+SECRET_KEY = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(Config_env.SECRET_KEY)
+
+
+class VerifiedTokenCache:
+    """
+    Claims of tokens whose signature was already verified, keyed by the SHA-256 of the token
+
+    Only tokens that passed jwt.decode are stored, and an entry expires at the token's
+    exp (or after max_ttl_seconds, whichever is first), so a cached token is rejected
+    as expired exactly when jwt.decode would reject it.
+    """
+
+    def __init__(self, max_entries=1024, max_ttl_seconds=300, enabled=True):
+        """
+        Args:
+            max_entries (int): Tokens kept; the least recently used are dropped beyond this
+            max_ttl_seconds (float): Longest time a token is trusted without verifying it again
+            enabled (bool): False verifies every token
+        """
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self.enabled = enabled
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> (claims, expires_at)
+
+    def get(self, digest):
+        """
+        Returns:
+            tuple: (claims, expires_at), or None if the token is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+            return entry
+
+    def put(self, digest, claims, now):
+        expires_at = now + self.max_ttl_seconds
+        if 'exp' in claims:
+            expires_at = min(expires_at, int(claims['exp']))
+        with self._lock:
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(
+    Config_env.JWT_CACHE_MAX_ENTRIES,
+    Config_env.JWT_CACHE_MAX_TTL_SECONDS,
+    Config_env.JWT_CACHE
+)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=token_cache.reset_after_fork)
+
+
+def verify_token(token):
+    """
+    Claims of a bearer token, verified once and then served from the token cache
+
+    Raises:
+        jwt.ExpiredSignatureError: The token expired
+        jwt.InvalidTokenError: The token is malformed or its signature is wrong
+    """
+    now = time.time()
+    digest = None
+    if token_cache.enabled:
+        digest = hashlib.sha256(token.encode()).digest()
+        entry = token_cache.get(digest)
+        if entry is not None:
+            claims, expires_at = entry
+            if now < expires_at:
+                jwt_verifications.inc('cache_hit')
+                return dict(claims)
+            # Past exp: expired for jwt.decode too; past max_ttl_seconds: verified again below
+            token_cache.discard(digest)
+
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        jwt_verifications.inc('expired')
+        raise
+    except jwt.InvalidTokenError:
+        jwt_verifications.inc('invalid')
+        raise
+    jwt_verifications.inc('verified')
+    if digest is not None:
+        token_cache.put(digest, claims, now)
+    return dict(claims)
+
 
 def token_required(f):
     @wraps(f)
@@ -14,11 +124,13 @@ def token_required(f):
         if not token:
             return jsonify({"error": "Token missing"}), 401
         try:
-            data = jwt.decode(token, Config_env.SECRET_KEY, algorithms=["HS256"])
+            started = time.perf_counter()
+            data = verify_token(token)
+            g.jwt_decode_seconds = time.perf_counter() - started
             request.user = data
         except jwt.ExpiredSignatureError:
             return jsonify({"error": "Token expired"}), 401
         except jwt.InvalidTokenError:
             return jsonify({"error": "Invalid token"}), 401
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
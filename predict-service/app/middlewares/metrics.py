@@ -0,0 +1,22 @@
+from flask import g, request
+import time
+
+from app.monitoring.metrics import http_request_seconds, http_requests
+
+
+def init_request_metrics(app):
+    """Count every response by route and status code and time every request"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        # Route patterns, not raw paths, keep the label set bounded
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        http_requests.inc(endpoint, request.method, str(response.status_code))
+        started = g.get('request_started')
+        if started is not None:
+            http_request_seconds.observe(time.perf_counter() - started, endpoint, request.method)
+        return response
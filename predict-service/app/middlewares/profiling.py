@@ -0,0 +1,52 @@
+from flask import g, request
+import jwt
+
+from app.config.env import Config_env
+from app.middlewares.auth import verify_token
+from app.monitoring.profiling import PROFILE_MODES, profiler
+
+# X-Profile header values that select cProfile
+CPROFILE_HEADER_VALUES = ['1', 'true', 'cprofile']
+
+
+def header_profile_mode():
+    """Mode asked for by the X-Profile header, if the request also has a valid bearer token"""
+    value = request.headers.get('X-Profile', '').strip().lower()
+    if not value:
+        return None
+    mode = 'cprofile' if value in CPROFILE_HEADER_VALUES else value
+    if mode not in PROFILE_MODES:
+        return None
+    bearer = request.headers.get('Authorization', '')
+    if not bearer.startswith('Bearer '):
+        return None
+    try:
+        verify_token(bearer.split(' ')[1])
+    except jwt.InvalidTokenError:
+        return None
+    return mode
+
+
+def init_request_profiling(app):
+    """Profile requests selected by the X-Profile header, POST /profile/arm or PROFILE_SLOW_MS"""
+    if not Config_env.PROFILING_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_profile():
+        # Requests of the profiling endpoints themselves are never profiled
+        if request.path.startswith('/profile'):
+            return
+        selected = profiler.mode_for(request.path, header_profile_mode())
+        if selected is not None:
+            g.request_profile = profiler.start(*selected)
+
+    @app.after_request
+    def finish_request_profile(response):
+        active = g.pop('request_profile', None)
+        if active is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            name = profiler.finish(active, endpoint, request.method, response.status_code)
+            if name:
+                response.headers['X-Profile-File'] = name
+        return response
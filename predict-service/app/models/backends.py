@@ -0,0 +1,142 @@
+"""
+Model Backends
+Track which ML libraries are imported in this process and import them ahead of the
+first request in a background prewarm thread
+
+Nothing heavy is imported when the app starts: each library loads the first time a
+model of its type is loaded, or earlier through PREWARM_BACKENDS. Under gunicorn
+--preload the master waits for the prewarm to finish before forking, so every worker
+inherits the imported modules.
+"""
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+# Backend -> modules a model of that type needs (all of them must be imported to be warm)
+BACKEND_MODULES = {
+    'sklearn': ['sklearn.ensemble', 'sklearn.linear_model', 'sklearn.preprocessing'],
+    'xgboost': ['xgboost'],
+    'keras': ['keras'],
+    'pytorch': ['torch'],
+    'pandas': ['pandas']
+}
+
+# Modules that register paired before/after fork hooks (lock acquire/release) on import.
+# If the prewarm thread imported one while a fork runs its before hooks, the fork would
+# only run the after hook and release a lock it never acquired, so they load up front
+FORK_HOOK_MODULES = ['concurrent.futures.thread', 'logging']
+
+_lock = threading.Lock()
+_prewarm_thread = None
+# Backend -> {'state': 'warming' | 'warm' | 'unavailable', 'import_seconds', 'error'}
+_prewarm_results = {}
+
+
+def is_installed(backend):
+    """True if the top-level package of a backend can be imported"""
+    top_level = BACKEND_MODULES[backend][0].split('.')[0]
+    return importlib.util.find_spec(top_level) is not None
+
+
+def is_warm(backend):
+    """True if every module of a backend is already imported in this process"""
+    return all(module in sys.modules for module in BACKEND_MODULES[backend])
+
+
+def import_backend(backend):
+    """
+    Import the modules of a backend
+
+    Returns:
+        float: Seconds spent importing
+    """
+    started = time.perf_counter()
+    for module in BACKEND_MODULES[backend]:
+        importlib.import_module(module)
+    return time.perf_counter() - started
+
+
+def _prewarm(backends):
+    for backend in backends:
+        with _lock:
+            _prewarm_results[backend] = {'state': 'warming'}
+        try:
+            seconds = import_backend(backend)
+            result = {'state': 'warm', 'import_seconds': round(seconds, 3)}
+            print(f"🔥 Backend {backend} imported in {seconds:.2f}s")
+        except Exception as e:
+            result = {'state': 'unavailable', 'error': str(e)}
+            print(f"Warning: Could not prewarm backend {backend}: {e}")
+        with _lock:
+            _prewarm_results[backend] = result
+
+
+def start_prewarm(backends):
+    """
+    Import backends in a daemon thread, so requests are served meanwhile
+
+    Args:
+        backends (list): Names from BACKEND_MODULES
+
+    Returns:
+        threading.Thread: The prewarm thread, or None if there is nothing to import
+    """
+    global _prewarm_thread
+
+    unknown = [backend for backend in backends if backend not in BACKEND_MODULES]
+    if unknown:
+        print(f"Warning: Unknown backends in PREWARM_BACKENDS: {unknown}")
+    backends = [backend for backend in backends if backend in BACKEND_MODULES]
+    if not backends:
+        return None
+
+    for module in FORK_HOOK_MODULES:
+        importlib.import_module(module)
+
+    with _lock:
+        for backend in backends:
+            _prewarm_results[backend] = {'state': 'queued'}
+    _prewarm_thread = threading.Thread(target=_prewarm, args=(backends,), name='backend-prewarm', daemon=True)
+    _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def wait_for_prewarm(timeout=None):
+    """Block until the prewarm thread finished (no-op if none is running)"""
+    if _prewarm_thread is not None and _prewarm_thread.is_alive():
+        _prewarm_thread.join(timeout)
+
+
+def prewarm_done():
+    """True if no prewarm is running"""
+    return _prewarm_thread is None or not _prewarm_thread.is_alive()
+
+
+def backend_status():
+    """
+    Readiness of every backend in this process
+
+    Returns:
+        dict: backend -> {'state': 'warm' | 'warming' | 'queued' | 'cold' | 'unavailable', ...}
+    """
+    with _lock:
+        results = {backend: dict(result) for backend, result in _prewarm_results.items()}
+
+    status = {}
+    for backend in BACKEND_MODULES:
+        result = results.get(backend, {})
+        if is_warm(backend):
+            result['state'] = 'warm'
+        elif result.get('state') not in ('warming', 'queued', 'unavailable'):
+            result['state'] = 'cold' if is_installed(backend) else 'unavailable'
+        status[backend] = result
+    return status
+
+
+# A fork while the prewarm thread holds an import would leave half-imported modules in
+# the child, so forks (gunicorn --preload spawning workers) wait for it to finish
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=wait_for_prewarm)
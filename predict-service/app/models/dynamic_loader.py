@@ -4,11 +4,550 @@ Support loading different types of models from filepath
 """
 import os
 import pickle
-import joblib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config.env import Config_env
+
+# Model types whose raw outputs are fractions that _convert_to_percentage scales by 100
+PROBABILITY_MODEL_TYPES = ['keras', 'pytorch', 'sklearn', 'xgboost', 'pickle', 'joblib', 'npstore']
+
+
+class _PendingLoad:
+    """A model load in progress that other requests can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.model = None
+        self.error = None
+
+
+class ModelCache:
+    """
+    Bounded, thread-safe LRU cache of loaded models.
+
+    Entries are keyed by (realpath, mtime, size, model_type), so a model file that
+    is rewritten on disk gets a new key and the stale entry is dropped. A name that
+    points at a versioned model (app/training/artifacts.py) is tracked as an alias:
+    once it points at a new version, the version it left is dropped unless another
+    name still uses it. Concurrent requests for the same cold model wait on a single load.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=1024 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (model, nbytes)
+        self._current = {}  # (realpath, model_type) -> key of the cached version
+        self._aliases = {}  # (path as requested, model_type) -> key it resolved to
+        self._pending = {}  # key -> _PendingLoad
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(model_path, model_type):
+        """Build the cache key for a model file (or .npstore / .pipeline directory) as it currently exists on disk"""
+        realpath = os.path.realpath(model_path)
+        if os.path.isdir(realpath):
+            # Store and pipeline directories are replaced as a whole, their manifest is rewritten with them
+            manifest = os.path.join(realpath, 'pipeline.json')
+            if not os.path.isfile(manifest):
+                manifest = os.path.join(realpath, 'meta.json')
+            stat = os.stat(manifest)
+            size = sum(entry.stat().st_size for entry in os.scandir(realpath) if entry.is_file())
+            return (realpath, stat.st_mtime_ns, size, model_type)
+        stat = os.stat(realpath)
+        return (realpath, stat.st_mtime_ns, stat.st_size, model_type)
+
+    def models(self):
+        """Snapshot of the cached models as (path, model_type, model) tuples"""
+        with self._lock:
+            return [(key[0], key[3], entry[0]) for key, entry in self._entries.items()]
+
+    def get_or_load(self, model_path, model_type, loader, alias=None):
+        """
+        Return the cached model, loading it with loader(model_path, model_type) on a miss
+
+        Args:
+            model_path (str): Path to model file
+            model_type (str): Resolved library type
+            loader (callable): Uncached loader used on a miss
+            alias (str): Path the request named, when model_path is what it resolved to
+
+        Returns:
+            model: Loaded model object
+        """
+        key = self.make_key(model_path, model_type)
+        alias_key = (os.path.abspath(alias), model_type) if alias is not None else None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._point_alias(alias_key, key)
+                return entry[0]
+
+            pending = self._pending.get(key)
+            is_owner = pending is None
+            if is_owner:
+                self.misses += 1
+                pending = _PendingLoad()
+                self._pending[key] = pending
+
+        if not is_owner:
+            # Another request is already loading this exact file version
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            with self._lock:
+                self.hits += 1
+            return pending.model
+
+        try:
+            pending.model = loader(model_path, model_type)
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                if pending.error is None:
+                    self._store(key, pending.model)
+                    self._point_alias(alias_key, key)
+            pending.event.set()
+
+        return pending.model
+
+    def _store(self, key, model):
+        """Insert a freshly loaded model and evict until within bounds (lock held)"""
+        realpath, _, nbytes, model_type = key
+
+        # Drop the previous version of this file, it changed on disk
+        old_key = self._current.get((realpath, model_type))
+        if old_key is not None and old_key != key and old_key in self._entries:
+            self._remove(old_key)
+            self.invalidations += 1
+
+        # A model larger than the whole budget is served but never cached
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = (model, nbytes)
+        self._current[(realpath, model_type)] = key
+        self._total_bytes += nbytes
+
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _point_alias(self, alias_key, key):
+        """Record what a name resolves to; drop the version it left if no other name uses it (lock held)"""
+        if alias_key is None:
+            return
+        old_key = self._aliases.get(alias_key)
+        self._aliases[alias_key] = key
+        if old_key is not None and old_key != key and old_key in self._entries and old_key not in self._aliases.values():
+            self._remove(old_key)
+            self.invalidations += 1
+
+    def _remove(self, key):
+        """Remove one entry (lock held)"""
+        _, nbytes = self._entries.pop(key)
+        self._total_bytes -= nbytes
+        realpath, _, _, model_type = key
+        if self._current.get((realpath, model_type)) == key:
+            del self._current[(realpath, model_type)]
+
+    def clear(self):
+        """Drop every cached model"""
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+            self._aliases.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Return cache counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'models': [
+                    {'path': key[0], 'model_type': key[3], 'size': key[2]}
+                    for key in self._entries
+                ]
+            }
+
+
+# Shared by every request handled by this worker process
+model_cache = ModelCache(
+    max_entries=Config_env.MODEL_CACHE_MAX_ENTRIES,
+    max_bytes=Config_env.MODEL_CACHE_MAX_BYTES
+)
+
+
+class CompiledForest:
+    """
+    Flat, array-backed tree ensemble for fast inference.
+
+    All trees' nodes are packed into contiguous NumPy arrays (feature, threshold,
+    interleaved children, leaf value) and a batch of rows walks every tree at once,
+    one depth level per step. Leaves point to themselves, so after max_depth steps
+    every (row, tree) pair sits on its leaf.
+
+    For scikit-learn forests the output is bit-identical to estimator.predict:
+    inputs are cast to float32 like sklearn does, ties go left (x <= threshold),
+    NaN follows missing_go_to_left, and leaf values are summed in tree order.
+    """
+
+    ARRAYS = ['feature', 'threshold', 'children', 'value', 'missing_left', 'roots']
+
+    def __init__(self, feature, threshold, children, value, missing_left, roots, max_depth, n_features,
+                 aggregate='mean', base_score=0.0, decision='le', source=None, large_batch_rows=None):
+        """
+        Args:
+            feature, threshold, value, missing_left: One entry per node (all trees concatenated)
+            children: Interleaved [right, left] child index per node, leaves point to themselves
+            roots: Index of every tree's root node
+            max_depth (int): Deepest tree in the ensemble
+            n_features (int): Number of input features
+            aggregate (str): 'mean' (random forest) or 'sum' (boosting) over trees
+            base_score (float): Constant added to the aggregate
+            decision (str): 'le' (go left if x <= threshold, sklearn) or 'lt' (x < threshold, XGBoost)
+            source: Original estimator, used for batches of at least large_batch_rows rows
+            large_batch_rows (int): Batch size from which the source estimator is faster
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.n_features_in_ = self.n_features
+        self.aggregate = aggregate
+        self.base_score = float(base_score)
+        self.decision = decision
+        self.source = source
+        self.large_batch_rows = large_batch_rows
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    @staticmethod
+    def supports(model):
+        """True if model is a single-output scikit-learn regression tree or random forest"""
+        try:
+            from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+            from sklearn.tree import DecisionTreeRegressor
+        except ImportError:
+            return False
+        if not isinstance(model, (RandomForestRegressor, ExtraTreesRegressor, DecisionTreeRegressor)):
+            return False
+        return getattr(model, 'n_outputs_', None) == 1 and (hasattr(model, 'tree_') or hasattr(model, 'estimators_'))
+
+    @classmethod
+    def from_sklearn(cls, model, keep_source=True, large_batch_rows=None):
+        """
+        Compile a fitted scikit-learn regression tree or random forest
+
+        Args:
+            model: Fitted RandomForestRegressor, ExtraTreesRegressor or DecisionTreeRegressor
+            keep_source (bool): Keep the estimator for very large batches
+            large_batch_rows (int): Batch size from which the source estimator is used
+
+        Returns:
+            CompiledForest
+        """
+        trees = [model.tree_] if hasattr(model, 'tree_') else [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        n_nodes = int(offsets[-1])
+
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        children = np.empty(2 * n_nodes, dtype=np.intp)
+        value = np.empty(n_nodes, dtype=np.float64)
+        missing_left = np.zeros(n_nodes, dtype=bool)
+
+        for tree, start in zip(trees, offsets[:-1]):
+            end = start + tree.node_count
+            local = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+
+            feature[start:end] = np.where(is_leaf, 0, tree.feature)
+            threshold[start:end] = tree.threshold
+            children[2 * start:2 * end:2] = np.where(is_leaf, local, tree.children_right) + start
+            children[2 * start + 1:2 * end:2] = np.where(is_leaf, local, tree.children_left) + start
+            value[start:end] = tree.value[:, 0, 0]
+            if hasattr(tree, 'missing_go_to_left'):
+                missing_left[start:end] = np.asarray(tree.missing_go_to_left, dtype=bool)
+
+        return cls(
+            feature, threshold, children, value, missing_left,
+            roots=offsets[:-1].astype(np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=model.n_features_in_,
+            aggregate='mean',
+            source=model if keep_source else None,
+            large_batch_rows=large_batch_rows
+        )
+
+    @staticmethod
+    def supports_xgboost(booster):
+        """True if booster is a single-output gbtree regressor with an identity link and no categorical splits"""
+        import json
+
+        try:
+            learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+        except Exception:
+            return False
+        params = learner['learner_model_param']
+        return (
+            learner['gradient_booster']['name'] == 'gbtree'
+            and learner['objective']['name'] in ['reg:squarederror', 'reg:linear', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror']
+            and int(params.get('num_class', 0)) <= 1
+            and int(params.get('num_target', 1)) == 1
+            and int(learner['gradient_booster']['model']['gbtree_model_param'].get('num_parallel_tree', 1)) == 1
+            and not any(tree.get('categories_nodes') for tree in learner['gradient_booster']['model']['trees'])
+        )
+
+    @classmethod
+    def from_xgboost(cls, booster):
+        """
+        Compile a trained XGBoost Booster (see supports_xgboost)
+
+        Thresholds and leaf values stay float32 and leaves are accumulated onto
+        base_score in float32 and tree order, as XGBoost's CPU predictor does.
+
+        Args:
+            booster: xgboost.Booster
+
+        Returns:
+            CompiledForest
+        """
+        import json
+
+        learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+        trees = learner['gradient_booster']['model']['trees']
+        sizes = [len(tree['left_children']) for tree in trees]
+        offsets = np.cumsum([0] + sizes)
+        n_nodes = int(offsets[-1])
+
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float32)
+        children = np.empty(2 * n_nodes, dtype=np.intp)
+        value = np.empty(n_nodes, dtype=np.float32)
+        missing_left = np.empty(n_nodes, dtype=bool)
+        max_depth = 0
+
+        for tree, start, size in zip(trees, offsets[:-1], sizes):
+            end = start + size
+            local = np.arange(size)
+            left = np.asarray(tree['left_children'], dtype=np.intp)
+            right = np.asarray(tree['right_children'], dtype=np.intp)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            is_leaf = left < 0
+
+            feature[start:end] = np.where(is_leaf, 0, tree['split_indices'])
+            # Leaves store their weight in split_conditions
+            threshold[start:end] = np.where(is_leaf, 0, conditions)
+            value[start:end] = np.where(is_leaf, conditions, 0)
+            children[2 * start:2 * end:2] = np.where(is_leaf, local, right) + start
+            children[2 * start + 1:2 * end:2] = np.where(is_leaf, local, left) + start
+            missing_left[start:end] = np.asarray(tree['default_left'], dtype=bool)
+
+            depth = np.zeros(size, dtype=np.intp)
+            for node in range(size):
+                if not is_leaf[node]:
+                    depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+        # Stored as e.g. "[7.510599E-1]" by XGBoost >= 2
+        base_score = float(np.float32(learner['learner_model_param']['base_score'].strip('[]')))
+
+        return cls(
+            feature, threshold, children, value, missing_left,
+            roots=offsets[:-1].astype(np.intp),
+            max_depth=max_depth,
+            n_features=booster.num_features(),
+            aggregate='sum',
+            base_score=base_score,
+            decision='lt'
+        )
+
+    def predict(self, X):
+        """
+        Predict a batch of rows
+
+        Args:
+            X: (n, n_features) array-like
+
+        Returns:
+            numpy.ndarray: One prediction per row
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+
+        if self.source is not None and self.large_batch_rows and len(X) >= self.large_batch_rows:
+            return self.source.predict(X)
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+        # Bound the (rows x trees) working set
+        chunk_rows = max(1, (1 << 20) // max(self.n_trees, 1))
+        if len(X) <= chunk_rows:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + chunk_rows]) for i in range(0, len(X), chunk_rows)])
+
+    def _predict_chunk(self, X):
+        n_rows = len(X)
+        n_trees = self.n_trees
+        flat_x = X.reshape(-1)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * self.n_features, n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        has_nan = np.isnan(flat_x).any()
+
+        for _ in range(self.max_depth):
+            x = flat_x[row_base + self.feature[nodes]]
+            if self.decision == 'le':
+                go_left = x <= self.threshold[nodes]
+            else:
+                go_left = x < self.threshold[nodes]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.missing_left[nodes], go_left)
+            nodes = self.children[2 * nodes + go_left]
+
+        # Sequential sum over trees (cumsum is not pairwise), in tree order
+        leaf_values = self.value[nodes].reshape(n_rows, n_trees)
+        if self.aggregate == 'sum':
+            # Boosting accumulates onto base_score, in the leaf dtype
+            start = np.full((n_rows, 1), self.base_score, dtype=leaf_values.dtype)
+            return np.cumsum(np.hstack([start, leaf_values]), axis=1)[:, -1]
+        total = np.cumsum(leaf_values, axis=1)[:, -1]
+        if self.aggregate == 'mean':
+            total = total / n_trees
+        return total + self.base_score if self.base_score else total
+
+    def save(self, path):
+        """
+        Save as a directory of raw .npy arrays plus meta.json, loadable with np.load(mmap_mode='r')
+
+        Args:
+            path (str): Target directory
+        """
+        import json
+
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            'format': 'compiled_forest',
+            'version': 1,
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'aggregate': self.aggregate,
+            'base_score': self.base_score,
+            'decision': self.decision
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """
+        Load a forest saved with save()
+
+        Args:
+            path (str): Directory written by save()
+            mmap_mode (str): Passed to np.load, e.g. 'r' to memory-map the arrays read-only
+
+        Returns:
+            CompiledForest
+        """
+        import json
+
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != 'compiled_forest':
+            raise ValueError(f"Not a compiled forest: {path}")
+
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in cls.ARRAYS}
+        return cls(
+            **arrays,
+            max_depth=meta['max_depth'],
+            n_features=meta['n_features'],
+            aggregate=meta['aggregate'],
+            base_score=meta['base_score'],
+            decision=meta['decision']
+        )
+
 
 class ModelLoader:
     """Class to load models from filepath with different libraries"""
     
+    @staticmethod
+    def resolve_path(model_path):
+        """
+        Model version a path points at right now
+        
+        Trained models are named through symbolic links switched to each new version
+        (see app/training/artifacts.py). Resolve once per request and use the result
+        for both the model and its scaler, so they always come from the same version.
+        
+        Args:
+            model_path (str): Path as requested
+        
+        Returns:
+            str: Path with every symbolic link resolved
+        """
+        return os.path.realpath(model_path)
+    
+    @staticmethod
+    def get_model(model_path, model_type=None, alias=None):
+        """
+        Load model from filepath through the process-wide model cache
+        
+        Args:
+            model_path (str): Path to model file (ideally as returned by resolve_path)
+            model_type (str): Library type, same values as load_model
+            alias (str): Path as requested when model_path was resolved from it
+        
+        Returns:
+            model: Loaded (possibly cached) model object
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        
+        # Pipelines are self-describing: served as such whatever type the request named
+        if model_type is None or model_type == 'auto' or os.path.isfile(os.path.join(model_path, 'pipeline.json')):
+            model_type = ModelLoader._detect_model_type(model_path)
+        
+        return model_cache.get_or_load(model_path, model_type, ModelLoader.load_model, alias=alias)
+    
     @staticmethod
     def load_model(model_path, model_type=None):
         """
@@ -16,7 +555,7 @@ class ModelLoader:
         
         Args:
             model_path (str): Path to model file
-            model_type (str): Library type (keras, pytorch, sklearn, xgboost, pickle, joblib)
+            model_type (str): Library type (keras, pytorch, sklearn, xgboost, pickle, joblib, npstore, pipeline)
                             If None, will auto-detect from extension
         
         Returns:
@@ -42,6 +581,10 @@ class ModelLoader:
                 return ModelLoader._load_sklearn_model(model_path)
             elif model_type == 'joblib':
                 return ModelLoader._load_sklearn_model(model_path)
+            elif model_type == 'npstore':
+                return ModelLoader._load_npstore_model(model_path)
+            elif model_type == 'pipeline':
+                return ModelLoader._load_pipeline_model(model_path)
             else:
                 raise ValueError(f"Unsupported model type: {model_type}")
                 
@@ -53,11 +596,17 @@ class ModelLoader:
         """Auto-detect model type from file extension"""
         _, ext = os.path.splitext(model_path.lower())
         
+        # Pipeline directories (scaler + model + output rule)
+        if ext == '.pipeline' or os.path.isfile(os.path.join(model_path, 'pipeline.json')):
+            return 'pipeline'
+        # Memory-mapped model store directories
+        if ext == '.npstore' or os.path.isfile(os.path.join(model_path, 'meta.json')):
+            return 'npstore'
         # Keras/TensorFlow models
         if ext in ['.keras', '.h5', '.hdf5']:
             return 'keras'
         # PyTorch models
-        elif ext in ['.pt', '.pth']:
+        elif ext in ['.pt', '.pth', '.ts', '.torchscript']:
             return 'pytorch'
         # Pickle files (could be any ML model)
         elif ext in ['.pkl', '.pickle']:
@@ -74,47 +623,153 @@ class ModelLoader:
     
     @staticmethod
     def _load_keras_model(model_path):
-        """Load Keras/TensorFlow model"""
+        """Load Keras/TensorFlow model, preferring the NumPy runtime for supported Sequential MLPs"""
+        if Config_env.KERAS_NUMPY:
+            numpy_model = ModelLoader._load_keras_numpy(model_path)
+            if numpy_model is not None:
+                return numpy_model
+        
         try:
             from tensorflow import keras
             return keras.models.load_model(model_path)
         except ImportError:
             raise ImportError("TensorFlow/Keras not available. Install: pip install tensorflow")
     
+    @staticmethod
+    def _load_keras_numpy(model_path):
+        """
+        Extract a .keras archive into a NumpySequential and check it at load time.
+        Returns None when the model needs TensorFlow (unsupported layers or failed check).
+        
+        KERAS_NUMPY_VERIFY: 'auto' compares against the Keras outputs stored next to the
+        archive, and verifies against Keras and stores them when there are none; 'true'
+        always compares against Keras; 'false' only runs a structural check.
+        """
+        from app.models.keras_numpy import (
+            NumpySequential, UnsupportedKerasModel, check_equivalence, check_reference, check_sanity,
+            load_keras, read_reference, record_reference
+        )
+        
+        numpy_model = None
+        try:
+            numpy_model = NumpySequential.from_keras_file(model_path)
+            
+            verify = Config_env.KERAS_NUMPY_VERIFY
+            expected = read_reference(model_path) if verify == 'auto' else None
+            if verify == 'false':
+                check_sanity(numpy_model)
+            elif expected is not None:
+                check_reference(numpy_model, expected)
+            elif verify == 'true':
+                check_equivalence(numpy_model, load_keras(model_path))
+            else:
+                record_reference(numpy_model, load_keras(model_path), model_path)
+            
+            return numpy_model
+        except ImportError:
+            if numpy_model is None:
+                print(f"Info: {os.path.basename(model_path)} could not be read without TensorFlow")
+                return None
+            print(f"Warning: Keras not available to verify {os.path.basename(model_path)} and no reference outputs "
+                  f"stored (python -m app.models.keras_numpy record), using structural check only")
+            check_sanity(numpy_model)
+            return numpy_model
+        except UnsupportedKerasModel as e:
+            print(f"Info: {os.path.basename(model_path)} needs TensorFlow: {e}")
+            return None
+    
     @staticmethod
     def _load_pytorch_model(model_path):
-        """Load PyTorch model"""
+        """Load PyTorch model (TorchScript archive, pickled module or state dict + architecture), traced and warmed up"""
         try:
-            import torch
-            # Load the model (assumes model was saved with torch.save)
-            model = torch.load(model_path, map_location='cpu')
-            # Set to evaluation mode
-            if hasattr(model, 'eval'):
-                model.eval()
-            return model
+            from app.models import torch_runtime
         except ImportError:
             raise ImportError("PyTorch not available. Install: pip install torch")
+        return torch_runtime.load_model(model_path)
     
     @staticmethod
     def _load_sklearn_model(model_path):
         """Load scikit-learn model"""
         try:
+            import joblib
             import sklearn
-            return joblib.load(model_path)
+            model = joblib.load(model_path)
+            if Config_env.COMPILE_FORESTS and CompiledForest.supports(model):
+                return ModelLoader._compile_forest(model)
+            return model
         except ImportError:
             raise ImportError("scikit-learn not available. Install: pip install scikit-learn")
     
+    @staticmethod
+    def _probe_rows(compiled):
+        """
+        Probe rows placed exactly on and right next to the split thresholds of a
+        CompiledForest, where a mismatch in comparison or float32 rounding would show up
+        """
+        rng = np.random.default_rng(0)
+        is_split = compiled.children[0::2] != np.arange(len(compiled.feature))
+        probe = rng.uniform(-3, 3, size=(64, compiled.n_features))
+        for index in range(compiled.n_features):
+            thresholds = compiled.threshold[is_split & (compiled.feature == index)]
+            if len(thresholds):
+                probe[:, index] = rng.choice(thresholds, size=len(probe))
+        probe[32:] += rng.normal(scale=1e-6, size=probe[32:].shape)
+        return probe
+    
+    @staticmethod
+    def _compile_forest(model):
+        """
+        Swap a scikit-learn forest for its CompiledForest, after checking on probe rows
+        that both give identical predictions (falls back to the estimator otherwise)
+        """
+        compiled = CompiledForest.from_sklearn(model, large_batch_rows=Config_env.FOREST_LARGE_BATCH_ROWS)
+        probe = ModelLoader._probe_rows(compiled)
+        if not np.array_equal(compiled.predict(probe), model.predict(probe)):
+            print(f"Warning: compiled forest differs from {type(model).__name__}, using the estimator")
+            return model
+        return compiled
+    
+    @staticmethod
+    def _compile_xgboost(booster):
+        """
+        Swap an XGBoost Booster for its CompiledForest, after checking on probe rows
+        that both give identical predictions (falls back to the booster otherwise)
+        """
+        compiled = CompiledForest.from_xgboost(booster)
+        probe = ModelLoader._probe_rows(compiled)
+        expected = ModelPredictor._predict_raw(booster, probe, 'xgboost')
+        if not np.array_equal(np.asarray(compiled.predict(probe), dtype=np.float64), expected):
+            print("Warning: compiled forest differs from the XGBoost booster, using the booster")
+            return booster
+        return compiled
+    
     @staticmethod
     def _load_xgboost_model(model_path):
-        """Load XGBoost model"""
+        """Load XGBoost model, pinned to XGBOOST_NTHREAD threads and optionally compiled (COMPILE_XGBOOST)"""
         try:
             import xgboost as xgb
             model = xgb.Booster()
             model.load_model(model_path)
+            # By default every call uses all cores, oversubscribing the CPUs shared by the workers
+            model.set_param({'nthread': Config_env.XGBOOST_NTHREAD, 'device': 'cpu'})
+            if Config_env.COMPILE_XGBOOST and CompiledForest.supports_xgboost(model):
+                return ModelLoader._compile_xgboost(model)
             return model
         except ImportError:
             raise ImportError("XGBoost not available. Install: pip install xgboost")
     
+    @staticmethod
+    def _load_npstore_model(model_path):
+        """Load a .npstore directory with its arrays memory-mapped read-only"""
+        from app.models.model_store import load_store
+        return load_store(model_path, mmap_mode='r')
+    
+    @staticmethod
+    def _load_pipeline_model(model_path):
+        """Load a .pipeline directory, checking it against the input schema once"""
+        from app.models.pipeline import load_pipeline
+        return load_pipeline(model_path)
+    
     @staticmethod
     def _load_pickle_model(model_path):
         """Load model from pickle file"""
@@ -124,6 +779,7 @@ class ModelLoader:
     @staticmethod
     def _load_joblib_model(model_path):
         """Load model from joblib file"""
+        import joblib
         return joblib.load(model_path)
 
 
@@ -148,88 +804,142 @@ class ModelPredictor:
             if model_type is None:
                 model_type = ModelPredictor._infer_model_type(model)
             
-            # Keras/TensorFlow models
-            if model_type == 'keras' or ('tensorflow' in str(type(model)) and hasattr(model, 'predict')):
-                result = model.predict(inputs)
-                # Keras usually returns 2D array, get first value
-                if hasattr(result, 'flatten'):
-                    raw_result = float(result.flatten()[0])
-                elif hasattr(result, '__getitem__'):
-                    raw_result = float(result[0][0] if hasattr(result[0], '__getitem__') else result[0])
-                else:
-                    raw_result = float(result)
-                
-                # Convert using smart percentage conversion
-                return ModelPredictor._convert_to_percentage(raw_result, model_type)
+            result = ModelPredictor._predict_raw(model, inputs, model_type)
+            raw_result = float(result[0])
             
-            # PyTorch models
-            elif model_type == 'pytorch' or 'torch' in str(type(model)):
-                import torch
-                # Convert inputs to tensor if needed
-                if not isinstance(inputs, torch.Tensor):
-                    if hasattr(inputs, 'values'):
-                        # Pandas DataFrame
-                        inputs_tensor = torch.FloatTensor(inputs.values)
-                    else:
-                        # Numpy array or list
-                        inputs_tensor = torch.FloatTensor(inputs)
-                else:
-                    inputs_tensor = inputs
-                
-                # Make prediction
-                with torch.no_grad():
-                    result = model(inputs_tensor)
-                
-                # Convert result to float and percentage
-                if hasattr(result, 'item'):
-                    raw_result = float(result.item())
-                elif hasattr(result, 'detach'):
-                    raw_result = float(result.detach().numpy().flatten()[0])
-                else:
-                    raw_result = float(result[0])
-                
-                # Convert to percentage
-                return ModelPredictor._convert_to_percentage(raw_result, model_type)
+            # Pipelines carry the output rule they were saved with
+            output_rule = getattr(model, 'output_rule', None)
+            if output_rule is not None:
+                return output_rule.convert(raw_result)
             
-            # XGBoost models
-            elif model_type == 'xgboost' or 'xgboost' in str(type(model)):
-                import xgboost as xgb
-                if hasattr(inputs, 'values'):
-                    # Pandas DataFrame
-                    dmatrix = xgb.DMatrix(inputs.values)
-                else:
-                    # Numpy array
-                    dmatrix = xgb.DMatrix(inputs)
-                result = model.predict(dmatrix)
-                raw_result = float(result[0])
+            # Convert using smart percentage conversion
+            return ModelPredictor._convert_to_percentage(raw_result, model_type)
                 
-                # Convert to percentage
-                return ModelPredictor._convert_to_percentage(raw_result, model_type)
+        except Exception as e:
+            raise Exception(f"Prediction failed: {str(e)}")
+    
+    @staticmethod
+    def predict_batch(model, inputs, model_type=None):
+        """
+        Perform prediction for every row of inputs with a single model call
+        
+        Args:
+            model: Loaded model object
+            inputs: 2D input data (numpy array or pandas DataFrame), one row per sample
+            model_type (str): Model type for appropriate prediction handling
             
-            # Scikit-learn and other models with predict method
-            elif hasattr(model, 'predict'):
-                result = model.predict(inputs)
-                if hasattr(result, '__iter__') and not isinstance(result, str):
-                    raw_result = float(result[0])
-                else:
-                    raw_result = float(result)
+        Returns:
+            numpy.ndarray: One percentage per input row
+        """
+        try:
+            if model_type is None:
+                model_type = ModelPredictor._infer_model_type(model)
+            
+            result = ModelPredictor._predict_raw(model, inputs, model_type)
+            output_rule = getattr(model, 'output_rule', None)
+            if output_rule is not None:
+                return output_rule.convert_batch(result)
+            return ModelPredictor._convert_to_percentage_batch(result, model_type)
                 
-                # For consistency, assume sklearn models also return decimal values
-                # that need to be converted to percentage
-                return ModelPredictor._convert_to_percentage(raw_result, model_type)
+        except Exception as e:
+            raise Exception(f"Prediction failed: {str(e)}")
+    
+    @staticmethod
+    def predict_each(model, inputs, model_type=None):
+        """
+        Perform predict for every row of inputs with a single model call
+        
+        Unlike predict_batch, each value is converted like predict converts a single
+        row, so it equals the response of an unbatched request.
+        
+        Args:
+            model: Loaded model object
+            inputs: 2D input data, one row per request
+            model_type (str): Model type for appropriate prediction handling
             
-            else:
-                raise ValueError(f"Unsupported model type for prediction: {type(model)}")
+        Returns:
+            list: One prediction per input row
+        """
+        try:
+            if model_type is None:
+                model_type = ModelPredictor._infer_model_type(model)
+            
+            result = ModelPredictor._predict_raw(model, inputs, model_type)
+            output_rule = getattr(model, 'output_rule', None)
+            if output_rule is not None:
+                return [output_rule.convert(raw_result) for raw_result in result.tolist()]
+            return [ModelPredictor._convert_to_percentage(raw_result, model_type) for raw_result in result.tolist()]
                 
         except Exception as e:
             raise Exception(f"Prediction failed: {str(e)}")
     
+    @staticmethod
+    def predict_rows(model, scaler, matrix, model_type=None):
+        """
+        Scale raw input rows with the given scaler and predict them with one model call
+        
+        Args:
+            model: Loaded model object
+            scaler: Scaler from the scaler registry (transform takes the raw ndarray)
+            matrix (numpy.ndarray): (n, 4) raw inputs in INPUT_FIELDS order
+            model_type (str): Model type for appropriate prediction handling
+            
+        Returns:
+            numpy.ndarray: One percentage per input row
+        """
+        scaled_data = scaler.transform(matrix)
+        return ModelPredictor.predict_batch(model, scaled_data, model_type)
+    
+    @staticmethod
+    def _predict_raw(model, inputs, model_type):
+        """
+        Run the model once and return its raw outputs as a flat float64 array
+        (one value per input row)
+        """
+        # Pipelines: inputs are already scaled by the pipeline's input_scaler
+        if model_type == 'pipeline' or hasattr(model, 'output_rule'):
+            return ModelPredictor._predict_raw(model.model, inputs, model.model_type)
+        
+        # Keras/TensorFlow models
+        if model_type == 'keras' or ('tensorflow' in str(type(model)) and hasattr(model, 'predict')):
+            result = model.predict(inputs)
+        
+        # PyTorch models
+        elif model_type == 'pytorch' or 'torch' in str(type(model)):
+            from app.models import torch_runtime
+            result = torch_runtime.predict(model, inputs)
+        
+        # XGBoost boosters: in-place prediction on the array, no DMatrix per call
+        elif hasattr(model, 'inplace_predict'):
+            if hasattr(inputs, 'values'):
+                # Pandas DataFrame
+                inputs = inputs.values
+            result = model.inplace_predict(np.ascontiguousarray(inputs, dtype=np.float32))
+        
+        # XGBoost sklearn wrappers (XGBRegressor: in-place prediction internally)
+        elif 'xgboost' in str(type(model)):
+            if hasattr(inputs, 'values'):
+                # Pandas DataFrame
+                inputs = inputs.values
+            result = model.predict(np.ascontiguousarray(inputs, dtype=np.float32))
+        
+        # Scikit-learn and other models with predict method
+        elif hasattr(model, 'predict'):
+            result = model.predict(inputs)
+        
+        else:
+            raise ValueError(f"Unsupported model type for prediction: {type(model)}")
+        
+        return np.asarray(result, dtype=np.float64).reshape(-1)
+    
     @staticmethod
     def _infer_model_type(model):
         """Infer model type from model object"""
         model_type_str = str(type(model)).lower()
         
-        if 'tensorflow' in model_type_str or 'keras' in model_type_str:
+        if hasattr(model, 'output_rule'):
+            return 'pipeline'
+        elif 'tensorflow' in model_type_str or 'keras' in model_type_str:
             return 'keras'
         elif 'torch' in model_type_str:
             return 'pytorch'
@@ -250,7 +960,7 @@ class ModelPredictor:
         # that needs to be converted to percentage (0-100)
         
         # Models that typically output 0-1 probability
-        if model_type in ['keras', 'pytorch', 'sklearn', 'xgboost','pickle', 'joblib']:
+        if model_type in PROBABILITY_MODEL_TYPES:
             # # Check if result is already in percentage range (>1)
             # if raw_result > 1:
             #     # Already in percentage format
@@ -262,3 +972,14 @@ class ModelPredictor:
         else:
             # Unknown models, assume percentage format
             return round(raw_result, 2)
+
+    @staticmethod
+    def _convert_to_percentage_batch(raw_results, model_type):
+        """
+        Vectorized variant of _convert_to_percentage for an array of raw results
+        """
+        raw_results = np.asarray(raw_results, dtype=np.float64)
+        if model_type in PROBABILITY_MODEL_TYPES:
+            return np.round(raw_results * 100, 2)
+        else:
+            return np.round(raw_results, 2)
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Input Schema
+Feature order, request field names and validated ranges shared by the prediction routes
+"""
+import numpy as np
+
+# Request field names, in the column order the models and scalers were fitted with
+INPUT_FIELDS = ['pc_mxene_loading', 'laminin_peptide_loading', 'stimulation_frequency', 'applied_voltage']
+
+# Dataset column names (same as used for fitting the scaler)
+FEATURE_COLUMNS = ['MXene (mg/mL)', 'Laminin peptide (ug/mL)', 'Electric stimulation (Hz)', 'Voltage (V)']
+
+# Validated (min, max) range of every input field
+INPUT_BOUNDS = {
+    'pc_mxene_loading': (0, 0.3),
+    'laminin_peptide_loading': (0, 150),
+    'stimulation_frequency': (0, 3),
+    'applied_voltage': (0, 3)
+}
+
+SUPPORTED_MODEL_TYPES = ['keras', 'pytorch', 'sklearn', 'xgboost', 'pickle', 'joblib', 'npstore', 'pipeline']
+
+# Bounds as arrays aligned with INPUT_FIELDS, for vectorized checks
+LOWER_BOUNDS = np.array([INPUT_BOUNDS[field][0] for field in INPUT_FIELDS], dtype=np.float64)
+UPPER_BOUNDS = np.array([INPUT_BOUNDS[field][1] for field in INPUT_FIELDS], dtype=np.float64)
+
+
+def rows_to_matrix(rows=None, columns=None):
+    """
+    Build an (n, 4) float64 matrix from a batch payload
+
+    Args:
+        rows (list): List of [mxene, laminin, frequency, voltage] arrays
+        columns (dict): Columnar payload mapping every INPUT_FIELDS name to a list of values
+
+    Returns:
+        numpy.ndarray: Input matrix in INPUT_FIELDS order
+    """
+    if rows is not None:
+        matrix = np.asarray(rows, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(INPUT_FIELDS):
+            raise ValueError(f'rows must be a list of [{", ".join(INPUT_FIELDS)}] arrays')
+        return matrix
+
+    if columns is not None:
+        missing = [field for field in INPUT_FIELDS if field not in columns]
+        if missing:
+            raise ValueError(f'Missing columns: {missing}')
+        lengths = {len(columns[field]) for field in INPUT_FIELDS}
+        if len(lengths) != 1:
+            raise ValueError('All columns must have the same length')
+        return np.column_stack([np.asarray(columns[field], dtype=np.float64) for field in INPUT_FIELDS])
+
+    raise ValueError("Provide either 'rows' or 'columns'")
+
+
+def validate_matrix(matrix):
+    """
+    Check every row of an input matrix against INPUT_BOUNDS in one pass
+
+    Args:
+        matrix (numpy.ndarray): (n, 4) input matrix in INPUT_FIELDS order
+
+    Returns:
+        str: Error message for the first invalid value, or None if all rows are valid
+    """
+    invalid = ~np.isfinite(matrix) | (matrix < LOWER_BOUNDS) | (matrix > UPPER_BOUNDS)
+    if not invalid.any():
+        return None
+
+    row, col = np.argwhere(invalid)[0]
+    field = INPUT_FIELDS[col]
+    low, high = INPUT_BOUNDS[field]
+    return f'Row {row}: {field} must be between {low} and {high}'
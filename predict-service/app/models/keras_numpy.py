@@ -0,0 +1,459 @@
+"""
+NumPy Keras Runtime
+Evaluate small Sequential Keras models (.keras archives) with NumPy matmuls,
+without importing TensorFlow
+
+Without Keras in the serving process, the equivalence check compares against Keras
+outputs recorded once next to the archive:
+
+    python -m app.models.keras_numpy record model.keras   # writes model.keras.reference.json
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+
+import numpy as np
+
+
+class UnsupportedKerasModel(Exception):
+    """The archive uses a layer or option the NumPy runtime does not implement"""
+
+
+# Element-wise activations, evaluated in float32 like Keras
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'relu6': lambda x: np.clip(x, 0, 6),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh,
+    'softplus': lambda x: np.logaddexp(0, x),
+    'softsign': lambda x: x / (1 + np.abs(x)),
+    'elu': lambda x: np.where(x > 0, x, np.expm1(x)),
+    'selu': lambda x: np.float32(1.0507009873554805) * np.where(x > 0, x, np.float32(1.6732632423543772) * np.expm1(x)),
+    'swish': lambda x: x / (1 + np.exp(-x)),
+    'silu': lambda x: x / (1 + np.exp(-x)),
+    'exponential': np.exp,
+    'softmax': lambda x: np.exp(x - x.max(axis=-1, keepdims=True)) / np.exp(x - x.max(axis=-1, keepdims=True)).sum(axis=-1, keepdims=True)
+}
+
+# Layers that are the identity at inference time
+INFERENCE_IDENTITY_LAYERS = ['InputLayer', 'Dropout', 'GaussianNoise', 'GaussianDropout', 'AlphaDropout', 'SpatialDropout1D', 'ActivityRegularization']
+
+
+def _activation_name(activation):
+    """Activation name from a Keras config value (string or serialized object)"""
+    if isinstance(activation, dict):
+        activation = activation.get('config', {}).get('name') or activation.get('class_name')
+    if activation is None:
+        return 'linear'
+    if activation not in ACTIVATIONS:
+        raise UnsupportedKerasModel(f"Unsupported activation: {activation}")
+    return activation
+
+
+class NumpySequential:
+    """
+    NumPy implementation of a Sequential stack of Dense / Activation / normalization / dropout layers
+
+    Every layer is reduced to one of these ops:
+        ('dense', kernel, bias, activation)
+        ('affine', scale, shift)        # Normalization and BatchNormalization, folded
+        ('layer_norm', gamma, beta, epsilon)
+        ('activation', name)
+    """
+
+    def __init__(self, ops, n_features):
+        self.ops = ops
+        self.n_features = int(n_features)
+        self.n_features_in_ = self.n_features
+
+    @classmethod
+    def from_keras_file(cls, model_path):
+        """
+        Build from a Keras 3 .keras archive (config.json + model.weights.h5)
+
+        Raises:
+            UnsupportedKerasModel: If the model is not a supported Sequential stack
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise UnsupportedKerasModel("h5py not available. Install: pip install h5py")
+
+        if not zipfile.is_zipfile(model_path):
+            raise UnsupportedKerasModel("Not a Keras 3 .keras archive")
+
+        with zipfile.ZipFile(model_path) as archive:
+            names = archive.namelist()
+            if 'config.json' not in names or 'model.weights.h5' not in names:
+                raise UnsupportedKerasModel("Archive has no config.json/model.weights.h5")
+            config = json.loads(archive.read('config.json'))
+            weights_bytes = archive.read('model.weights.h5')
+
+        if config.get('class_name') != 'Sequential':
+            raise UnsupportedKerasModel(f"Only Sequential models are supported, got {config.get('class_name')}")
+
+        with h5py.File(io.BytesIO(weights_bytes), 'r') as weights:
+            return cls._from_config(config['config'], weights)
+
+    @classmethod
+    def _from_config(cls, config, weights):
+        """Translate the Sequential layer configs into ops"""
+        ops = []
+        n_features = None
+        width = None
+
+        # Keras 3 stores weights under a per-class counter path (dense, dense_1, ...),
+        # not under the layer's own name; fall back to the name for older archives
+        path_counts = {}
+
+        def weights_path(class_name):
+            snake = re.sub('([a-z])([A-Z])', r'\1_\2', re.sub('(.)([A-Z][a-z]+)', r'\1_\2', class_name)).lower()
+            count = path_counts.get(snake, 0)
+            path_counts[snake] = count + 1
+            return snake if count == 0 else f'{snake}_{count}'
+
+        def layer_vars(path, name):
+            group = weights.get(f'layers/{path}/vars')
+            if group is None or len(group) == 0:
+                group = weights.get(f'layers/{name}/vars')
+            if group is None:
+                return []
+            return [np.asarray(group[key], dtype=np.float32) for key in sorted(group.keys(), key=int)]
+
+        build_shape = config.get('build_input_shape')
+        if build_shape:
+            n_features = width = build_shape[-1]
+
+        for layer in config.get('layers', []):
+            class_name = layer.get('class_name')
+            layer_config = layer.get('config', {})
+            name = layer_config.get('name')
+            path = weights_path(class_name) if class_name != 'InputLayer' else None
+
+            if class_name in INFERENCE_IDENTITY_LAYERS:
+                shape = layer_config.get('batch_shape') or layer_config.get('batch_input_shape')
+                if class_name == 'InputLayer' and shape:
+                    n_features = width = shape[-1]
+                continue
+
+            if class_name == 'Flatten':
+                # Inputs are already (batch, features)
+                continue
+
+            if class_name == 'Dense':
+                variables = layer_vars(path, name)
+                if not variables:
+                    raise UnsupportedKerasModel(f"No weights found for layer {name}")
+                kernel = variables[0]
+                bias = variables[1] if layer_config.get('use_bias', True) else np.zeros(kernel.shape[1], dtype=np.float32)
+                if n_features is None:
+                    n_features = kernel.shape[0]
+                width = kernel.shape[1]
+                ops.append(('dense', kernel, bias, _activation_name(layer_config.get('activation'))))
+
+            elif class_name == 'Activation':
+                ops.append(('activation', _activation_name(layer_config.get('activation'))))
+
+            elif class_name in ['ReLU', 'LeakyReLU', 'ELU', 'Softmax']:
+                if class_name == 'ReLU' and (layer_config.get('max_value') or layer_config.get('negative_slope') or layer_config.get('threshold')):
+                    raise UnsupportedKerasModel("ReLU with max_value/negative_slope/threshold is not supported")
+                if class_name == 'LeakyReLU':
+                    raise UnsupportedKerasModel("LeakyReLU is not supported")
+                if class_name == 'ELU' and layer_config.get('alpha', 1.0) != 1.0:
+                    raise UnsupportedKerasModel("ELU with alpha != 1 is not supported")
+                ops.append(('activation', class_name.lower()))
+
+            elif class_name == 'Normalization':
+                if layer_config.get('mean') is not None:
+                    mean = np.asarray(layer_config['mean'], dtype=np.float32).reshape(-1)
+                    variance = np.asarray(layer_config['variance'], dtype=np.float32).reshape(-1)
+                else:
+                    variables = layer_vars(path, name)
+                    mean, variance = variables[0].reshape(-1), variables[1].reshape(-1)
+                std = np.maximum(np.sqrt(variance), np.float32(1e-7))
+                if layer_config.get('invert'):
+                    ops.append(('affine', std, mean))
+                else:
+                    ops.append(('affine', 1 / std, -mean / std))
+
+            elif class_name == 'BatchNormalization':
+                variables = layer_vars(path, name)
+                gamma = variables.pop(0) if layer_config.get('scale', True) else None
+                beta = variables.pop(0) if layer_config.get('center', True) else None
+                moving_mean, moving_variance = variables[0], variables[1]
+                inv_std = 1 / np.sqrt(moving_variance + np.float32(layer_config.get('epsilon', 1e-3)))
+                scale = inv_std * gamma if gamma is not None else inv_std
+                shift = -moving_mean * scale + (beta if beta is not None else 0)
+                ops.append(('affine', scale.astype(np.float32), shift.astype(np.float32)))
+
+            elif class_name == 'LayerNormalization':
+                if layer_config.get('rms_scaling'):
+                    raise UnsupportedKerasModel("LayerNormalization with rms_scaling is not supported")
+                variables = layer_vars(path, name)
+                gamma = variables.pop(0) if layer_config.get('scale', True) else np.ones(width, dtype=np.float32)
+                beta = variables.pop(0) if layer_config.get('center', True) else np.zeros(width, dtype=np.float32)
+                ops.append(('layer_norm', gamma, beta, np.float32(layer_config.get('epsilon', 1e-3))))
+
+            else:
+                raise UnsupportedKerasModel(f"Unsupported layer: {class_name}")
+
+        if n_features is None or not any(op[0] == 'dense' for op in ops):
+            raise UnsupportedKerasModel("Model has no Dense layer")
+
+        return cls(ops, n_features)
+
+    def predict(self, inputs, **kwargs):
+        """
+        Forward pass
+
+        Args:
+            inputs: (n, n_features) numpy array or pandas DataFrame
+
+        Returns:
+            numpy.ndarray: (n, units) float32 outputs, like keras Model.predict
+        """
+        x = np.asarray(inputs.values if hasattr(inputs, 'values') else inputs, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.n_features:
+            raise ValueError(f"Input has {x.shape[1]} features, but the model expects {self.n_features}")
+
+        for op in self.ops:
+            kind = op[0]
+            if kind == 'dense':
+                x = ACTIVATIONS[op[3]](x @ op[1] + op[2])
+            elif kind == 'affine':
+                x = x * op[1] + op[2]
+            elif kind == 'layer_norm':
+                mean = x.mean(axis=-1, keepdims=True)
+                variance = x.var(axis=-1, keepdims=True)
+                x = (x - mean) / np.sqrt(variance + op[3]) * op[1] + op[2]
+            else:
+                x = ACTIVATIONS[op[1]](x)
+        return x
+
+    def __call__(self, inputs):
+        return self.predict(inputs)
+
+    @property
+    def nbytes(self):
+        return sum(item.nbytes for op in self.ops for item in op if isinstance(item, np.ndarray))
+
+    def save(self, path):
+        """
+        Save as a directory of raw .npy weight arrays plus meta.json, loadable with np.load(mmap_mode='r')
+
+        Args:
+            path (str): Target directory
+        """
+        os.makedirs(path, exist_ok=True)
+        layers = []
+        for index, op in enumerate(self.ops):
+            kind = op[0]
+            layer = {'kind': kind, 'arrays': []}
+            for position, item in enumerate(op[1:], start=1):
+                if isinstance(item, np.ndarray):
+                    file_name = f'op{index}_{position}.npy'
+                    np.save(os.path.join(path, file_name), np.ascontiguousarray(item, dtype=np.float32))
+                    layer['arrays'].append(file_name)
+                elif kind == 'layer_norm':
+                    layer['epsilon'] = float(item)
+                else:
+                    layer['activation'] = item
+            layers.append(layer)
+
+        meta = {
+            'format': 'numpy_sequential',
+            'version': 1,
+            'n_features': self.n_features,
+            'ops': layers
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """
+        Load a model saved with save()
+
+        Args:
+            path (str): Directory written by save()
+            mmap_mode (str): Passed to np.load, e.g. 'r' to memory-map the weights read-only
+
+        Returns:
+            NumpySequential
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != 'numpy_sequential':
+            raise ValueError(f"Not a NumPy Sequential model: {path}")
+
+        ops = []
+        for layer in meta['ops']:
+            arrays = [np.load(os.path.join(path, file_name), mmap_mode=mmap_mode) for file_name in layer['arrays']]
+            if layer['kind'] == 'dense':
+                ops.append(('dense', arrays[0], arrays[1], layer['activation']))
+            elif layer['kind'] == 'affine':
+                ops.append(('affine', arrays[0], arrays[1]))
+            elif layer['kind'] == 'layer_norm':
+                ops.append(('layer_norm', arrays[0], arrays[1], np.float32(layer['epsilon'])))
+            else:
+                ops.append(('activation', layer['activation']))
+        return cls(ops, meta['n_features'])
+
+
+# Keras outputs on the probe rows, written next to the archive as <model>.keras.reference.json
+REFERENCE_SUFFIX = '.reference.json'
+
+
+def _probe_rows(n_features, n_probe):
+    return np.random.default_rng(0).standard_normal((n_probe, n_features)).astype(np.float32)
+
+
+def _compare(actual, expected, rtol, atol, against):
+    """
+    Returns:
+        float: Largest absolute difference
+
+    Raises:
+        UnsupportedKerasModel: If the outputs differ beyond tolerance
+    """
+    if expected.shape != actual.shape or not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        diff = float(np.max(np.abs(actual - expected))) if expected.shape == actual.shape else float('inf')
+        raise UnsupportedKerasModel(f"NumPy runtime differs from {against} (max abs diff {diff})")
+    return float(np.max(np.abs(actual - expected)))
+
+
+def check_equivalence(numpy_model, keras_model, n_probe=64, rtol=1e-4, atol=1e-4):
+    """
+    Compare the NumPy runtime against the Keras model on random probe rows
+
+    Returns:
+        float: Largest absolute difference
+
+    Raises:
+        UnsupportedKerasModel: If the outputs differ beyond tolerance
+    """
+    probe = _probe_rows(numpy_model.n_features, n_probe)
+    expected = np.asarray(keras_model.predict(probe, verbose=0), dtype=np.float32)
+    return _compare(numpy_model.predict(probe), expected, rtol, atol, 'Keras')
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_reference(numpy_model, keras_model, model_path, n_probe=64):
+    """
+    Check the NumPy runtime against Keras, then store the Keras outputs on the probe rows
+    next to the archive, so later loads verify without importing Keras
+
+    Returns:
+        str: Path of the reference file, or None if it could not be written
+    """
+    probe = _probe_rows(numpy_model.n_features, n_probe)
+    expected = np.asarray(keras_model.predict(probe, verbose=0), dtype=np.float32)
+    _compare(numpy_model.predict(probe), expected, 1e-4, 1e-4, 'Keras')
+
+    reference_path = model_path + REFERENCE_SUFFIX
+    temp_path = f'{reference_path}.tmp{os.getpid()}'
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump({'sha256': _file_digest(model_path), 'n_probe': n_probe, 'outputs': expected.tolist()}, f)
+        os.replace(temp_path, reference_path)
+    except OSError as e:
+        print(f"Warning: Could not write Keras reference outputs {reference_path}: {e}")
+        return None
+    return reference_path
+
+
+def read_reference(model_path):
+    """
+    Keras outputs stored for this exact archive
+
+    Returns:
+        numpy.ndarray: Expected outputs on the probe rows, or None if there is no reference
+                       or the archive changed since it was written
+    """
+    reference_path = model_path + REFERENCE_SUFFIX
+    try:
+        with open(reference_path) as f:
+            reference = json.load(f)
+        if reference['sha256'] != _file_digest(model_path):
+            print(f"Warning: {os.path.basename(reference_path)} was written for another version of the model, ignoring it")
+            return None
+        return np.asarray(reference['outputs'], dtype=np.float32)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: Could not read Keras reference outputs {reference_path}: {e}")
+        return None
+
+
+def check_reference(numpy_model, expected, rtol=1e-4, atol=1e-4):
+    """
+    Compare the NumPy runtime against stored Keras outputs (see record_reference)
+
+    Raises:
+        UnsupportedKerasModel: If the outputs differ beyond tolerance
+    """
+    probe = _probe_rows(numpy_model.n_features, len(expected))
+    return _compare(numpy_model.predict(probe), expected, rtol, atol, 'the stored Keras outputs')
+
+
+def check_sanity(numpy_model, n_probe=16):
+    """
+    Structural load-time check without Keras: outputs must be finite with one row per input
+
+    Raises:
+        UnsupportedKerasModel: If the forward pass is malformed
+    """
+    output = numpy_model.predict(_probe_rows(numpy_model.n_features, n_probe))
+    if output.ndim != 2 or output.shape[0] != n_probe or not np.all(np.isfinite(output)):
+        raise UnsupportedKerasModel("NumPy runtime produced malformed output")
+
+
+def load_keras(model_path):
+    """The Keras model of an archive (tensorflow.keras, or standalone Keras 3)"""
+    try:
+        from tensorflow import keras
+    except ImportError:
+        import keras
+    return keras.models.load_model(model_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check .keras models against the NumPy runtime')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Verify against Keras and store its outputs next to the archive')
+    record.add_argument('model_paths', nargs='+')
+
+    args = parser.parse_args(argv)
+
+    status = 0
+    for model_path in args.model_paths:
+        try:
+            reference_path = record_reference(NumpySequential.from_keras_file(model_path), load_keras(model_path), model_path)
+            if reference_path is None:
+                status = 1
+            else:
+                print(f"Saved {reference_path}")
+        except Exception as e:
+            print(f"Error: {model_path}: {e}")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
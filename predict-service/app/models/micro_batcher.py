@@ -0,0 +1,160 @@
+"""
+Micro-Batcher
+Coalesce concurrent single-row /predict/model requests for the same model and scaler
+into one vectorized model call
+
+The first request of a (model, scaler) becomes the leader of a new batch. It waits up
+to MICRO_BATCH_MAX_WAIT_MS for other requests to add their rows, stopping early once
+the batch holds MICRO_BATCH_MAX_SIZE rows or every request in flight has joined. It
+then scales and predicts all rows at once and hands each request its own value.
+
+The leader only waits while other /predict/model requests are in flight in this
+process (see tracked), so sequential traffic never pays the wait. Batches form with
+concurrent request threads: the ASGI serving mode or gunicorn --threads; a sync
+worker handles one request at a time and predicts alone.
+
+Each value is converted exactly like ModelPredictor.predict converts a single row,
+so a batched response matches the unbatched one.
+"""
+import functools
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.config.env import Config_env
+from app.models.dynamic_loader import ModelPredictor
+from app.monitoring.metrics import micro_batch_size, micro_batch_wait_seconds
+
+
+class _Batch:
+    """Rows of one (model, scaler) collected by a leader"""
+
+    def __init__(self, model, scaler, model_type, lock):
+        # The batch keeps model and scaler alive, so their ids in the key stay unique
+        self.model = model
+        self.scaler = scaler
+        self.model_type = model_type
+        self.rows = []
+        self.joined_at = []
+        self.results = None
+        self.error = None
+        self.started = None
+        self.filled = threading.Condition(lock)
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Groups concurrent single-row predictions per (model, scaler)"""
+
+    def __init__(self, max_batch_size=32, max_wait_ms=2.0, enabled=False):
+        """
+        Args:
+            max_batch_size (int): Most rows scored by one model call
+            max_wait_ms (float): Longest time a leader waits for more rows
+            enabled (bool): False makes predict score every request on its own
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_ms / 1e3
+        self.enabled = enabled
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """Request threads of the parent do not exist in a forked worker"""
+        self._lock = threading.Lock()
+        self._open = {}  # (id(model), id(scaler), model_type) -> _Batch collecting rows
+        self.in_flight = 0
+
+    def tracked(self, view):
+        """Decorator counting the requests inside a view, the requests that may join a batch"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self.in_flight += 1
+            try:
+                return view(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+        return wrapper
+
+    def predict(self, model, scaler, row, model_type):
+        """
+        Prediction of one raw input row, scored together with concurrent requests
+
+        Args:
+            model: Loaded model object
+            scaler: Scaler from the scaler registry
+            row (numpy.ndarray): (1, 4) raw input in INPUT_FIELDS order
+            model_type (str): Model type of the request
+
+        Returns:
+            tuple: (prediction, seconds spent waiting for the batch to run)
+        """
+        if not self.enabled:
+            return ModelPredictor.predict(model, scaler.transform(row), model_type), 0.0
+
+        key = (id(model), id(scaler), model_type)
+        joined_at = time.perf_counter()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(model, scaler, model_type, self._lock)
+            index = len(batch.rows)
+            batch.rows.append(row)
+            batch.joined_at.append(joined_at)
+            if len(batch.rows) >= self.max_batch_size:
+                # Full: no later request may join, the leader runs it now
+                del self._open[key]
+            if not leader:
+                batch.filled.notify()
+
+            if leader:
+                self._collect(batch, key, joined_at + self.max_wait_seconds)
+
+        if leader:
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index], batch.started - joined_at
+
+    def _collect(self, batch, key, deadline):
+        """Leader side (lock held): wait for rows until the batch is full or the deadline passes"""
+        while self._open.get(key) is batch and len(batch.rows) < self.in_flight:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            batch.filled.wait(remaining)
+        if self._open.get(key) is batch:
+            del self._open[key]
+
+    def _run(self, batch):
+        """Score the rows of a closed batch and wake its requests"""
+        batch.started = time.perf_counter()
+        try:
+            matrix = np.vstack(batch.rows)
+            batch.results = ModelPredictor.predict_each(batch.model, batch.scaler.transform(matrix), batch.model_type)
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+        micro_batch_size.observe(len(batch.rows), batch.model_type)
+        for joined_at in batch.joined_at:
+            micro_batch_wait_seconds.observe(batch.started - joined_at, batch.model_type)
+
+
+# Shared by the request threads of this worker process
+micro_batcher = MicroBatcher(
+    Config_env.MICRO_BATCH_MAX_SIZE,
+    Config_env.MICRO_BATCH_MAX_WAIT_MS,
+    Config_env.MICRO_BATCH
+)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=micro_batcher.reset_after_fork)
@@ -0,0 +1,208 @@
+"""
+Memory-Mapped Model Store
+Save models as directories of raw .npy arrays (<name>.npstore) that every worker
+memory-maps read-only, so preforked gunicorn workers share one copy of the weights
+through the OS page cache instead of each unpickling its own
+
+Usage:
+    python -m app.models.model_store convert ml_model/latest_model.pkl
+    python -m app.models.model_store info ml_model/latest_model.npstore
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from app.models.dynamic_loader import CompiledForest, ModelLoader, ModelPredictor
+from app.models.keras_numpy import NumpySequential
+
+STORE_EXTENSION = '.npstore'
+
+# meta.json "format" -> class with save(path) / load(path, mmap_mode)
+STORE_FORMATS = {
+    'compiled_forest': CompiledForest,
+    'numpy_sequential': NumpySequential
+}
+
+
+def is_store(path):
+    """True if path is a model store directory"""
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+def load_store(path, mmap_mode='r'):
+    """
+    Load a model store, memory-mapping its arrays
+
+    Args:
+        path (str): Store directory
+        mmap_mode (str): np.load mmap mode, None reads the arrays into private memory
+
+    Returns:
+        CompiledForest or NumpySequential
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    store_class = STORE_FORMATS.get(meta.get('format'))
+    if store_class is None:
+        raise ValueError(f"Unknown model store format: {meta.get('format')}")
+    return store_class.load(path, mmap_mode=mmap_mode)
+
+
+def to_store_model(model):
+    """
+    Array-backed equivalent of a loaded model
+
+    Returns:
+        CompiledForest or NumpySequential, or None if the model has no store format
+    """
+    if isinstance(model, (CompiledForest, NumpySequential)):
+        return model
+    if CompiledForest.supports(model):
+        return CompiledForest.from_sklearn(model, keep_source=False)
+    if 'xgboost' in str(type(model)) and CompiledForest.supports_xgboost(model):
+        return CompiledForest.from_xgboost(model)
+    return None
+
+
+def convert_model(model_path, output_path=None, model_type=None):
+    """
+    Convert a model file into a store directory
+
+    The store is written next to the target and renamed into place once its
+    predictions were checked to be identical to the original model's.
+
+    Args:
+        model_path (str): Pickle/joblib forest, XGBoost model or .keras Sequential MLP
+        output_path (str): Store directory, defaults to model_path with a .npstore extension
+        model_type (str): Library type, auto-detected from the extension if None
+
+    Returns:
+        str: Path of the written store
+    """
+    if model_type is None or model_type == 'auto':
+        model_type = ModelLoader._detect_model_type(model_path)
+    if output_path is None:
+        output_path = os.path.splitext(model_path)[0] + STORE_EXTENSION
+
+    model = ModelLoader.load_model(model_path, model_type)
+    store_model = to_store_model(model)
+    if store_model is None:
+        raise ValueError(f"{type(model).__name__} has no array-backed store format")
+
+    temp_path = f'{output_path}.tmp{os.getpid()}'
+    shutil.rmtree(temp_path, ignore_errors=True)
+    try:
+        store_model.save(temp_path)
+
+        probe = np.random.default_rng(0).uniform(-3, 3, size=(256, store_model.n_features))
+        reference = model.source if isinstance(model, CompiledForest) and model.source is not None else model
+        expected = ModelPredictor._predict_raw(reference, probe, model_type)
+        actual = ModelPredictor._predict_raw(load_store(temp_path), probe, 'npstore')
+        if not np.array_equal(expected, actual):
+            raise ValueError(f"Store predictions differ from the original model (max abs diff {np.max(np.abs(expected - actual))})")
+
+        if os.path.exists(output_path):
+            shutil.rmtree(output_path)
+        os.rename(temp_path, output_path)
+    finally:
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+    return output_path
+
+
+def model_arrays(model):
+    """All NumPy arrays held by a store-backed model (or the model bundled in a pipeline)"""
+    if hasattr(model, 'output_rule'):
+        model = model.model
+    if isinstance(model, CompiledForest):
+        return [getattr(model, name) for name in CompiledForest.ARRAYS]
+    if isinstance(model, NumpySequential):
+        return [item for op in model.ops for item in op if isinstance(item, np.ndarray)]
+    return []
+
+
+def mapped_bytes(model):
+    """Bytes of a model's arrays that are memory-mapped (shared through the page cache)"""
+    return int(sum(array.nbytes for array in model_arrays(model) if isinstance(array, np.memmap)))
+
+
+def process_memory():
+    """
+    Memory usage of this process, in kB
+
+    rss counts every resident page, pss divides shared pages between the processes
+    mapping them, so rss - pss is what this worker saves by sharing pages with the
+    master and the other workers.
+
+    Returns:
+        dict: rss_kb, pss_kb, shared_kb, private_kb and shared_savings_kb (Linux),
+              or max_rss_kb only on other platforms
+    """
+    fields = {}
+    for source in ['/proc/self/smaps_rollup', '/proc/self/status']:
+        try:
+            with open(source) as f:
+                for line in f:
+                    name, _, rest = line.partition(':')
+                    parts = rest.split()
+                    if len(parts) == 2 and parts[1] == 'kB':
+                        fields.setdefault(name, int(parts[0]))
+        except OSError:
+            continue
+
+    if 'Rss' in fields:
+        shared = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+        return {
+            'rss_kb': fields['Rss'],
+            'pss_kb': fields.get('Pss', fields['Rss']),
+            'shared_kb': shared,
+            'private_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+            'shared_savings_kb': fields['Rss'] - fields.get('Pss', fields['Rss'])
+        }
+    if 'VmRSS' in fields:
+        return {
+            'rss_kb': fields['VmRSS'],
+            'shared_kb': fields.get('RssFile', 0) + fields.get('RssShmem', 0),
+            'private_kb': fields.get('RssAnon', 0)
+        }
+
+    import resource
+    return {'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert models into memory-mappable .npstore directories')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='Convert a model file into a store directory')
+    convert.add_argument('model_path')
+    convert.add_argument('-o', '--output', default=None, help='Store directory (default: <model>.npstore)')
+    convert.add_argument('--model-type', default=None, help='keras, sklearn, xgboost, pickle or joblib')
+
+    info = commands.add_parser('info', help='Describe a store directory')
+    info.add_argument('store_path')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'convert':
+            output_path = convert_model(args.model_path, args.output, args.model_type)
+            print(f"Saved {output_path} ({load_store(output_path).nbytes} bytes of arrays)")
+        else:
+            with open(os.path.join(args.store_path, 'meta.json')) as f:
+                meta = json.load(f)
+            meta['nbytes'] = load_store(args.store_path).nbytes
+            print(json.dumps(meta, indent=2))
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
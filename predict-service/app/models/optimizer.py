@@ -0,0 +1,356 @@
+"""
+Inverse Design Optimizer
+Search the validated input space for the settings that maximize predicted viability
+(or bring it as close as possible to a target value)
+"""
+import json
+import math
+import time
+
+import numpy as np
+
+from app.models.dynamic_loader import CompiledForest, ModelPredictor
+from app.models.input_schema import INPUT_FIELDS
+from app.models.sampling import iter_product, sample_unit
+
+OPTIMIZATION_METHODS = ['auto', 'tree', 'cmaes', 'random']
+
+
+def tree_split_thresholds(model):
+    """
+    Collect the split thresholds of a tree ensemble, per input feature
+
+    Supports CompiledForest, scikit-learn trees/forests/gradient boosting and XGBoost boosters,
+    also bundled in a pipeline. Thresholds are in the model's input space, i.e. after scaling.
+
+    Args:
+        model: Loaded model object
+
+    Returns:
+        list: One sorted array of unique thresholds per feature, or None if the model is not a tree ensemble
+    """
+    n_features = len(INPUT_FIELDS)
+    per_feature = [[] for _ in range(n_features)]
+
+    # Pipeline: thresholds of the bundled model
+    if hasattr(model, 'output_rule'):
+        model = model.model
+
+    # Flat array forest: split nodes are the ones whose children are not themselves
+    if isinstance(model, CompiledForest):
+        is_split = model.children[0::2] != np.arange(len(model.feature))
+        return [np.unique(model.threshold[is_split & (model.feature == index)]) for index in range(n_features)]
+
+    # XGBoost: sklearn wrapper or raw Booster
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    if 'xgboost' in str(type(booster)) and hasattr(booster, 'get_dump'):
+        feature_names = booster.feature_names
+
+        def walk(node):
+            if 'split' in node:
+                feature = node['split']
+                index = feature_names.index(feature) if feature_names else int(feature[1:])
+                per_feature[index].append(float(node['split_condition']))
+                for child in node.get('children', []):
+                    walk(child)
+
+        for tree_dump in booster.get_dump(dump_format='json'):
+            walk(json.loads(tree_dump))
+
+    else:
+        # scikit-learn: single tree, forest (list of trees) or gradient boosting (2D array of trees)
+        if hasattr(model, 'tree_'):
+            trees = [model]
+        elif hasattr(model, 'estimators_'):
+            trees = list(np.asarray(model.estimators_, dtype=object).reshape(-1))
+        else:
+            return None
+
+        if not trees or not all(hasattr(tree, 'tree_') for tree in trees):
+            return None
+
+        for tree in trees:
+            split_nodes = tree.tree_.feature >= 0
+            features = tree.tree_.feature[split_nodes]
+            thresholds = tree.tree_.threshold[split_nodes]
+            for index in range(n_features):
+                per_feature[index].append(thresholds[features == index])
+
+        per_feature = [np.concatenate(values) if values else [] for values in per_feature]
+
+    return [np.unique(np.asarray(values, dtype=np.float64)) for values in per_feature]
+
+
+class ViabilityOptimizer:
+    """
+    Black-box and tree-aware search over the validated input space
+
+    Every candidate is scored through the same scaler + ModelPredictor path as /predict/batch,
+    in batches, and the search stops when the latency budget is spent.
+    """
+
+    def __init__(self, model, scaler, model_type, resolved_axes, target=None, time_budget_ms=2000, seed=None):
+        """
+        Args:
+            model: Loaded model object
+            scaler: Fitted scaler for the model's input features
+            model_type (str): Model type for ModelPredictor
+            resolved_axes (list): (low, high, steps) per field, from sampling.resolve_axes
+            target (float): Target viability in %; None maximizes viability
+            time_budget_ms (float): Wall-clock budget for the whole search
+            seed (int): Random seed for reproducibility
+        """
+        self.model = model
+        self.scaler = scaler
+        self.model_type = model_type
+        self.low = np.array([axis[0] for axis in resolved_axes], dtype=np.float64)
+        self.high = np.array([axis[1] for axis in resolved_axes], dtype=np.float64)
+        self.target = target
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+
+        self.started_at = time.perf_counter()
+        self.deadline = self.started_at + time_budget_ms / 1000.0
+        self.evaluations = 0
+        self.budget_exhausted = False
+        self.best_inputs = None
+        self.best_prediction = None
+        self.best_loss = np.inf
+
+    def time_left(self):
+        """Seconds left in the latency budget"""
+        return self.deadline - time.perf_counter()
+
+    def to_raw(self, unit_points):
+        """Map points from the unit cube to the input ranges"""
+        return self.low + np.clip(unit_points, 0.0, 1.0) * (self.high - self.low)
+
+    def evaluate(self, points):
+        """
+        Score raw input points in one batch and track the best one
+
+        Returns:
+            numpy.ndarray: Loss per point (lower is better)
+        """
+        predictions = ModelPredictor.predict_rows(self.model, self.scaler, points, self.model_type)
+        self.evaluations += len(points)
+
+        if self.target is None:
+            losses = -predictions
+        else:
+            losses = np.abs(predictions - self.target)
+
+        best = int(np.argmin(losses))
+        if losses[best] < self.best_loss:
+            self.best_loss = float(losses[best])
+            self.best_inputs = points[best].copy()
+            self.best_prediction = float(predictions[best])
+        return losses
+
+    def run(self, method='auto', n_random=256, n_restarts=4, max_tree_cells=2000000, chunk_size=5000):
+        """
+        Run the search
+
+        Args:
+            method (str): 'auto', 'tree' (leaf-cell enumeration), 'cmaes' (random restarts + CMA-ES) or 'random'.
+                Tree enumeration covers the full product of cells when it has at most max_tree_cells cells,
+                otherwise it runs coordinate descent that enumerates the cells of one axis at a time.
+            n_random (int): Number of Latin-hypercube samples in the random phase
+            n_restarts (int): Number of CMA-ES runs started from the best random samples
+            max_tree_cells (int): Largest number of leaf cells enumerated exactly
+            chunk_size (int): Points scored per model call during enumeration
+
+        Returns:
+            dict: Best inputs, predicted viability, evaluation count and search details
+        """
+        method_used = method
+        exact = False
+
+        if method in ['auto', 'tree']:
+            cells = self._tree_cells()
+            n_cells = math.prod(len(values) for values in cells) if cells is not None else None
+
+            if cells is not None and n_cells <= max_tree_cells:
+                method_used = 'tree'
+                exact = self._enumerate(cells, chunk_size)
+            elif cells is not None:
+                # Too many cells for the full product: exact enumeration along one axis at a time
+                method_used = 'tree_coordinate'
+                starts = self._random_phase(n_random, max(n_restarts, 1))
+                for start in starts:
+                    if self.time_left() <= 0:
+                        self.budget_exhausted = True
+                        break
+                    self._coordinate_search(cells, self.to_raw(start))
+            elif method == 'tree':
+                raise ValueError('Tree enumeration requires a RandomForest/tree ensemble or XGBoost model')
+            else:
+                method_used = 'cmaes'
+
+        if method_used in ['cmaes', 'random']:
+            starts = self._random_phase(n_random, n_restarts)
+            if method_used == 'cmaes':
+                for start in starts:
+                    if self.time_left() <= 0:
+                        self.budget_exhausted = True
+                        break
+                    self._cmaes(start)
+
+        return {
+            'best_inputs': dict(zip(INPUT_FIELDS, self.best_inputs.tolist())) if self.best_inputs is not None else None,
+            'prediction': self.best_prediction,
+            'target': self.target,
+            'objective': 'maximize' if self.target is None else 'target',
+            'method': method_used,
+            'exact': exact,
+            'evaluations': self.evaluations,
+            'budget_exhausted': self.budget_exhausted,
+            'elapsed_ms': round((time.perf_counter() - self.started_at) * 1000, 2)
+        }
+
+    def _tree_cells(self):
+        """
+        One representative raw value per leaf cell on every axis, or None if not applicable
+
+        A tree ensemble is piecewise constant between consecutive split thresholds, so scoring
+        the midpoint of every interval on every axis covers every distinct prediction.
+        """
+        thresholds = tree_split_thresholds(self.model)
+        if thresholds is None or not hasattr(self.scaler, 'inverse_transform'):
+            return None
+
+        n_features = len(INPUT_FIELDS)
+        scaled_low = self._scale(self.low)
+        scaled_high = self._scale(self.high)
+
+        cells = []
+        for index in range(n_features):
+            low, high = sorted((scaled_low[index], scaled_high[index]))
+            if low == high:
+                cells.append(np.array([self.low[index]]))
+                continue
+
+            inner = thresholds[index][(thresholds[index] > low) & (thresholds[index] < high)]
+            edges = np.concatenate([[low], inner, [high]])
+            midpoints = (edges[:-1] + edges[1:]) / 2
+
+            # Back to raw units, one feature at a time (scalers are feature-wise)
+            scaled = np.zeros((len(midpoints), n_features))
+            scaled[:, index] = midpoints
+            raw = self.scaler.inverse_transform(scaled)[:, index]
+            cells.append(np.clip(raw, self.low[index], self.high[index]))
+        return cells
+
+    def _scale(self, point):
+        """Scale one raw point into the model input space"""
+        return self.scaler.transform(np.asarray([point], dtype=float))[0]
+
+    def _enumerate(self, cells, chunk_size):
+        """Score every leaf cell; returns True if the enumeration completed within budget"""
+        for chunk in iter_product(cells, chunk_size):
+            if self.time_left() <= 0:
+                self.budget_exhausted = True
+                return False
+            self.evaluate(chunk)
+        return True
+
+    def _coordinate_search(self, cells, start, max_rounds=20):
+        """
+        Coordinate descent over leaf cells: score every cell along one axis in one batch,
+        move to the best one, repeat over all axes until no axis improves
+        """
+        current = start.copy()
+        current_loss = self.evaluate(current[None, :])[0]
+
+        for _ in range(max_rounds):
+            improved = False
+            for index, values in enumerate(cells):
+                if len(values) < 2:
+                    continue
+                if self.time_left() <= 0:
+                    self.budget_exhausted = True
+                    return
+
+                candidates = np.tile(current, (len(values), 1))
+                candidates[:, index] = values
+                losses = self.evaluate(candidates)
+
+                best = int(np.argmin(losses))
+                if losses[best] < current_loss:
+                    current, current_loss = candidates[best], losses[best]
+                    improved = True
+            if not improved:
+                return
+
+    def _random_phase(self, n_random, n_restarts):
+        """Score a Latin-hypercube sample and return the best points (unit cube) as restart points"""
+        unit_points = sample_unit('lhs', n_random, self.seed)
+        losses = self.evaluate(self.to_raw(unit_points))
+        order = np.argsort(losses, kind='stable')
+        return unit_points[order[:n_restarts]]
+
+    def _cmaes(self, start, sigma=0.2, max_generations=200, tol=1e-6):
+        """
+        (mu/mu_w, lambda)-CMA-ES in the unit cube, each generation scored in one batch
+
+        Out-of-range samples are repaired by clipping to the cube before scoring.
+        """
+        free = self.high > self.low
+        n = int(free.sum())
+        if n == 0:
+            return
+
+        lam = 4 + int(3 * np.log(n)) + 4  # slightly larger than default, the landscape is often flat
+        mu = lam // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights /= weights.sum()
+        mueff = 1.0 / np.sum(weights ** 2)
+
+        cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        cs = (mueff + 2) / (n + mueff + 5)
+        c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        damps = 1 + 2 * max(0.0, np.sqrt((mueff - 1) / (n + 1)) - 1) + cs
+        chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        mean = start[free].copy()
+        pc = np.zeros(n)
+        ps = np.zeros(n)
+        B = np.eye(n)
+        D = np.ones(n)
+        C = np.eye(n)
+
+        for generation in range(max_generations):
+            if self.time_left() <= 0:
+                self.budget_exhausted = True
+                return
+
+            z = self.rng.standard_normal((lam, n))
+            x = np.clip(mean + sigma * (z * D) @ B.T, 0.0, 1.0)
+            y = (x - mean) / sigma
+
+            unit_points = np.tile(start, (lam, 1))
+            unit_points[:, free] = x
+            losses = self.evaluate(self.to_raw(unit_points))
+
+            selected = np.argsort(losses, kind='stable')[:mu]
+            y_w = weights @ y[selected]
+            mean = np.clip(mean + sigma * y_w, 0.0, 1.0)
+
+            inv_sqrt_c = B @ np.diag(1 / D) @ B.T
+            ps = (1 - cs) * ps + np.sqrt(cs * (2 - cs) * mueff) * inv_sqrt_c @ y_w
+            hsig = np.linalg.norm(ps) / np.sqrt(1 - (1 - cs) ** (2 * (generation + 1))) / chi_n < 1.4 + 2 / (n + 1)
+            pc = (1 - cc) * pc + hsig * np.sqrt(cc * (2 - cc) * mueff) * y_w
+
+            rank_mu = (y[selected].T * weights) @ y[selected]
+            C = ((1 - c1 - cmu) * C
+                 + c1 * (np.outer(pc, pc) + (1 - hsig) * cc * (2 - cc) * C)
+                 + cmu * rank_mu)
+            sigma *= np.exp((cs / damps) * (np.linalg.norm(ps) / chi_n - 1))
+
+            C = (C + C.T) / 2
+            eigenvalues, B = np.linalg.eigh(C)
+            D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+            if sigma * D.max() < tol:
+                return
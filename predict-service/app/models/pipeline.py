@@ -0,0 +1,398 @@
+"""
+Model Pipelines
+Bundle a model with everything needed to score raw inputs, so prediction goes from the
+raw request ndarray to the response value without DataFrames or per-request lookups
+
+A pipeline is a directory <name>.pipeline/ holding pipeline.json and the model file:
+
+    {
+      "format": "model_pipeline", "version": 1,
+      "feature_columns": ["MXene (mg/mL)", ...],      # column order of scaler and model
+      "scaler": {"type": "StandardScaler", "order": "subtract_divide",
+                 "offset": [...], "scale": [...], "clip": null},
+      "model": {"path": "model.pkl", "model_type": "joblib"},
+      "output": {"multiplier": 100.0, "decimals": 2, "unit": "%"}
+    }
+
+Everything is checked once when the pipeline loads (feature columns, scaler shape and
+values, model input width, a probe prediction). /train/model writes a pipeline next to
+every trained model; existing models are bundled with:
+
+    python -m app.models.pipeline build /var/www/html/public/models/rf_augmented_model.pkl
+    python -m app.models.pipeline info ml_model/latest_model.pipeline
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from app.models.dynamic_loader import PROBABILITY_MODEL_TYPES, CompiledForest, ModelLoader, ModelPredictor
+from app.models.input_schema import FEATURE_COLUMNS, LOWER_BOUNDS, UPPER_BOUNDS
+from app.scalers.scaler_registry import AffineScaler, bind_scaler
+
+PIPELINE_EXTENSION = '.pipeline'
+PIPELINE_MANIFEST = 'pipeline.json'
+PIPELINE_FORMAT = 'model_pipeline'
+PIPELINE_VERSION = 1
+
+SCALER_ORDERS = ['subtract_divide', 'multiply_add']
+
+# Raw rows scored at load time and when a pipeline is built
+PROBE_ROWS = 64
+
+
+class PipelineSchemaError(ValueError):
+    """pipeline.json or the bundled model does not match what prediction expects"""
+
+
+def is_pipeline(path):
+    """True if path is a pipeline directory"""
+    return os.path.isfile(os.path.join(path, PIPELINE_MANIFEST))
+
+
+def probe_rows(n_rows=PROBE_ROWS, seed=0):
+    """(n_rows, 4) raw inputs drawn uniformly from the validated input ranges"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(LOWER_BOUNDS, UPPER_BOUNDS, size=(n_rows, len(FEATURE_COLUMNS)))
+
+
+class OutputRule:
+    """Conversion of raw model outputs into response values: round(raw * multiplier, decimals)"""
+
+    def __init__(self, multiplier=100.0, decimals=2, unit='%'):
+        self.multiplier = float(multiplier)
+        self.decimals = int(decimals)
+        self.unit = unit
+
+    @classmethod
+    def for_model_type(cls, model_type):
+        """The rule ModelPredictor._convert_to_percentage applies to a model type"""
+        return cls(100.0 if model_type in PROBABILITY_MODEL_TYPES else 1.0)
+
+    def convert(self, raw_result):
+        """One raw output to a response value"""
+        return round(raw_result * self.multiplier, self.decimals)
+
+    def convert_batch(self, raw_results):
+        """Vectorized convert for an array of raw outputs"""
+        return np.round(np.asarray(raw_results, dtype=np.float64) * self.multiplier, self.decimals)
+
+    def to_dict(self):
+        return {'multiplier': self.multiplier, 'decimals': self.decimals, 'unit': self.unit}
+
+
+class ModelPipeline:
+    """
+    A loaded pipeline: fused input scaler, model and output rule
+
+    The scaler registry binds input_scaler to this model and ModelPredictor scores the
+    inner model and applies output_rule, so the prediction routes serve pipelines
+    through their usual path.
+    """
+
+    def __init__(self, model, model_type, input_scaler, output_rule, path=None):
+        """
+        Args:
+            model: Loaded inner model
+            model_type (str): Library type of the inner model
+            input_scaler (AffineScaler): Scaler of the raw inputs, in INPUT_FIELDS order
+            output_rule (OutputRule): Conversion of raw outputs
+            path (str): Pipeline directory
+        """
+        self.model = model
+        self.model_type = model_type
+        self.input_scaler = input_scaler
+        self.output_rule = output_rule
+        self.path = path
+
+    @property
+    def feature_columns(self):
+        """Column order of the scaled inputs fed to the model"""
+        if self.input_scaler.columns is None:
+            return list(FEATURE_COLUMNS)
+        return [FEATURE_COLUMNS[index] for index in self.input_scaler.columns]
+
+    def predict_inputs(self, matrix):
+        """
+        Score raw input rows
+
+        Args:
+            matrix (numpy.ndarray): (n, 4) raw inputs in INPUT_FIELDS order
+
+        Returns:
+            numpy.ndarray: One response value per row
+        """
+        raw = ModelPredictor._predict_raw(self.model, self.input_scaler.transform(matrix), self.model_type)
+        return self.output_rule.convert_batch(raw)
+
+
+def _float_vector(value, name):
+    try:
+        vector = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise PipelineSchemaError(f"scaler.{name} must be a list of numbers")
+    if vector.shape != (len(FEATURE_COLUMNS),):
+        raise PipelineSchemaError(f"scaler.{name} must have {len(FEATURE_COLUMNS)} values, got shape {vector.shape}")
+    if not np.all(np.isfinite(vector)):
+        raise PipelineSchemaError(f"scaler.{name} must be finite")
+    return vector
+
+
+def _model_input_width(model):
+    """Number of input features a model declares, or None if it does not say"""
+    for attribute in ['n_features_in_', 'n_features']:
+        value = getattr(model, attribute, None)
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+    if hasattr(model, 'num_features') and callable(model.num_features):
+        return int(model.num_features())
+    return None
+
+
+def load_pipeline(path, mmap_mode='r'):
+    """
+    Load a pipeline directory and check it against the input schema
+
+    Args:
+        path (str): Pipeline directory
+        mmap_mode (str): np.load mmap mode for a bundled .npstore model
+
+    Returns:
+        ModelPipeline
+
+    Raises:
+        PipelineSchemaError: If pipeline.json or the model does not match the input schema
+    """
+    try:
+        with open(os.path.join(path, PIPELINE_MANIFEST)) as f:
+            meta = json.load(f)
+    except ValueError as e:
+        raise PipelineSchemaError(f"Invalid {PIPELINE_MANIFEST}: {e}")
+
+    if meta.get('format') != PIPELINE_FORMAT:
+        raise PipelineSchemaError(f"Unknown pipeline format: {meta.get('format')}")
+    if meta.get('version') != PIPELINE_VERSION:
+        raise PipelineSchemaError(f"Unsupported pipeline version: {meta.get('version')}")
+
+    # Feature order: any permutation of the dataset columns, pinned once here
+    feature_columns = meta.get('feature_columns')
+    if not isinstance(feature_columns, list) or sorted(feature_columns) != sorted(FEATURE_COLUMNS):
+        raise PipelineSchemaError(f"feature_columns must be a permutation of {FEATURE_COLUMNS}, got {feature_columns}")
+    columns = None if feature_columns == FEATURE_COLUMNS else [FEATURE_COLUMNS.index(name) for name in feature_columns]
+
+    scaler_meta = meta.get('scaler') or {}
+    order = scaler_meta.get('order')
+    if order not in SCALER_ORDERS:
+        raise PipelineSchemaError(f"scaler.order must be one of {SCALER_ORDERS}, got {order}")
+    offset = _float_vector(scaler_meta.get('offset'), 'offset')
+    scale = _float_vector(scaler_meta.get('scale'), 'scale')
+    if order == 'subtract_divide' and np.any(scale == 0):
+        raise PipelineSchemaError("scaler.scale must not contain zeros")
+    clip = scaler_meta.get('clip')
+    if clip is not None:
+        if order != 'multiply_add' or len(clip) != 2:
+            raise PipelineSchemaError("scaler.clip must be a [low, high] pair of a multiply_add scaler")
+        clip = (float(clip[0]), float(clip[1]))
+    input_scaler = AffineScaler(offset, scale, order, clip=clip, columns=columns)
+
+    output_meta = meta.get('output') or {}
+    try:
+        output_rule = OutputRule(output_meta['multiplier'], output_meta.get('decimals', 2), output_meta.get('unit', '%'))
+    except (KeyError, TypeError, ValueError):
+        raise PipelineSchemaError("output must have a numeric multiplier and integer decimals")
+    if not np.isfinite(output_rule.multiplier):
+        raise PipelineSchemaError("output.multiplier must be finite")
+
+    # Bundled model, which must stay inside the pipeline directory
+    model_meta = meta.get('model') or {}
+    if not model_meta.get('path'):
+        raise PipelineSchemaError("model.path is required")
+    model_path = os.path.normpath(os.path.join(path, model_meta['path']))
+    if os.path.dirname(model_path) != os.path.normpath(path):
+        raise PipelineSchemaError(f"model.path must name an entry of the pipeline directory, got {model_meta['path']}")
+    model_type = model_meta.get('model_type') or ModelLoader._detect_model_type(model_path)
+    if model_type == 'pipeline':
+        raise PipelineSchemaError("A pipeline cannot bundle another pipeline")
+    if model_type == 'npstore':
+        from app.models.model_store import load_store
+        model = load_store(model_path, mmap_mode=mmap_mode)
+    else:
+        model = ModelLoader.load_model(model_path, model_type)
+
+    width = _model_input_width(model)
+    if width is not None and width != len(FEATURE_COLUMNS):
+        raise PipelineSchemaError(f"Model expects {width} features, the pipeline provides {len(FEATURE_COLUMNS)}")
+
+    pipeline = ModelPipeline(model, model_type, input_scaler, output_rule, path=path)
+    outputs = pipeline.predict_inputs(probe_rows(2))
+    if outputs.shape != (2,) or not np.all(np.isfinite(outputs)):
+        raise PipelineSchemaError(f"Model must return one finite value per row, got shape {outputs.shape}")
+    return pipeline
+
+
+def _save_model(model, model_type, directory):
+    """
+    Write a model into a pipeline directory
+
+    Returns:
+        tuple: (entry name, model_type to load it with)
+    """
+    from app.models.keras_numpy import NumpySequential
+
+    if isinstance(model, (CompiledForest, NumpySequential)):
+        model.save(os.path.join(directory, 'model.npstore'))
+        return 'model.npstore', 'npstore'
+    if model_type == 'xgboost' or 'xgboost' in str(type(model)):
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        booster.save_model(os.path.join(directory, 'model.json'))
+        return 'model.json', 'xgboost'
+    if model_type == 'keras':
+        model.save(os.path.join(directory, 'model.keras'))
+        return 'model.keras', 'keras'
+    if model_type == 'pytorch':
+        from app.models import torch_runtime
+        torch_runtime.save(model, os.path.join(directory, 'model.pt'))
+        return 'model.pt', 'pytorch'
+
+    import joblib
+    joblib.dump(model, os.path.join(directory, 'model.pkl'))
+    return 'model.pkl', 'joblib'
+
+
+def save_pipeline(path, model, scaler, model_type, output_rule, source=None):
+    """
+    Write a pipeline directory; it is renamed into place once it loaded and passed the
+    schema checks
+
+    Args:
+        path (str): Pipeline directory (<name>.pipeline)
+        model: Fitted model
+        scaler: Fitted feature-wise affine scaler (Standard, Robust, MaxAbs or MinMax)
+        model_type (str): Library type of the model
+        output_rule (OutputRule): Conversion of raw outputs
+        source (dict): Provenance recorded in pipeline.json (model and scaler files)
+
+    Returns:
+        str: path
+    """
+    input_scaler = bind_scaler(scaler)
+    if not isinstance(input_scaler, AffineScaler):
+        raise ValueError(f"{type(scaler).__name__} is not a feature-wise affine scaler and cannot be bundled")
+
+    # Forests compiled at load time are saved as the original estimator and compiled again
+    if isinstance(model, CompiledForest) and model.source is not None:
+        model = model.source
+
+    temp_path = f'{path}.tmp{os.getpid()}'
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+    try:
+        model_entry, stored_type = _save_model(model, model_type, temp_path)
+        feature_columns = FEATURE_COLUMNS if input_scaler.columns is None else [FEATURE_COLUMNS[index] for index in input_scaler.columns]
+        meta = {
+            'format': PIPELINE_FORMAT,
+            'version': PIPELINE_VERSION,
+            'feature_columns': list(feature_columns),
+            'scaler': {
+                'type': type(input_scaler.source).__name__,
+                'order': input_scaler.order,
+                'offset': input_scaler.offset.tolist(),
+                'scale': input_scaler.scale.tolist(),
+                'clip': list(input_scaler.clip) if input_scaler.clip is not None else None
+            },
+            'model': {'path': model_entry, 'model_type': stored_type, 'class': type(model).__name__},
+            'output': output_rule.to_dict(),
+            'source': source or {}
+        }
+        with open(os.path.join(temp_path, PIPELINE_MANIFEST), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        load_pipeline(temp_path, mmap_mode=None)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(temp_path, path)
+    finally:
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+    return path
+
+
+def build_pipeline(model_path, output_path=None, model_type=None, scaler_path=None):
+    """
+    Bundle an existing model with its scaler
+
+    The output rule is the one the model gets today from ModelPredictor, and the
+    pipeline must predict exactly like the model with its registry scaler does.
+
+    Args:
+        model_path (str): Model file
+        output_path (str): Pipeline directory, defaults to model_path with a .pipeline extension
+        model_type (str): Library type, auto-detected from the extension if None
+        scaler_path (str): Scaler file, defaults to the one the scaler registry resolves
+
+    Returns:
+        str: Path of the written pipeline
+    """
+    import joblib
+
+    from app.scalers.scaler_registry import scaler_registry
+
+    if model_type is None or model_type == 'auto':
+        model_type = ModelLoader._detect_model_type(model_path)
+    if output_path is None:
+        output_path = os.path.splitext(model_path.rstrip('/\\'))[0] + PIPELINE_EXTENSION
+    if scaler_path is None:
+        scaler_path = scaler_registry.resolve(model_path)[0]
+
+    model = ModelLoader.load_model(model_path, model_type)
+    scaler = joblib.load(scaler_path)
+    save_pipeline(
+        output_path, model, scaler, model_type, OutputRule.for_model_type(model_type),
+        source={'model_path': os.path.abspath(model_path), 'scaler_path': os.path.abspath(scaler_path)}
+    )
+
+    rows = probe_rows()
+    expected = ModelPredictor.predict_rows(model, bind_scaler(scaler), rows, model_type)
+    actual = load_pipeline(output_path).predict_inputs(rows)
+    if not np.array_equal(expected, actual):
+        shutil.rmtree(output_path, ignore_errors=True)
+        raise ValueError(f"Pipeline predictions differ from the original model (max abs diff {np.max(np.abs(expected - actual))})")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bundle models with their scaler and output rule into .pipeline directories')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Bundle a model file with its scaler')
+    build.add_argument('model_path')
+    build.add_argument('-o', '--output', default=None, help='Pipeline directory (default: <model>.pipeline)')
+    build.add_argument('--model-type', default=None, help='keras, sklearn, xgboost, pickle, joblib or npstore')
+    build.add_argument('--scaler', default=None, help='Scaler file (default: the sidecar or shared scaler)')
+
+    info = commands.add_parser('info', help='Describe a pipeline directory')
+    info.add_argument('pipeline_path')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'build':
+            output_path = build_pipeline(args.model_path, args.output, args.model_type, args.scaler)
+            print(f"Saved {output_path}")
+        else:
+            with open(os.path.join(args.pipeline_path, PIPELINE_MANIFEST)) as f:
+                meta = json.load(f)
+            load_pipeline(args.pipeline_path)
+            print(json.dumps(meta, indent=2))
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
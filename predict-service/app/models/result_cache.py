@@ -0,0 +1,370 @@
+"""
+Prediction Result Cache
+Cache of /predict/model predictions keyed by the content of the model and scaler
+files and by the inputs rounded to RESULT_CACHE_DECIMALS
+
+Keys hold SHA-256 fingerprints of the model file (or .npstore / .pipeline directory)
+and of its scaler file. A fingerprint is computed once per file version (path, mtime,
+size, inode), so a model that is retrained or replaced gets new keys on the next
+request and its old entries simply age out.
+
+Stores (RESULT_CACHE_BACKEND):
+    memory  In-process LRU with TTL, per gunicorn worker
+    sqlite  The in-process LRU in front of a SQLite file (RESULT_CACHE_PATH) shared by
+            all workers of the host and kept across restarts
+
+A failing store never fails a prediction: errors count as misses.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config.env import Config_env
+
+RESULT_CACHE_BACKENDS = ['memory', 'sqlite']
+
+# Characters of the SHA-256 hex digest kept in keys
+FINGERPRINT_LENGTH = 32
+
+# Bytes read per chunk while fingerprinting
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _files_of(path):
+    """Files of a model file or directory as sorted (relative name, full path) pairs"""
+    if not os.path.isdir(path):
+        return [('', path)]
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            full_path = os.path.join(root, name)
+            files.append((os.path.relpath(full_path, path), full_path))
+    return sorted(files)
+
+
+class FileFingerprints:
+    """SHA-256 of file contents, recomputed only when a file's stat changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._digests = {}  # realpath -> (stat key, digest)
+
+    @staticmethod
+    def _stat_key(files):
+        key = []
+        for name, full_path in files:
+            stat = os.stat(full_path)
+            key.append((name, stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(key)
+
+    def fingerprint(self, path):
+        """
+        Content fingerprint of a file or directory
+
+        Args:
+            path (str): Model or scaler file, or model directory
+
+        Returns:
+            str: Truncated SHA-256 hex digest
+        """
+        realpath = os.path.realpath(path)
+        files = _files_of(realpath)
+        stat_key = self._stat_key(files)
+        with self._lock:
+            entry = self._digests.get(realpath)
+        if entry is not None and entry[0] == stat_key:
+            return entry[1]
+
+        digest = hashlib.sha256()
+        for name, full_path in files:
+            digest.update(name.encode() + b'\0')
+            with open(full_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b''):
+                    digest.update(chunk)
+        fingerprint = digest.hexdigest()[:FINGERPRINT_LENGTH]
+        with self._lock:
+            self._digests[realpath] = (stat_key, fingerprint)
+        return fingerprint
+
+
+class MemoryResultStore:
+    """Bounded in-process LRU of predictions with expiry times"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (prediction, expires_at or None)
+        self.evictions = 0
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        """
+        Returns:
+            tuple: (prediction, expires_at), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, prediction, expires_at):
+        with self._lock:
+            self._entries[key] = (prediction, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResultStore:
+    """
+    Predictions in a SQLite file shared by the worker processes of a host
+
+    Recency is refreshed at most every touch_seconds per entry, so hits rarely write.
+    Expired and least recently used rows are pruned every prune_every inserts.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=100000, touch_seconds=60, prune_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_seconds = touch_seconds
+        self.prune_every = prune_every
+        self.evictions = 0
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """SQLite connections must not cross a fork: every process opens its own"""
+        self._local = threading.local()
+        self._inserts = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, prediction REAL NOT NULL, expires_at REAL, used_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        connection = self._connection()
+        row = connection.execute('SELECT prediction, expires_at, used_at FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        prediction, expires_at, used_at = row
+        if expires_at is not None and expires_at <= now:
+            connection.execute('DELETE FROM results WHERE key = ?', (key,))
+            return None
+        if now - used_at > self.touch_seconds:
+            connection.execute('UPDATE results SET used_at = ? WHERE key = ?', (now, key))
+        return prediction, expires_at
+
+    def put(self, key, prediction, expires_at):
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO results (key, prediction, expires_at, used_at) VALUES (?, ?, ?, ?)',
+            (key, prediction, expires_at, time.time())
+        )
+        self._inserts += 1
+        if self._inserts % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows, then the least recently used ones beyond max_entries"""
+        connection = self._connection()
+        connection.execute('DELETE FROM results WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        excess = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+        if excess > 0:
+            connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used_at LIMIT ?)', (excess,)
+            )
+            self.evictions += excess
+
+    def clear(self):
+        self._connection().execute('DELETE FROM results')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class ResultCache:
+    """
+    Prediction cache over one or more stores, checked in order
+
+    A hit in a later store (sqlite) is copied into the earlier ones (memory).
+    """
+
+    def __init__(self, stores, decimals=6, ttl_seconds=3600, enabled=True):
+        """
+        Args:
+            stores (list): MemoryResultStore and/or SQLiteResultStore, fastest first
+            decimals (int): Decimal places inputs are rounded to in keys
+            ttl_seconds (float): Lifetime of an entry; 0 keeps entries until evicted
+            enabled (bool): False turns get/put into no-ops
+        """
+        self.stores = stores
+        self.decimals = decimals
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.fingerprints = FileFingerprints()
+        self._lock = threading.Lock()
+        self.hits = {store.name: 0 for store in stores}
+        self.misses = 0
+        self.errors = 0
+
+    def reset_after_fork(self):
+        """Forked workers count their own lookups and open their own connections"""
+        self._lock = threading.Lock()
+        self.hits = {store.name: 0 for store in self.stores}
+        self.misses = 0
+        self.errors = 0
+        for store in self.stores:
+            store.reset_after_fork()
+
+    def make_key(self, model_path, model_type, inputs, scaler_path=None):
+        """
+        Cache key of one prediction
+
+        Args:
+            model_path (str): Model file or directory
+            model_type (str): Model type of the request
+            inputs (array-like): Raw input row in INPUT_FIELDS order
+            scaler_path (str): Scaler file applied to the inputs, if any
+
+        Returns:
+            str: Key
+        """
+        parts = [self.fingerprints.fingerprint(model_path)]
+        parts.append(self.fingerprints.fingerprint(scaler_path) if scaler_path and os.path.isfile(scaler_path) else '-')
+        parts.append(model_type)
+        # + 0.0 folds -0.0 into 0.0
+        rounded = np.round(np.asarray(inputs, dtype=np.float64).ravel(), self.decimals) + 0.0
+        parts.append(','.join(repr(float(value)) for value in rounded))
+        return ':'.join(parts)
+
+    def get(self, key):
+        """
+        Cached prediction of a key
+
+        Returns:
+            float: Prediction, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        for index, store in enumerate(self.stores):
+            try:
+                entry = store.get(key, now)
+            except (sqlite3.Error, OSError) as e:
+                self._count_error(store, e)
+                continue
+            if entry is not None:
+                for earlier in self.stores[:index]:
+                    earlier.put(key, *entry)
+                with self._lock:
+                    self.hits[store.name] += 1
+                return entry[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, prediction):
+        """Store a prediction in every store"""
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        for store in self.stores:
+            try:
+                store.put(key, float(prediction), expires_at)
+            except (sqlite3.Error, OSError) as e:
+                self._count_error(store, e)
+
+    def _count_error(self, store, error):
+        with self._lock:
+            self.errors += 1
+        print(f"Warning: Result cache store {store.name} failed: {error}")
+
+    def clear(self):
+        """Drop every cached prediction"""
+        for store in self.stores:
+            store.clear()
+
+    def stats(self):
+        """Lookup counters of this process and the size of every store"""
+        with self._lock:
+            hits = dict(self.hits)
+            misses, errors = self.misses, self.errors
+        lookups = sum(hits.values()) + misses
+        stores = []
+        for store in self.stores:
+            try:
+                entries = len(store)
+            except (sqlite3.Error, OSError):
+                entries = None
+            stores.append({'backend': store.name, 'entries': entries, 'max_entries': store.max_entries,
+                           'evictions': store.evictions})
+        return {
+            'enabled': self.enabled,
+            'hits': hits,
+            'misses': misses,
+            'errors': errors,
+            'hit_rate': round(sum(hits.values()) / lookups, 4) if lookups else 0.0,
+            'decimals': self.decimals,
+            'ttl_seconds': self.ttl_seconds,
+            'stores': stores
+        }
+
+
+def build_result_cache():
+    """Result cache configured by the RESULT_CACHE_* settings"""
+    stores = [MemoryResultStore(Config_env.RESULT_CACHE_MAX_ENTRIES)]
+    if Config_env.RESULT_CACHE_BACKEND == 'sqlite':
+        path = Config_env.RESULT_CACHE_PATH or os.path.join(tempfile.gettempdir(), 'predict-results.sqlite3')
+        stores.append(SQLiteResultStore(path, Config_env.RESULT_CACHE_SQLITE_MAX_ENTRIES))
+    elif Config_env.RESULT_CACHE_BACKEND != 'memory':
+        print(f"Warning: Unknown RESULT_CACHE_BACKEND {Config_env.RESULT_CACHE_BACKEND}, using memory")
+    return ResultCache(
+        stores,
+        decimals=Config_env.RESULT_CACHE_DECIMALS,
+        ttl_seconds=Config_env.RESULT_CACHE_TTL_SECONDS,
+        enabled=Config_env.RESULT_CACHE
+    )
+
+
+# Shared by every request handled by this worker process
+result_cache = build_result_cache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=result_cache.reset_after_fork)
@@ -0,0 +1,129 @@
+"""
+Input Space Sampling
+Build grids and space-filling samples over the validated 4-D input space
+"""
+import numpy as np
+
+from app.models.input_schema import INPUT_FIELDS, INPUT_BOUNDS
+
+SAMPLING_METHODS = ['grid', 'lhs', 'sobol']
+
+
+def resolve_axes(axes=None, default_steps=10):
+    """
+    Resolve per-axis sweep settings, filling unspecified axes with the full validated range
+
+    Args:
+        axes (dict): Optional mapping of field -> {"min", "max", "steps"} or {"value"} to pin an axis
+        default_steps (int): Steps used for axes without an explicit "steps"
+
+    Returns:
+        list: One (low, high, steps) tuple per field in INPUT_FIELDS order
+    """
+    axes = axes or {}
+    unknown = [field for field in axes if field not in INPUT_BOUNDS]
+    if unknown:
+        raise ValueError(f'Unknown axes: {unknown}. Valid axes: {INPUT_FIELDS}')
+
+    resolved = []
+    for field in INPUT_FIELDS:
+        bound_low, bound_high = INPUT_BOUNDS[field]
+        spec = axes.get(field, {})
+
+        if 'value' in spec:
+            low = high = float(spec['value'])
+            steps = 1
+        else:
+            low = float(spec.get('min', bound_low))
+            high = float(spec.get('max', bound_high))
+            steps = int(spec.get('steps', default_steps))
+
+        if not (bound_low <= low <= high <= bound_high):
+            raise ValueError(f'{field} range must satisfy {bound_low} <= min <= max <= {bound_high}')
+        if steps < 1:
+            raise ValueError(f'{field} steps must be at least 1')
+        if low == high:
+            steps = 1
+
+        resolved.append((low, high, steps))
+    return resolved
+
+
+def grid_size(resolved_axes):
+    """Number of points in the full grid"""
+    return int(np.prod([steps for _, _, steps in resolved_axes]))
+
+
+def iter_grid(resolved_axes, chunk_size):
+    """
+    Yield the full grid in row-major order, chunk_size points at a time
+
+    Points are generated from their flat index, so the full grid is never materialized.
+
+    Yields:
+        numpy.ndarray: (m, 4) chunk of grid points in INPUT_FIELDS order
+    """
+    axes_values = [np.linspace(low, high, steps) for low, high, steps in resolved_axes]
+    return iter_product(axes_values, chunk_size)
+
+
+def iter_product(axes_values, chunk_size):
+    """
+    Yield the cartesian product of per-axis value arrays in row-major order, chunk_size points at a time
+
+    Yields:
+        numpy.ndarray: (m, len(axes_values)) chunk of points
+    """
+    shape = tuple(len(values) for values in axes_values)
+    total = int(np.prod(shape))
+
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        indices = np.unravel_index(flat, shape)
+        yield np.column_stack([values[index] for values, index in zip(axes_values, indices)])
+
+
+def sample_unit(method, n_samples, seed=None):
+    """
+    Draw space-filling samples in the 4-D unit cube
+
+    Args:
+        method (str): 'lhs' (Latin hypercube) or 'sobol' (scrambled Sobol sequence)
+        n_samples (int): Number of samples
+        seed (int): Random seed for reproducibility
+
+    Returns:
+        numpy.ndarray: (n_samples, 4) samples in [0, 1)
+    """
+    dims = len(INPUT_FIELDS)
+
+    if method == 'lhs':
+        rng = np.random.default_rng(seed)
+        # One stratum per sample on every axis, strata shuffled independently per axis
+        strata = rng.permuted(np.tile(np.arange(n_samples), (dims, 1)), axis=1).T
+        return (strata + rng.random((n_samples, dims))) / n_samples
+
+    if method == 'sobol':
+        try:
+            from scipy.stats import qmc
+        except ImportError:
+            raise ImportError("SciPy not available. Install: pip install scipy")
+        sampler = qmc.Sobol(d=dims, scramble=True, seed=seed)
+        return sampler.random(n_samples)
+
+    raise ValueError(f'Unsupported sampling method: {method}. Supported methods: {SAMPLING_METHODS}')
+
+
+def iter_samples(method, resolved_axes, n_samples, chunk_size, seed=None):
+    """
+    Yield LHS/Sobol samples scaled into the resolved axis ranges, chunk_size points at a time
+
+    Yields:
+        numpy.ndarray: (m, 4) chunk of sample points in INPUT_FIELDS order
+    """
+    low = np.array([axis[0] for axis in resolved_axes])
+    high = np.array([axis[1] for axis in resolved_axes])
+    points = low + sample_unit(method, n_samples, seed) * (high - low)
+
+    for start in range(0, n_samples, chunk_size):
+        yield points[start:start + chunk_size]
@@ -0,0 +1,240 @@
+"""
+PyTorch Runtime
+Load PyTorch artifacts for inference and run them with pinned thread counts
+
+Three artifact layouts are served:
+    - TorchScript archives written by torch.jit.save (loaded with torch.jit.load)
+    - whole modules pickled with torch.save
+    - state dicts, either in a checkpoint {"architecture": spec, "state_dict": ...} or
+      bare with the spec in a sidecar <model>.arch.json next to the file
+
+An architecture spec names an importable module class, or lists torch.nn layers of a
+Sequential:
+
+    {"class": "mypackage.models:ViabilityNet", "kwargs": {"hidden": 64}}
+    {"layers": [{"type": "Linear", "in_features": 4, "out_features": 64},
+                {"type": "ReLU"},
+                {"type": "Linear", "in_features": 64, "out_features": 1},
+                {"type": "Sigmoid"}]}
+
+Eager modules are traced once at load time (TORCH_JIT_TRACE) on a single-row example,
+checked against the eager module on probe rows and frozen. Every module then runs a few
+warm-up calls at the batch sizes the service uses, so the TorchScript executor has
+specialized its graph before the first request. Predictions run under
+torch.inference_mode().
+
+torch starts one intra-op thread per core by default, so every gunicorn worker would
+compete for all CPUs. configure_threads applies TORCH_NUM_THREADS and
+TORCH_INTEROP_THREADS once per process, including in workers forked after --preload.
+"""
+import importlib
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+import torch
+
+from app.config.env import Config_env
+from app.models.input_schema import INPUT_FIELDS
+
+# Batch sizes run by the load-time warm-up (single /predict/model rows and a small batch)
+WARMUP_BATCH_SIZES = [1, 64]
+# Calls per batch size: the profiling executor optimizes a graph after its second run
+WARMUP_CALLS = 3
+
+_threads_lock = threading.Lock()
+_threads_pid = None
+
+
+class UnsupportedTorchArtifact(Exception):
+    """The file is not a module, a TorchScript archive or a state dict with an architecture"""
+
+
+def configure_threads():
+    """Apply TORCH_NUM_THREADS and TORCH_INTEROP_THREADS once in this process"""
+    global _threads_pid
+
+    if _threads_pid == os.getpid():
+        return
+    with _threads_lock:
+        if _threads_pid == os.getpid():
+            return
+        if Config_env.TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(Config_env.TORCH_NUM_THREADS)
+        if Config_env.TORCH_INTEROP_THREADS > 0:
+            try:
+                torch.set_num_interop_threads(Config_env.TORCH_INTEROP_THREADS)
+            except RuntimeError:
+                # Only settable before the first inter-op parallel work of the process;
+                # a forked worker keeps the value the master already set
+                pass
+        _threads_pid = os.getpid()
+
+
+def is_torchscript_archive(model_path):
+    """True if the file is a torch.jit.save archive (torch.save zips have no code/ entries)"""
+    if not zipfile.is_zipfile(model_path):
+        return False
+    with zipfile.ZipFile(model_path) as archive:
+        return any(name.endswith('constants.pkl') or '/code/' in name for name in archive.namelist())
+
+
+def build_architecture(spec):
+    """
+    Module with freshly initialized weights from an architecture spec
+
+    Raises:
+        UnsupportedTorchArtifact: If the spec names no class and no layers
+    """
+    if 'class' in spec:
+        module_name, _, class_name = spec['class'].partition(':')
+        module_class = getattr(importlib.import_module(module_name), class_name)
+        return module_class(*spec.get('args', []), **spec.get('kwargs', {}))
+    if 'layers' in spec:
+        layers = []
+        for layer in spec['layers']:
+            options = dict(layer)
+            layer_class = getattr(torch.nn, options.pop('type'))
+            layers.append(layer_class(**options))
+        return torch.nn.Sequential(*layers)
+    raise UnsupportedTorchArtifact("Architecture spec needs a 'class' or a 'layers' entry")
+
+
+def _sidecar_architecture(model_path):
+    """Architecture spec from <model>.arch.json, or None if there is none"""
+    spec_path = os.path.splitext(model_path)[0] + '.arch.json'
+    if not os.path.isfile(spec_path):
+        return None
+    with open(spec_path) as f:
+        return json.load(f)
+
+
+def load_artifact(model_path):
+    """
+    Eval-mode module from a TorchScript archive, a pickled module or a state dict
+
+    Returns:
+        torch.nn.Module: Eager module or ScriptModule, not yet traced
+
+    Raises:
+        UnsupportedTorchArtifact: If a state dict comes without an architecture
+    """
+    if is_torchscript_archive(model_path):
+        return torch.jit.load(model_path, map_location='cpu').eval()
+
+    # Whole modules are pickles: weights_only (the default from torch 2.6) would reject them
+    artifact = torch.load(model_path, map_location='cpu', weights_only=False)
+    if isinstance(artifact, torch.nn.Module):
+        return artifact.eval()
+
+    if isinstance(artifact, dict):
+        state_dict = artifact.get('state_dict', artifact)
+        spec = artifact.get('architecture') or _sidecar_architecture(model_path)
+        if spec is None:
+            raise UnsupportedTorchArtifact(
+                f"{os.path.basename(model_path)} is a state dict; save it as {{'architecture': ..., 'state_dict': ...}} "
+                f"or add {os.path.splitext(os.path.basename(model_path))[0]}.arch.json"
+            )
+        module = build_architecture(spec)
+        module.load_state_dict(state_dict)
+        return module.eval()
+
+    raise UnsupportedTorchArtifact(f"Unsupported PyTorch artifact: {type(artifact).__name__}")
+
+
+def input_width(module):
+    """Features per row: in_features of the first 2D weight, else the service's input schema"""
+    for parameter in module.parameters():
+        if parameter.dim() == 2:
+            return parameter.shape[1]
+    return len(INPUT_FIELDS)
+
+
+def _probe(n_features, n_rows=64):
+    return torch.from_numpy(np.random.default_rng(0).standard_normal((n_rows, n_features)).astype(np.float32))
+
+
+def trace(module, n_features, rtol=1e-5, atol=1e-6):
+    """
+    Trace an eager module on a single-row example and freeze it, after checking the trace
+    against the eager module on probe rows (returns the eager module otherwise)
+    """
+    probe = _probe(n_features)
+    try:
+        with torch.inference_mode():
+            expected = module(probe)
+        traced = torch.jit.freeze(torch.jit.trace(module, probe[:1], check_trace=False).eval())
+        with torch.inference_mode():
+            actual = traced(probe)
+    except Exception as e:
+        print(f"Warning: Could not trace PyTorch model, serving it eagerly: {e}")
+        return module
+
+    if actual.shape != expected.shape or not torch.allclose(actual, expected, rtol=rtol, atol=atol):
+        print("Warning: Traced PyTorch model differs from the eager model, serving it eagerly")
+        return module
+    return traced
+
+
+def warm_up(module, n_features):
+    """Run the module at the warm-up batch sizes so the first request finds it optimized"""
+    probe = _probe(n_features, max(WARMUP_BATCH_SIZES))
+    with torch.inference_mode():
+        for batch_size in WARMUP_BATCH_SIZES:
+            for _ in range(WARMUP_CALLS):
+                module(probe[:batch_size])
+
+
+def load_model(model_path):
+    """
+    Inference-ready module: loaded, traced and frozen (TORCH_JIT_TRACE), then warmed up
+
+    Returns:
+        torch.nn.Module: ScriptModule, or the eager module if tracing is off or failed
+    """
+    configure_threads()
+    module = load_artifact(model_path)
+    n_features = input_width(module)
+
+    if isinstance(module, torch.jit.ScriptModule):
+        try:
+            module = torch.jit.freeze(module)
+        except Exception as e:
+            # Already frozen, or exports methods freeze cannot keep
+            print(f"Info: Serving TorchScript model {os.path.basename(model_path)} unfrozen: {e}")
+    elif Config_env.TORCH_JIT_TRACE:
+        module = trace(module, n_features)
+
+    warm_up(module, n_features)
+    return module
+
+
+def predict(module, inputs):
+    """
+    Run a module on 2D inputs under torch.inference_mode()
+
+    Returns:
+        numpy.ndarray: Raw model outputs
+    """
+    configure_threads()
+    if isinstance(inputs, torch.Tensor):
+        tensor = inputs.float()
+    else:
+        if hasattr(inputs, 'values'):
+            # Pandas DataFrame
+            inputs = inputs.values
+        tensor = torch.from_numpy(np.ascontiguousarray(inputs, dtype=np.float32))
+
+    with torch.inference_mode():
+        result = module(tensor)
+    return result.numpy()
+
+
+def save(module, path):
+    """Write a loaded module so that load_model reads it back (TorchScript archive or pickle)"""
+    if isinstance(module, torch.jit.ScriptModule):
+        torch.jit.save(module, path)
+    else:
+        torch.save(module, path)
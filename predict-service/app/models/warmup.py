@@ -0,0 +1,247 @@
+"""
+Model Warm-up
+Load the models of the preload manifest at startup and run synthetic predictions
+through each, so the first real request finds a loaded, warmed-up model
+
+Models come from MODEL_PRELOAD and from the manifest file MODEL_PRELOAD_MANIFEST
+(default: preload.json in MODEL_DIR):
+
+    {"models": [{"path": "/var/www/html/public/models/rf_augmented_model.pkl", "model_type": "sklearn"}]}
+
+The warm-up runs in a background thread started by create_app. Under gunicorn
+--preload the master finishes it before forking, so workers share the loaded models,
+and every worker then repeats the warm-up predictions in its own process (thread
+pools and lazily built state are per process).
+"""
+import gc
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.config.env import Config_env
+from app.models.dynamic_loader import ModelLoader, ModelPredictor
+from app.models.input_schema import INPUT_BOUNDS, INPUT_FIELDS
+
+# Rows scored by each warm-up batch prediction
+WARMUP_ROWS = 64
+
+FINISHED_MODEL_STATES = ['ready', 'failed', 'missing']
+
+
+def read_manifest(manifest_path):
+    """
+    Models listed in a preload manifest
+
+    Args:
+        manifest_path (str): JSON file with a "models" list (or a bare list) whose items are
+                             {"path", "model_type"} objects or "path[:model_type]" strings;
+                             relative paths are resolved against the manifest's directory
+
+    Returns:
+        list: (model_path, model_type or None) tuples
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    items = manifest.get('models', []) if isinstance(manifest, dict) else manifest
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    for item in items:
+        if isinstance(item, str):
+            model_path, _, model_type = item.partition(':')
+        else:
+            model_path, model_type = item['path'], item.get('model_type')
+        entries.append((os.path.normpath(os.path.join(base_dir, model_path)), model_type or None))
+    return entries
+
+
+def preload_entries():
+    """
+    Models to warm up: MODEL_PRELOAD first, then the manifest file (duplicates dropped)
+
+    Returns:
+        list: (model_path, model_type or None) tuples
+    """
+    entries = []
+    for entry in Config_env.MODEL_PRELOAD:
+        model_path, _, model_type = entry.partition(':')
+        entries.append((model_path, model_type or None))
+
+    manifest_path = Config_env.MODEL_PRELOAD_MANIFEST
+    if manifest_path and os.path.isfile(manifest_path):
+        try:
+            entries.extend(read_manifest(manifest_path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Could not read preload manifest {manifest_path}: {e}")
+
+    unique = []
+    for entry in entries:
+        if entry not in unique:
+            unique.append(entry)
+    return unique
+
+
+def synthetic_rows(n_rows=WARMUP_ROWS):
+    """(n_rows, 4) raw inputs spread evenly across the validated input ranges"""
+    low = np.array([INPUT_BOUNDS[field][0] for field in INPUT_FIELDS], dtype=float)
+    high = np.array([INPUT_BOUNDS[field][1] for field in INPUT_FIELDS], dtype=float)
+    return low + (high - low) * np.linspace(0, 1, n_rows)[:, None]
+
+
+class ModelWarmup:
+    """Loads and warms up a list of models in a background thread, recording timings"""
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (list): (model_path, model_type or None) tuples
+        """
+        self.entries = list(entries)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._models = {}
+        self.started_at = None
+        self.finished_at = None
+        for model_path, model_type in self.entries:
+            self._models[model_path] = {'model_path': model_path, 'model_type': model_type, 'state': 'pending'}
+
+    def _update(self, model_path, **fields):
+        with self._lock:
+            self._models[model_path].update(fields)
+
+    def start(self, load=True):
+        """
+        Run the warm-up in a daemon thread
+
+        Args:
+            load (bool): Load the models first; False only repeats the warm-up predictions
+                         on models that are already cached (after a fork)
+        """
+        if not self.entries:
+            return None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._thread = threading.Thread(target=self.run, args=(load,), name='model-warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self, load=True):
+        """Load every model, then run a single-row and a batch prediction through each"""
+        loaded = []
+        for model_path, model_type in self.entries:
+            if not os.path.exists(model_path):
+                self._update(model_path, state='missing', error='Model file not found')
+                print(f"Warning: Preload model not found: {model_path}")
+                continue
+            self._update(model_path, state='loading')
+            try:
+                started = time.perf_counter()
+                model_file = ModelLoader.resolve_path(model_path)
+                model = ModelLoader.get_model(model_file, model_type, alias=model_path)
+                if load:
+                    self._update(model_path, load_seconds=round(time.perf_counter() - started, 3))
+                loaded.append((model_path, model_file, model_type or ModelLoader._detect_model_type(model_file), model))
+            except Exception as e:
+                self._update(model_path, state='failed', error=f'Load failed: {e}')
+                print(f"Warning: Could not preload model {model_path}: {e}")
+
+        if load:
+            # Pickled models are shared copy-on-write with forked workers: keep the
+            # garbage collector from touching (and so copying) their pages
+            gc.freeze()
+
+        for model_path, model_file, model_type, model in loaded:
+            self._update(model_path, state='warming')
+            try:
+                self._update(model_path, warmup_seconds=round(self._warm_up(model_file, model, model_type), 3), state='ready', error=None)
+                print(f"🔥 Warmed up model {os.path.basename(model_path)}")
+            except Exception as e:
+                self._update(model_path, state='failed', error=f'Warm-up failed: {e}')
+                print(f"Warning: Could not warm up model {model_path}: {e}")
+
+        self.finished_at = time.time()
+
+    @staticmethod
+    def _warm_up(model_path, model, model_type):
+        """
+        One single-row prediction (as /predict/model does) and one batch prediction
+        (as /predict/batch does) on synthetic inputs, through the model's scaler
+
+        Returns:
+            float: Seconds spent
+        """
+        from app.scalers.scaler_registry import scaler_registry
+
+        started = time.perf_counter()
+        scaler = scaler_registry.for_model(model_path, model)
+        rows = synthetic_rows()
+        ModelPredictor.predict(model, scaler.transform(rows[:1]), model_type)
+        ModelPredictor.predict_rows(model, scaler, rows, model_type)
+        return time.perf_counter() - started
+
+    def wait(self, timeout=None):
+        """Block until the warm-up thread finished (no-op if none is running)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def is_done(self):
+        """True once every model is ready, failed or missing"""
+        with self._lock:
+            return all(model['state'] in FINISHED_MODEL_STATES for model in self._models.values())
+
+    def restart_in_child(self):
+        """Repeat the warm-up predictions in a forked worker (models are already loaded)"""
+        self._lock = threading.Lock()
+        with self._lock:
+            for model in self._models.values():
+                if model['state'] == 'ready':
+                    model['state'] = 'pending'
+                    model['preloaded'] = True
+        self.start(load=False)
+
+    def status(self):
+        """
+        Warm-up state of this process
+
+        Returns:
+            dict: done, started_at, finished_at and per-model state, load_seconds,
+                  warmup_seconds and error
+        """
+        with self._lock:
+            models = [dict(model) for model in self._models.values()]
+        return {
+            'done': all(model['state'] in FINISHED_MODEL_STATES for model in models),
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'models': models
+        }
+
+
+# Warm-up of this process, set by start_model_warmup
+model_warmup = ModelWarmup([])
+
+
+def start_model_warmup():
+    """Start warming up the models of MODEL_PRELOAD and the preload manifest"""
+    global model_warmup
+    model_warmup = ModelWarmup(preload_entries())
+    model_warmup.start()
+    return model_warmup
+
+
+def _before_fork():
+    model_warmup.wait()
+
+
+def _after_fork_in_child():
+    if model_warmup.entries:
+        model_warmup.restart_in_child()
+
+
+# Forks wait for the warm-up (workers inherit the loaded models), then each worker
+# repeats the warm-up predictions in its own process
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
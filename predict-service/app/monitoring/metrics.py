@@ -0,0 +1,429 @@
+"""
+Metrics
+Counters and histograms exported at /metrics in the Prometheus text format
+
+Every thread records into its own shard (a plain dict it alone writes to), so an
+observation takes no lock; a scrape sums the shards. Gunicorn workers are separate
+processes: each one writes a snapshot of its metrics to METRICS_DIR every
+METRICS_FLUSH_SECONDS, and /metrics adds the snapshots of the other live workers to the
+live values of the worker that serves the scrape. METRICS_DIR defaults to a directory
+named after the process that imported this module, which under gunicorn --preload is
+the master, so all workers of one server share it.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from app.config.env import Config_env
+
+# Seconds, for request stages (sub-millisecond to seconds)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds, for training runs
+TRAINING_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0)
+
+# Rows per model call of the micro-batcher
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A counter, gauge or histogram family; record through its methods"""
+
+    def __init__(self, registry, kind, name, documentation, label_names, buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) if buckets is not None else None
+
+    def inc(self, *label_values, amount=1):
+        """Add to a counter"""
+        if not self.registry.enabled:
+            return
+        shard = self.registry.shard()
+        key = (self.name, label_values)
+        cell = shard.get(key)
+        if cell is None:
+            cell = shard[key] = [0]
+        cell[0] += amount
+
+    def observe(self, value, *label_values):
+        """Record one value in a histogram"""
+        if not self.registry.enabled:
+            return
+        shard = self.registry.shard()
+        key = (self.name, label_values)
+        cell = shard.get(key)
+        if cell is None:
+            # One count per bucket, then the +Inf count and the sum
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+
+class MetricsRegistry:
+    """Metric families of this process, their per-thread shards and the cross-worker snapshots"""
+
+    def __init__(self, enabled=True, snapshot_dir=None, flush_seconds=5.0):
+        """
+        Args:
+            enabled (bool): False turns every record call into a no-op
+            snapshot_dir (str): Directory shared by the workers of one server, None for this process only
+            flush_seconds (float): Interval between two snapshot writes of this process
+        """
+        self.enabled = enabled
+        self.snapshot_dir = snapshot_dir
+        self.flush_seconds = flush_seconds
+        self._families = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._flusher_pid = None
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Metric(self, 'counter', name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        """Gauge set by a collector at scrape time; summed across workers"""
+        return self._register(Metric(self, 'gauge', name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._register(Metric(self, 'histogram', name, documentation, label_names, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            self._families[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """
+        Register a callable run at scrape and snapshot time
+
+        Args:
+            collector (callable): Returns a list of (metric name, label values tuple, value)
+                                  for counters and gauges computed from existing state
+        """
+        self._collectors.append(collector)
+
+    def shard(self):
+        """This thread's shard, created on its first record"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._new_shard()
+
+    def _new_shard(self):
+        shard = {}
+        thread = threading.current_thread()
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        # Fold the shard of a finished thread into the retired totals
+        weakref.finalize(thread, self._retire, shard)
+        self._start_flusher()
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            if any(item is shard for item in self._shards):
+                self._shards = [item for item in self._shards if item is not shard]
+                self._merge_into(self._retired, shard.items())
+
+    @staticmethod
+    def _merge_into(totals, items):
+        for key, cell in items:
+            current = totals.get(key)
+            if current is None:
+                totals[key] = list(cell)
+            else:
+                for index, value in enumerate(cell):
+                    current[index] += value
+
+    def collect(self):
+        """
+        Totals of this process
+
+        Returns:
+            dict: (metric name, label values) -> counter value, or histogram bucket counts + sum
+        """
+        with self._lock:
+            shards = list(self._shards)
+            totals = {key: list(cell) for key, cell in self._retired.items()}
+        for shard in shards:
+            # Copy first: the owning thread may add keys meanwhile
+            self._merge_into(totals, list(shard.items()))
+        for collector in self._collectors:
+            try:
+                for name, label_values, value in collector():
+                    totals[(name, tuple(label_values))] = [value]
+            except Exception as e:
+                print(f"Warning: Metrics collector failed: {e}")
+        return totals
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.snapshot_dir, f'{pid}.json')
+
+    def write_snapshot(self):
+        """Write this process's totals for the other workers to merge"""
+        if not self.snapshot_dir:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        values = [[name, list(labels), cell] for (name, labels), cell in self.collect().items()]
+        path = self._snapshot_path(os.getpid())
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'pid': os.getpid(), 'written_at': time.time(), 'values': values}, f)
+        os.replace(temp_path, path)
+
+    def _read_snapshots(self):
+        """Totals of the other live workers; snapshots of exited processes are removed"""
+        if not self.snapshot_dir or not os.path.isdir(self.snapshot_dir):
+            return []
+        snapshots = []
+        for name in os.listdir(self.snapshot_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                pid = int(name[:-5])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.snapshot_dir, name)
+            if not _pid_alive(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append([((name, tuple(labels)), cell) for name, labels, cell in snapshot['values']])
+        return snapshots
+
+    def _start_flusher(self):
+        """Start the snapshot thread of this process (again after a fork)"""
+        if not self.snapshot_dir or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_seconds)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"Warning: Could not write metrics snapshot: {e}")
+
+    def reset_after_fork(self):
+        """Forked workers start from zero instead of repeating the parent's values"""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._flusher_pid = None
+
+    def render(self):
+        """
+        All metrics of the server in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        totals = self.collect()
+        for snapshot in self._read_snapshots():
+            self._merge_into(totals, snapshot)
+
+        by_family = {}
+        for (name, label_values), cell in totals.items():
+            by_family.setdefault(name, []).append((label_values, cell))
+
+        lines = []
+        for name, metric in sorted(self._families.items()):
+            series = sorted(by_family.get(name, []), key=lambda item: item[0])
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for label_values, cell in series:
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(metric.label_names, label_values)} {_format_number(cell[0])}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), cell[:-1]):
+                    cumulative += count
+                    labels = _format_labels(metric.label_names, label_values, ('le', _format_number(float(bound))))
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                labels = _format_labels(metric.label_names, label_values)
+                lines.append(f'{name}_sum{labels} {_format_number(cell[-1])}')
+                lines.append(f'{name}_count{labels} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    """Durations of the consecutive stages of one request"""
+
+    def __init__(self):
+        self.stages = []
+        self._started = time.perf_counter()
+
+    def restart(self):
+        """Start timing the next stage now (time since the last mark is not counted)"""
+        self._started = time.perf_counter()
+
+    def mark(self, stage, excluded_seconds=0.0):
+        """End the current stage and start the next one, minus time recorded as another stage with add"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._started - excluded_seconds))
+        self._started = now
+
+    def add(self, stage, seconds):
+        """Record a stage timed elsewhere (None is ignored)"""
+        if seconds is not None:
+            self.stages.append((stage, seconds))
+
+    def observe(self, histogram, *label_values):
+        """Record every stage in a histogram labelled (stage, *label_values)"""
+        for stage, seconds in self.stages:
+            histogram.observe(seconds, stage, *label_values)
+
+
+def _default_snapshot_dir():
+    if Config_env.METRICS_DIR:
+        return Config_env.METRICS_DIR
+    return os.path.join(tempfile.gettempdir(), f'predict-metrics-{os.getpid()}')
+
+
+# Metrics of this process, shared by every request it handles
+metrics = MetricsRegistry(
+    enabled=Config_env.METRICS_ENABLED,
+    snapshot_dir=_default_snapshot_dir(),
+    flush_seconds=Config_env.METRICS_FLUSH_SECONDS
+)
+
+http_requests = metrics.counter(
+    'http_requests_total', 'HTTP responses by route, method and status code', ['endpoint', 'method', 'status']
+)
+http_request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests', ['endpoint', 'method']
+)
+predict_stage_seconds = metrics.histogram(
+    'predict_stage_duration_seconds',
+    'Time spent per stage of /predict/model (json_parse, jwt_decode, result_cache, model_load, scaling, batch_wait, predict, serialize)',
+    ['stage', 'model_type', 'model']
+)
+training_seconds = metrics.histogram(
+    'training_duration_seconds', 'Duration of training runs by kind (train, search), mode (request, job) and outcome',
+    ['kind', 'mode', 'outcome'], buckets=TRAINING_BUCKETS
+)
+training_stage_seconds = metrics.histogram(
+    'training_stage_duration_seconds', 'Duration of each stage of training jobs', ['kind', 'stage'], buckets=TRAINING_BUCKETS
+)
+for _name, _documentation in [
+    ('model_cache_hits_total', 'Model cache lookups served from the cache'),
+    ('model_cache_misses_total', 'Model cache lookups that loaded the model'),
+    ('model_cache_evictions_total', 'Models evicted from the cache to stay within its bounds'),
+    ('model_cache_invalidations_total', 'Cached models dropped because their file changed'),
+    ('scaler_cache_hits_total', 'Scaler lookups served from the scaler cache'),
+    ('scaler_cache_misses_total', 'Scaler lookups that loaded the scaler file'),
+    ('result_cache_misses_total', 'Prediction result cache lookups that ran the model'),
+    ('result_cache_errors_total', 'Prediction result cache store operations that failed')
+]:
+    metrics.counter(_name, _documentation)
+jwt_verifications = metrics.counter(
+    'jwt_verifications_total', 'Bearer token checks by result (cache_hit, verified, expired, invalid)', ['result']
+)
+metrics.gauge('jwt_cache_entries', 'Verified tokens held in the token caches of all workers')
+metrics.counter('result_cache_hits_total', 'Prediction result cache lookups served by each store', ['store'])
+metrics.gauge('result_cache_entries', 'Predictions held in the in-process result caches of all workers')
+metrics.gauge('model_cache_entries', 'Models held in the model caches of all workers')
+metrics.gauge('model_cache_bytes', 'Bytes of model files held in the model caches of all workers')
+
+micro_batch_size = metrics.histogram(
+    'micro_batch_size', 'Rows scored per model call by the /predict/model micro-batcher', ['model_type'],
+    buckets=BATCH_SIZE_BUCKETS
+)
+micro_batch_wait_seconds = metrics.histogram(
+    'micro_batch_wait_seconds', 'Time /predict/model requests waited for their micro-batch to run', ['model_type']
+)
+
+# ASGI serving mode (app/serving/asgi.py)
+asgi_rejected = metrics.counter('asgi_rejected_total', 'Requests answered 429 because their pool was full', ['pool'])
+asgi_queue_wait_seconds = metrics.histogram(
+    'asgi_queue_wait_seconds', 'Time requests waited for a thread of their pool', ['pool']
+)
+metrics.gauge('asgi_pool_running', 'Requests running on each pool of all workers', ['pool'])
+metrics.gauge('asgi_pool_queued', 'Requests waiting for a thread of each pool of all workers', ['pool'])
+
+
+def _cache_collector():
+    from app.middlewares.auth import token_cache
+    from app.models.dynamic_loader import model_cache
+    from app.models.result_cache import result_cache
+    from app.scalers.scaler_registry import scaler_registry
+
+    models = model_cache.stats()
+    scalers = scaler_registry.stats()
+    results = result_cache.stats()
+    values = [
+        ('model_cache_hits_total', (), models['hits']),
+        ('model_cache_misses_total', (), models['misses']),
+        ('model_cache_evictions_total', (), models['evictions']),
+        ('model_cache_invalidations_total', (), models['invalidations']),
+        ('model_cache_entries', (), models['entries']),
+        ('model_cache_bytes', (), models['bytes']),
+        ('scaler_cache_hits_total', (), scalers['hits']),
+        ('scaler_cache_misses_total', (), scalers['misses']),
+        ('result_cache_misses_total', (), results['misses']),
+        ('result_cache_errors_total', (), results['errors']),
+        # Only the in-process store: a shared SQLite store would be counted once per worker
+        ('result_cache_entries', (), results['stores'][0]['entries']),
+        ('jwt_cache_entries', (), len(token_cache))
+    ]
+    values.extend(('result_cache_hits_total', (store,), hits) for store, hits in results['hits'].items())
+    return values
+
+
+metrics.add_collector(_cache_collector)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics.reset_after_fork)
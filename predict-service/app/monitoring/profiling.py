@@ -0,0 +1,311 @@
+"""
+Request Profiling
+On-demand profiles of single requests, written as pstats (cProfile) or
+flamegraph-collapsed stack files (statistical sampling) with bounded retention
+
+A request is profiled when:
+- it carries an X-Profile header (cprofile or sample) and a valid bearer token,
+- it is one of the next N requests armed with POST /profile/arm (in the worker that
+  handled the arm request), or
+- PROFILE_SLOW_MS is set: every request is sampled and kept if slower than that
+
+cProfile traces every call of the request thread (exact counts, high overhead);
+the sampler records the request thread's stack every PROFILE_SAMPLE_INTERVAL_MS from
+one background thread (low overhead, suitable for the slow-request mode).
+
+Collapsed files are the input format of flamegraph.pl, speedscope and inferno;
+pstats files open with python -m pstats or snakeviz. With PROFILING_ENABLED=false
+create_app installs no hooks at all.
+"""
+import cProfile
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from app.config.env import Config_env
+
+PROFILE_MODES = ['cprofile', 'sample']
+
+PROFILE_EXTENSIONS = {'cprofile': '.pstats', 'sample': '.collapsed'}
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+
+def default_dir():
+    return os.path.join(tempfile.gettempdir(), 'predict-profiles')
+
+
+class StackSampler:
+    """One background thread recording the stacks of the threads registered with it"""
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._labels = {}
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """Forked workers start their own sampler thread on first use"""
+        self._condition = threading.Condition()
+        self._targets = {}
+        self._thread = None
+
+    def start(self, thread_id):
+        """Start recording the stacks of a thread"""
+        with self._condition:
+            self._targets[thread_id] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def stop(self, thread_id):
+        """
+        Stop recording a thread
+
+        Returns:
+            Counter: Collapsed stack -> number of samples
+        """
+        with self._condition:
+            return self._targets.pop(thread_id, Counter())
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+        return label
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._targets:
+                    self._condition.wait()
+                thread_ids = list(self._targets)
+            frames = sys._current_frames()
+            stacks = [(thread_id, self._collapse(frames[thread_id])) for thread_id in thread_ids if thread_id in frames]
+            del frames
+            with self._condition:
+                for thread_id, stack in stacks:
+                    counter = self._targets.get(thread_id)
+                    if counter is not None:
+                        counter[stack] += 1
+            time.sleep(self.interval_seconds)
+
+
+class ActiveProfile:
+    """Profile of one request in progress"""
+
+    def __init__(self, mode, keep_slower_than_ms, sampler, cprofile_lock):
+        self.mode = mode
+        self.keep_slower_than_ms = keep_slower_than_ms
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self._sampler = sampler
+        self._profiler = None
+        self._cprofile_lock = cprofile_lock
+        if mode == 'cprofile' and not cprofile_lock.acquire(blocking=False):
+            # One cProfile per process (Python 3.12+ profiles through the process-wide sys.monitoring)
+            self.mode = mode = 'sample'
+        if mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            sampler.start(self.thread_id)
+
+    def stop(self):
+        """
+        Stop profiling
+
+        Returns:
+            tuple: (elapsed milliseconds, cProfile.Profile or Counter of collapsed stacks)
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._cprofile_lock.release()
+            result = self._profiler
+        else:
+            result = self._sampler.stop(self.thread_id)
+        return (time.perf_counter() - self.started) * 1e3, result
+
+
+class RequestProfiler:
+    """Decides which requests are profiled and stores their profiles"""
+
+    def __init__(self, profile_dir=None, max_files=100, slow_ms=0, sample_interval_ms=1):
+        self.profile_dir = profile_dir or default_dir()
+        self.max_files = max_files
+        self.slow_ms = slow_ms
+        self.sampler = StackSampler(sample_interval_ms / 1e3)
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._armed = None
+
+    def reset_after_fork(self):
+        """Arms belong to the process that received them"""
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._armed = None
+        self.sampler.reset_after_fork()
+
+    def arm(self, requests=1, mode='cprofile', slower_than_ms=0, path_prefix=None):
+        """
+        Profile the next requests handled by this process
+
+        Args:
+            requests (int): Number of requests to profile
+            mode (str): 'cprofile' or 'sample'
+            slower_than_ms (float): Only keep profiles of requests slower than this
+            path_prefix (str): Only profile requests whose path starts with this
+
+        Returns:
+            dict: The arm state
+        """
+        with self._lock:
+            self._armed = {
+                'remaining': requests, 'mode': mode, 'slower_than_ms': slower_than_ms,
+                'path_prefix': path_prefix, 'armed_at': time.time()
+            }
+            return dict(self._armed)
+
+    def disarm(self):
+        with self._lock:
+            armed, self._armed = self._armed, None
+        return armed
+
+    def status(self):
+        with self._lock:
+            armed = dict(self._armed) if self._armed else None
+        return {
+            'pid': os.getpid(),
+            'armed': armed,
+            'slow_ms': self.slow_ms,
+            'profile_dir': self.profile_dir,
+            'max_files': self.max_files
+        }
+
+    def mode_for(self, path, header_mode):
+        """
+        Whether to profile a request
+
+        Args:
+            path (str): Request path
+            header_mode (str): Mode requested by a (token-checked) X-Profile header, or None
+
+        Returns:
+            tuple: (mode, keep_slower_than_ms), or None to leave the request alone
+        """
+        if header_mode is not None:
+            return header_mode, 0
+        if self._armed is not None:
+            with self._lock:
+                armed = self._armed
+                if armed is not None and (not armed['path_prefix'] or path.startswith(armed['path_prefix'])):
+                    armed['remaining'] -= 1
+                    if armed['remaining'] <= 0:
+                        self._armed = None
+                    return armed['mode'], armed['slower_than_ms']
+        if self.slow_ms > 0:
+            return 'sample', self.slow_ms
+        return None
+
+    def start(self, mode, keep_slower_than_ms=0):
+        return ActiveProfile(mode, keep_slower_than_ms, self.sampler, self._cprofile_lock)
+
+    def finish(self, active, endpoint, method, status):
+        """
+        Stop a request's profile and write it unless the request was fast enough
+
+        Returns:
+            str: File name of the stored profile, or None if it was dropped
+        """
+        elapsed_ms, result = active.stop()
+        if elapsed_ms < active.keep_slower_than_ms:
+            return None
+        if active.mode == 'sample' and not result:
+            # Faster than one sampling interval
+            return None
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_') or 'root'
+        name = (f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}-{method}-{slug}-{status}-{int(elapsed_ms)}ms"
+                f"{PROFILE_EXTENSIONS[active.mode]}")
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, name)
+            temp_path = f'{path}.tmp'
+            if active.mode == 'cprofile':
+                result.dump_stats(temp_path)
+            else:
+                with open(temp_path, 'w') as f:
+                    f.writelines(f'{stack} {count}\n' for stack, count in result.most_common())
+            os.replace(temp_path, path)
+            self._prune()
+        except OSError as e:
+            print(f"Warning: Could not write profile {name}: {e}")
+            return None
+        print(f"🔬 Profiled {method} {endpoint} ({elapsed_ms:.1f} ms): {name}")
+        return name
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_files"""
+        files = self.list_profiles()
+        for profile in files[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, profile['name']))
+            except FileNotFoundError:
+                pass
+
+    def list_profiles(self):
+        """
+        Stored profiles of all workers, newest first
+
+        Returns:
+            list: name, mode, size_bytes and created (epoch seconds) of every profile
+        """
+        try:
+            names = os.listdir(self.profile_dir)
+        except FileNotFoundError:
+            return []
+        modes = {extension: mode for mode, extension in PROFILE_EXTENSIONS.items()}
+        profiles = []
+        for name in names:
+            mode = modes.get(os.path.splitext(name)[1])
+            if mode is None:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.profile_dir, name))
+            except FileNotFoundError:
+                continue
+            profiles.append({'name': name, 'mode': mode, 'size_bytes': stat.st_size, 'created': stat.st_mtime})
+        profiles.sort(key=lambda profile: (profile['created'], profile['name']), reverse=True)
+        return profiles
+
+    def profile_path(self, name):
+        """Path of a stored profile, or None if name is not one"""
+        if os.path.basename(name) != name or os.path.splitext(name)[1] not in PROFILE_EXTENSIONS.values():
+            return None
+        path = os.path.join(self.profile_dir, name)
+        return path if os.path.isfile(path) else None
+
+
+# Profiler of this process, used by the hooks of app/middlewares/profiling.py
+profiler = RequestProfiler(
+    Config_env.PROFILE_DIR or None,
+    Config_env.PROFILE_MAX_FILES,
+    Config_env.PROFILE_SLOW_MS,
+    Config_env.PROFILE_SAMPLE_INTERVAL_MS
+)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=profiler.reset_after_fork)
@@ -0,0 +1,27 @@
+from flask import Blueprint, Response, jsonify
+
+from app.config.env import Config_env
+from app.config.swagger import swag_from
+from app.monitoring.metrics import CONTENT_TYPE, metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'summary': 'Prometheus metrics',
+    'description': 'Counters and latency histograms of all gunicorn workers in the Prometheus text format: '
+                   'per-stage /predict/model latency by model type and model, HTTP responses by status code, '
+                   'model and scaler cache counters, and training durations.',
+    'produces': ['text/plain'],
+    'responses': {
+        200: {'description': 'Metrics in the Prometheus text exposition format'},
+        404: {'description': 'Metrics are disabled (METRICS_ENABLED=false)'}
+    }
+})
+def metrics_endpoint():
+    """Metrics of this server in the Prometheus text format"""
+    if not Config_env.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,147 @@
+from flask import Blueprint, request, jsonify
+from app.middlewares.auth import token_required
+import os
+
+from app.config.env import Config_env
+from app.models.dynamic_loader import ModelLoader
+from app.models.input_schema import SUPPORTED_MODEL_TYPES
+from app.models.optimizer import OPTIMIZATION_METHODS, ViabilityOptimizer
+from app.models.sampling import resolve_axes
+from app.scalers.scaler_registry import scaler_registry
+from app.config.swagger import swag_from
+
+optimize_bp = Blueprint('optimize', __name__, url_prefix='/optimize')
+
+
+@optimize_bp.route('', methods=['POST'])
+@token_required
+@swag_from({
+    'tags': ['Optimization'],
+    'summary': 'Inverse design: find inputs that maximize (or hit a target) predicted viability',
+    'description': 'Searches the validated input ranges within a latency budget. '
+                   'Tree ensembles (RandomForest, XGBoost) are solved exactly by enumerating every leaf cell when the cell count allows it, '
+                   'otherwise by coordinate descent that enumerates the cells of one axis at a time; '
+                   'any other model uses vectorized Latin-hypercube random restarts followed by CMA-ES.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'description': 'Optimization settings with model information',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['model_path', 'model_type'],
+                'properties': {
+                    'model_path': {'type': 'string', 'description': 'Absolute path to the model file'},
+                    'model_type': {
+                        'type': 'string',
+                        'enum': SUPPORTED_MODEL_TYPES,
+                        'description': 'Type of machine learning model'
+                    },
+                    'target': {'type': 'number', 'description': 'Target viability in %. Omit to maximize viability.'},
+                    'method': {
+                        'type': 'string',
+                        'enum': ['auto', 'tree', 'cmaes', 'random'],
+                        'default': 'auto',
+                        'description': 'Search method; auto uses tree enumeration for tree ensembles, otherwise CMA-ES'
+                    },
+                    'axes': {
+                        'type': 'object',
+                        'description': 'Optional per-field {"min", "max"} or {"value"} to narrow or pin the search range',
+                        'example': {'applied_voltage': {'value': 1}}
+                    },
+                    'time_budget_ms': {'type': 'number', 'description': 'Wall-clock budget for the search'},
+                    'n_random': {'type': 'integer', 'default': 256, 'description': 'Latin-hypercube samples in the random phase'},
+                    'n_restarts': {'type': 'integer', 'default': 4, 'description': 'CMA-ES runs started from the best random samples'},
+                    'seed': {'type': 'integer', 'description': 'Random seed for reproducibility'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Best inputs found',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'best_inputs': {'type': 'object', 'description': 'Input parameters of the best point'},
+                    'prediction': {'type': 'number', 'description': 'Predicted viability percentage at the best point'},
+                    'method': {'type': 'string', 'description': 'Search method actually used (tree, tree_coordinate, cmaes or random)'},
+                    'exact': {'type': 'boolean', 'description': 'True if every leaf cell was enumerated'},
+                    'evaluations': {'type': 'integer', 'description': 'Number of points scored'},
+                    'budget_exhausted': {'type': 'boolean'},
+                    'elapsed_ms': {'type': 'number'}
+                }
+            }
+        },
+        '400': {'description': 'Bad request - invalid settings'},
+        '401': {'description': 'Unauthorized - invalid or missing token'},
+        '404': {'description': 'Model file not found'},
+        '500': {'description': 'Internal server error - model loading or prediction failed'}
+    }
+})
+def optimize_inputs():
+    """
+    Inverse-design endpoint: search the input space for the best predicted viability
+    """
+    try:
+        data = request.get_json()
+
+        for field in ['model_path', 'model_type']:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        model_path = data['model_path']
+        model_type = data['model_type'].lower()
+        method = data.get('method', 'auto').lower()
+        target = float(data['target']) if data.get('target') is not None else None
+        time_budget_ms = float(data.get('time_budget_ms', Config_env.OPTIMIZE_TIME_BUDGET_MS))
+        n_random = int(data.get('n_random', 256))
+        n_restarts = int(data.get('n_restarts', 4))
+
+        if model_type not in SUPPORTED_MODEL_TYPES:
+            return jsonify({'error': f'Unsupported model_type: {model_type}. Supported types: {SUPPORTED_MODEL_TYPES}'}), 400
+        if method not in OPTIMIZATION_METHODS:
+            return jsonify({'error': f'Unsupported method: {method}. Supported methods: {OPTIMIZATION_METHODS}'}), 400
+        if not (0 < time_budget_ms <= Config_env.OPTIMIZE_MAX_TIME_BUDGET_MS):
+            return jsonify({'error': f'time_budget_ms must be between 0 and {Config_env.OPTIMIZE_MAX_TIME_BUDGET_MS}'}), 400
+        if n_random < 1 or n_restarts < 0:
+            return jsonify({'error': 'n_random must be at least 1 and n_restarts at least 0'}), 400
+
+        axes = resolve_axes(data.get('axes'))
+
+        if not os.path.exists(model_path):
+            return jsonify({'error': f'Model file not found: {model_path}'}), 404
+
+        # Resolve the model version once: the model and its scaler come from the same one
+        model_file = ModelLoader.resolve_path(model_path)
+        model = ModelLoader.get_model(model_file, model_type, alias=model_path)
+        scaler = scaler_registry.for_model(model_file, model)
+
+        optimizer = ViabilityOptimizer(
+            model, scaler, model_type, axes,
+            target=target,
+            time_budget_ms=time_budget_ms,
+            seed=data.get('seed')
+        )
+        result = optimizer.run(
+            method=method,
+            n_random=n_random,
+            n_restarts=n_restarts,
+            max_tree_cells=Config_env.OPTIMIZE_MAX_TREE_CELLS,
+            chunk_size=Config_env.SWEEP_CHUNK_SIZE
+        )
+
+        result.update({
+            'unit': '%',
+            'user': request.user["username"],
+            'model_used': os.path.basename(model_path),
+            'model_type': model_type
+        })
+        return jsonify(result)
+
+    except ValueError as ve:
+        return jsonify({'error': f'Invalid parameter value: {str(ve)}'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Optimization error: {str(e)}'}), 500
@@ -1,26 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify, Response, stream_with_context
 from app.middlewares.auth import token_required
-import pandas as pd
+import numpy as np
+import json
 import os
 
-from app.models.dynamic_loader import ModelLoader, ModelPredictor
-from app.scalers.shared_scaler import get_scaler
+from app.config.env import Config_env
+from app.models import warmup
+from app.models.backends import backend_status, prewarm_done
+from app.models.dynamic_loader import ModelLoader, ModelPredictor, model_cache
+from app.models.micro_batcher import micro_batcher
+from app.models.result_cache import result_cache
+from app.models.input_schema import INPUT_FIELDS, SUPPORTED_MODEL_TYPES, rows_to_matrix, validate_matrix
+from app.monitoring.metrics import StageTimer, predict_stage_seconds
+from app.models.sampling import SAMPLING_METHODS, resolve_axes, grid_size, iter_grid, iter_samples
+from app.scalers.scaler_registry import scaler_registry
+from app.config.swagger import swag_from
 
 predict_bp = Blueprint('predict', __name__, url_prefix='/predict')
 
-# Try to import swagger decorator, but continue without it if not available
-try:
-    from flasgger import swag_from
-    HAS_SWAGGER = True
-except ImportError:
-    def swag_from(spec):
-        def decorator(f):
-            return f
-        return decorator
-    HAS_SWAGGER = False
 
 @predict_bp.route('/model', methods=['POST'])
 @token_required  
+@micro_batcher.tracked
 @swag_from({
     'tags': ['Prediction'],
     'summary': 'Predict using dynamic model loading',
@@ -66,7 +67,7 @@ except ImportError:
                     },
                     'model_type': {
                         'type': 'string',
-                        'enum': ['keras', 'pytorch', 'sklearn', 'xgboost', 'pickle', 'joblib'],
+                        'enum': SUPPORTED_MODEL_TYPES,
                         'description': 'Type of machine learning model'
                     }
                 }
@@ -117,7 +118,10 @@ def predict_with_dynamic_model():
     Universal prediction endpoint supporting multiple ML model types
     """
     try:
+        # Stage timings, exported as predict_stage_duration_seconds
+        timer = StageTimer()
         data = request.get_json()
+        timer.mark('json_parse')
         
         # Validate required fields
         required_fields = ['pc_mxene_loading', 'laminin_peptide_loading', 'stimulation_frequency', 'applied_voltage', 'model_path', 'model_type']
@@ -144,44 +148,63 @@ def predict_with_dynamic_model():
             return jsonify({'error': 'applied_voltage must be between 0 and 3'}), 400
         
         # Validate model type
-        supported_types = ['keras', 'pytorch', 'sklearn', 'xgboost', 'pickle', 'joblib']
-        if model_type not in supported_types:
-            return jsonify({'error': f'Unsupported model_type: {model_type}. Supported types: {supported_types}'}), 400
+        if model_type not in SUPPORTED_MODEL_TYPES:
+            return jsonify({'error': f'Unsupported model_type: {model_type}. Supported types: {SUPPORTED_MODEL_TYPES}'}), 400
         
         # Check if model file exists
         if not os.path.exists(model_path):
             return jsonify({'error': f'Model file not found: {model_path}'}), 404
         
-        # Load model using dynamic loader (static method)
-        model = ModelLoader.load_model(model_path, model_type)
+        # Prepare input row in INPUT_FIELDS order (the scaler pins its own column order)
+        input_data = np.array([[pc_mxene_loading, laminin_peptide_loading, stimulation_frequency, applied_voltage]])
         
-        if model is None:
-            return jsonify({'error': f'Failed to load model from {model_path}'}), 500
+        # Resolve the model version once: the model and its scaler come from the same one
+        timer.restart()
+        model_file = ModelLoader.resolve_path(model_path)
         
-        # Prepare input data with correct column names (same as used for fitting scaler)
-        input_data = pd.DataFrame({
-            'MXene (mg/mL)': [pc_mxene_loading],
-            'Laminin peptide (ug/mL)': [laminin_peptide_loading], 
-            'Electric stimulation (Hz)': [stimulation_frequency],
-            'Voltage (V)': [applied_voltage]
-        })
-        
-        # Get shared scaler (used consistently across all model types)
-        scaler = get_scaler()
-        if scaler is None:
-            return jsonify({'error': 'Failed to load scaler'}), 500
-        
-        # Scale the input data first
-        scaled_data = scaler.transform(input_data)
+        # Repeated inputs are served from the result cache; keys hold the content
+        # fingerprints of the model and scaler files, so a retrained model misses
+        prediction = None
+        cache_key = None
+        if result_cache.enabled:
+            cache_key = result_cache.make_key(model_file, model_type, input_data, scaler_registry.resolve(model_file)[0])
+            prediction = result_cache.get(cache_key)
+            timer.mark('result_cache')
+        cache_hit = prediction is not None
         
-        # Make prediction using dynamic predictor (static method)
-        prediction = ModelPredictor.predict(model, scaled_data, model_type)
-        
-        if prediction is None:
-            return jsonify({'error': 'Prediction failed'}), 500
+        if not cache_hit:
+            # Load model through the process-wide cache (reloads only if the file changed)
+            model = ModelLoader.get_model(model_file, model_type, alias=model_path)
+            timer.mark('model_load')
+            
+            if model is None:
+                return jsonify({'error': f'Failed to load model from {model_path}'}), 500
+            
+            # Get the model's scaler (sidecar, embedded or shared), cached until its file changes
+            scaler = scaler_registry.for_model(model_file, model)
+            
+            if micro_batcher.enabled:
+                # Scaled and predicted in one call with concurrent requests for the same model
+                prediction, batch_wait = micro_batcher.predict(model, scaler, input_data, model_type)
+                timer.add('batch_wait', batch_wait)
+                timer.mark('predict', batch_wait)
+            else:
+                # Scale the input data first
+                scaled_data = scaler.transform(input_data)
+                timer.mark('scaling')
+                
+                # Make prediction using dynamic predictor (static method)
+                prediction = ModelPredictor.predict(model, scaled_data, model_type)
+                timer.mark('predict')
+            
+            if prediction is None:
+                return jsonify({'error': 'Prediction failed'}), 500
+            
+            if cache_key is not None:
+                result_cache.put(cache_key, prediction)
         
         # Return response
-        return jsonify({
+        response = jsonify({
             'prediction': prediction,
             'unit': '%',
             'user': request.user["username"],
@@ -194,6 +217,307 @@ def predict_with_dynamic_model():
                 'applied_voltage': applied_voltage
             }
         })
+        if cache_key is not None:
+            response.headers['X-Result-Cache'] = 'hit' if cache_hit else 'miss'
+        timer.mark('serialize')
+        timer.add('jwt_decode', g.get('jwt_decode_seconds'))
+        timer.observe(predict_stage_seconds, model_type, os.path.basename(model_path))
+        return response
+        
+    except ValueError as ve:
+        return jsonify({'error': f'Invalid parameter value: {str(ve)}'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Prediction error: {str(e)}'}), 500
+
+@predict_bp.route('/batch', methods=['POST'])
+@token_required
+@swag_from({
+    'tags': ['Prediction'],
+    'summary': 'Batch prediction',
+    'description': 'Score many input rows with one scaler call and one model call. Send either "rows" or "columns".',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'description': 'Input rows with model information',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['model_path', 'model_type'],
+                'properties': {
+                    'rows': {
+                        'type': 'array',
+                        'description': 'List of [pc_mxene_loading, laminin_peptide_loading, stimulation_frequency, applied_voltage]',
+                        'items': {'type': 'array', 'items': {'type': 'number'}}
+                    },
+                    'columns': {
+                        'type': 'object',
+                        'description': 'Columnar payload: one list of values per input field',
+                        'properties': {
+                            'pc_mxene_loading': {'type': 'array', 'items': {'type': 'number'}},
+                            'laminin_peptide_loading': {'type': 'array', 'items': {'type': 'number'}},
+                            'stimulation_frequency': {'type': 'array', 'items': {'type': 'number'}},
+                            'applied_voltage': {'type': 'array', 'items': {'type': 'number'}}
+                        }
+                    },
+                    'model_path': {
+                        'type': 'string',
+                        'description': 'Absolute path to the model file'
+                    },
+                    'model_type': {
+                        'type': 'string',
+                        'enum': SUPPORTED_MODEL_TYPES,
+                        'description': 'Type of machine learning model'
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Successful prediction',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'predictions': {
+                        'type': 'array',
+                        'items': {'type': 'number'},
+                        'description': 'Predicted viability percentage for every row, in input order'
+                    },
+                    'count': {'type': 'integer'},
+                    'model_used': {'type': 'string'},
+                    'model_type': {'type': 'string'}
+                }
+            }
+        },
+        '400': {'description': 'Bad request - invalid input rows'},
+        '401': {'description': 'Unauthorized - invalid or missing token'},
+        '404': {'description': 'Model file not found'},
+        '413': {'description': 'Too many rows'},
+        '500': {'description': 'Internal server error - model loading or prediction failed'}
+    }
+})
+def predict_batch():
+    """
+    Vectorized prediction endpoint: scales and scores all rows at once
+    """
+    try:
+        data = request.get_json()
+        
+        for field in ['model_path', 'model_type']:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        model_path = data['model_path']
+        model_type = data['model_type'].lower()
+        
+        if model_type not in SUPPORTED_MODEL_TYPES:
+            return jsonify({'error': f'Unsupported model_type: {model_type}. Supported types: {SUPPORTED_MODEL_TYPES}'}), 400
+        
+        # Build and validate the whole input matrix in one pass
+        matrix = rows_to_matrix(data.get('rows'), data.get('columns'))
+        if len(matrix) == 0:
+            return jsonify({'error': 'No input rows provided'}), 400
+        if len(matrix) > Config_env.BATCH_MAX_ROWS:
+            return jsonify({'error': f'Too many rows: {len(matrix)} (max {Config_env.BATCH_MAX_ROWS})'}), 413
+        
+        error = validate_matrix(matrix)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if not os.path.exists(model_path):
+            return jsonify({'error': f'Model file not found: {model_path}'}), 404
+        
+        # Resolve the model version once: the model and its scaler come from the same one
+        model_file = ModelLoader.resolve_path(model_path)
+        model = ModelLoader.get_model(model_file, model_type, alias=model_path)
+        
+        scaler = scaler_registry.for_model(model_file, model)
+        
+        # One scaler call and one model call for the whole matrix
+        predictions = ModelPredictor.predict_rows(model, scaler, matrix, model_type)
+        
+        return jsonify({
+            'predictions': predictions.tolist(),
+            'count': len(predictions),
+            'unit': '%',
+            'user': request.user["username"],
+            'model_used': os.path.basename(model_path),
+            'model_type': model_type
+        })
+        
+    except ValueError as ve:
+        return jsonify({'error': f'Invalid parameter value: {str(ve)}'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Prediction error: {str(e)}'}), 500
+
+@predict_bp.route('/sweep', methods=['POST'])
+@token_required
+@swag_from({
+    'tags': ['Prediction'],
+    'summary': 'Parameter sweep over the input space',
+    'description': 'Build a grid (per-axis ranges and steps) or a Latin-hypercube / Sobol sample server-side and score it in chunks. '
+                   'Without top_k, results are streamed as newline-delimited JSON: a header line, one line per chunk and a final summary line. '
+                   'With top_k, only the best cells are returned as a single JSON document.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'description': 'Sweep definition with model information',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['model_path', 'model_type'],
+                'properties': {
+                    'model_path': {'type': 'string', 'description': 'Absolute path to the model file'},
+                    'model_type': {
+                        'type': 'string',
+                        'enum': SUPPORTED_MODEL_TYPES,
+                        'description': 'Type of machine learning model'
+                    },
+                    'method': {
+                        'type': 'string',
+                        'enum': ['grid', 'lhs', 'sobol'],
+                        'default': 'grid',
+                        'description': 'Full grid, Latin hypercube or scrambled Sobol sampling'
+                    },
+                    'axes': {
+                        'type': 'object',
+                        'description': 'Per-field {"min", "max", "steps"} or {"value"} to pin an axis. Unspecified axes use the full validated range.',
+                        'example': {'pc_mxene_loading': {'min': 0, 'max': 0.3, 'steps': 31}, 'applied_voltage': {'value': 1}}
+                    },
+                    'steps': {'type': 'integer', 'default': 10, 'description': 'Default steps for grid axes without explicit steps'},
+                    'samples': {'type': 'integer', 'description': 'Number of samples for lhs/sobol'},
+                    'seed': {'type': 'integer', 'description': 'Random seed for lhs/sobol'},
+                    'chunk_size': {'type': 'integer', 'description': 'Points scored per model call'},
+                    'top_k': {'type': 'integer', 'description': 'Return only the k best points (1 = argmax)'},
+                    'objective': {'type': 'string', 'enum': ['max', 'min'], 'default': 'max', 'description': 'Rank top_k by highest or lowest prediction'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        '200': {'description': 'Streamed chunks (application/x-ndjson) or top-k points (application/json)'},
+        '400': {'description': 'Bad request - invalid sweep definition'},
+        '401': {'description': 'Unauthorized - invalid or missing token'},
+        '404': {'description': 'Model file not found'},
+        '413': {'description': 'Sweep has too many points'},
+        '500': {'description': 'Internal server error - model loading or prediction failed'}
+    }
+})
+def predict_sweep():
+    """
+    Response-surface endpoint: generates the sweep points server-side and scores them in chunks
+    """
+    try:
+        data = request.get_json()
+        
+        for field in ['model_path', 'model_type']:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        model_path = data['model_path']
+        model_type = data['model_type'].lower()
+        method = data.get('method', 'grid').lower()
+        chunk_size = int(data.get('chunk_size', Config_env.SWEEP_CHUNK_SIZE))
+        top_k = data.get('top_k')
+        objective = data.get('objective', 'max').lower()
+        
+        if model_type not in SUPPORTED_MODEL_TYPES:
+            return jsonify({'error': f'Unsupported model_type: {model_type}. Supported types: {SUPPORTED_MODEL_TYPES}'}), 400
+        if method not in SAMPLING_METHODS:
+            return jsonify({'error': f'Unsupported method: {method}. Supported methods: {SAMPLING_METHODS}'}), 400
+        if objective not in ['max', 'min']:
+            return jsonify({'error': "objective must be 'max' or 'min'"}), 400
+        if chunk_size < 1:
+            return jsonify({'error': 'chunk_size must be at least 1'}), 400
+        if top_k is not None:
+            top_k = int(top_k)
+            if top_k < 1:
+                return jsonify({'error': 'top_k must be at least 1'}), 400
+        
+        axes = resolve_axes(data.get('axes'), int(data.get('steps', 10)))
+        
+        if method == 'grid':
+            total = grid_size(axes)
+        else:
+            if 'samples' not in data:
+                return jsonify({'error': f'Missing required field: samples (required for method {method})'}), 400
+            total = int(data['samples'])
+            if total < 1:
+                return jsonify({'error': 'samples must be at least 1'}), 400
+        
+        if total > Config_env.SWEEP_MAX_POINTS:
+            return jsonify({'error': f'Sweep has {total} points (max {Config_env.SWEEP_MAX_POINTS})'}), 413
+        
+        if not os.path.exists(model_path):
+            return jsonify({'error': f'Model file not found: {model_path}'}), 404
+        
+        # Resolve the model version once: the model and its scaler come from the same one
+        model_file = ModelLoader.resolve_path(model_path)
+        model = ModelLoader.get_model(model_file, model_type, alias=model_path)
+        scaler = scaler_registry.for_model(model_file, model)
+        
+        if method == 'grid':
+            chunks = iter_grid(axes, chunk_size)
+        else:
+            chunks = iter_samples(method, axes, total, chunk_size, data.get('seed'))
+        
+        # Only the best cells: keep a running top-k across chunks
+        if top_k is not None:
+            best_points = np.empty((0, len(INPUT_FIELDS)))
+            best_predictions = np.empty(0)
+            for chunk in chunks:
+                predictions = ModelPredictor.predict_rows(model, scaler, chunk, model_type)
+                best_points = np.vstack([best_points, chunk])
+                best_predictions = np.concatenate([best_predictions, predictions])
+                if len(best_predictions) > top_k:
+                    keys = -best_predictions if objective == 'max' else best_predictions
+                    keep = np.argpartition(keys, top_k - 1)[:top_k]
+                    best_points, best_predictions = best_points[keep], best_predictions[keep]
+            
+            order = np.argsort(-best_predictions if objective == 'max' else best_predictions, kind='stable')
+            return jsonify({
+                'method': method,
+                'total_points': total,
+                'objective': objective,
+                'top_k': [
+                    {'inputs': dict(zip(INPUT_FIELDS, best_points[i].tolist())), 'prediction': float(best_predictions[i])}
+                    for i in order
+                ],
+                'unit': '%',
+                'model_used': os.path.basename(model_path),
+                'model_type': model_type
+            })
+        
+        def generate():
+            yield json.dumps({
+                'method': method,
+                'total_points': total,
+                'chunk_size': chunk_size,
+                'fields': INPUT_FIELDS,
+                'unit': '%',
+                'model_used': os.path.basename(model_path),
+                'model_type': model_type
+            }) + '\n'
+            offset = 0
+            try:
+                for chunk in chunks:
+                    predictions = ModelPredictor.predict_rows(model, scaler, chunk, model_type)
+                    yield json.dumps({
+                        'offset': offset,
+                        'inputs': chunk.tolist(),
+                        'predictions': predictions.tolist()
+                    }) + '\n'
+                    offset += len(chunk)
+            except Exception as e:
+                yield json.dumps({'error': f'Prediction error: {str(e)}', 'offset': offset}) + '\n'
+                return
+            yield json.dumps({'done': True, 'count': offset}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
         
     except ValueError as ve:
         return jsonify({'error': f'Invalid parameter value: {str(ve)}'}), 400
@@ -212,7 +536,12 @@ def predict_with_dynamic_model():
                 'type': 'object',
                 'properties': {
                     'status': {'type': 'string', 'description': 'Health status'},
-                    'message': {'type': 'string', 'description': 'Status message'}
+                    'message': {'type': 'string', 'description': 'Status message'},
+                    'ready': {'type': 'boolean', 'description': 'Backend prewarm and model warm-up finished (see /predict/ready)'},
+                    'backends': {
+                        'type': 'object',
+                        'description': 'Per library: state (warm, warming, queued, cold, unavailable) and import_seconds'
+                    }
                 }
             }
         }
@@ -222,7 +551,135 @@ def health_check():
     """Health check endpoint for the predict service"""
     return jsonify({
         "status": "healthy",
-        "message": "Predict service is running"
+        "message": "Predict service is running",
+        "ready": is_ready(),
+        "backends": backend_status()
     }), 200
 
+def is_ready():
+    """True once the backend prewarm and the model warm-up of this worker finished"""
+    return prewarm_done() and warmup.model_warmup.is_done()
+
+@predict_bp.route('/ready', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'summary': 'Readiness probe',
+    'description': 'Returns 503 until this worker imported the PREWARM_BACKENDS libraries and loaded and warmed up '
+                   'the models of the preload manifest, then 200. Route traffic to the service only once it is ready.',
+    'responses': {
+        200: {'description': 'Ready to serve'},
+        503: {'description': 'Still warming up'}
+    }
+})
+def readiness_check():
+    """Readiness probe gated on backend prewarm and model warm-up"""
+    ready = is_ready()
+    return jsonify({'ready': ready, 'pid': os.getpid()}), 200 if ready else 503
+
+@predict_bp.route('/warmup', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'summary': 'Model warm-up status',
+    'description': 'Models of MODEL_PRELOAD and the preload manifest, with their load and warm-up timings in the '
+                   'worker process that served the request. In workers forked from a --preload master, '
+                   'preloaded is true and load_seconds is the time the master took to load the model.',
+    'responses': {
+        200: {
+            'description': 'Warm-up status of this worker',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'pid': {'type': 'integer'},
+                    'done': {'type': 'boolean'},
+                    'started_at': {'type': 'number'},
+                    'finished_at': {'type': 'number'},
+                    'models': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'model_path': {'type': 'string'},
+                                'model_type': {'type': 'string'},
+                                'state': {'type': 'string', 'enum': ['pending', 'loading', 'warming', 'ready', 'failed', 'missing']},
+                                'load_seconds': {'type': 'number'},
+                                'warmup_seconds': {'type': 'number'},
+                                'preloaded': {'type': 'boolean'},
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+})
+def warmup_status():
+    """Per-model warm-up timings of this worker process"""
+    return jsonify({'pid': os.getpid(), **warmup.model_warmup.status()}), 200
+
+@predict_bp.route('/cache', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'summary': 'Model cache statistics',
+    'description': 'Hit/miss/eviction counters and current contents of the process-wide model cache',
+    'responses': {
+        200: {
+            'description': 'Cache statistics for this worker process',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'hits': {'type': 'integer'},
+                    'misses': {'type': 'integer'},
+                    'evictions': {'type': 'integer'},
+                    'invalidations': {'type': 'integer'},
+                    'hit_rate': {'type': 'number'},
+                    'entries': {'type': 'integer'},
+                    'bytes': {'type': 'integer'},
+                    'scaler_cache': {'type': 'object', 'description': 'Scaler cache counters and cached scalers'},
+                    'result_cache': {'type': 'object', 'description': 'Result cache hits per store, misses, errors, hit_rate and store sizes'}
+                }
+            }
+        }
+    }
+})
+def cache_stats():
+    """Model cache statistics for this worker process"""
+    return jsonify({**model_cache.stats(), 'scaler_cache': scaler_registry.stats(), 'result_cache': result_cache.stats()}), 200
+
+@predict_bp.route('/memory', methods=['GET'])
+@swag_from({
+    'tags': ['Health'],
+    'summary': 'Worker memory usage',
+    'description': 'Resident memory of the worker that served the request, and how much of it is shared '
+                   'with the other gunicorn processes (memory-mapped .npstore models, pages inherited from a --preload master)',
+    'responses': {
+        200: {
+            'description': 'Memory usage of this worker process',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'pid': {'type': 'integer'},
+                    'rss_kb': {'type': 'integer', 'description': 'Resident set size'},
+                    'pss_kb': {'type': 'integer', 'description': 'Proportional set size (shared pages split between processes)'},
+                    'shared_kb': {'type': 'integer'},
+                    'private_kb': {'type': 'integer'},
+                    'shared_savings_kb': {'type': 'integer', 'description': 'rss_kb - pss_kb, memory saved by sharing pages'},
+                    'models': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        }
+    }
+})
+def memory_stats():
+    """Memory usage for this worker process"""
+    from app.models.model_store import mapped_bytes, process_memory
+
+    usage = process_memory()
+    usage['pid'] = os.getpid()
+    usage['models'] = [
+        {'path': path, 'model_type': model_type, 'mapped_bytes': mapped_bytes(model)}
+        for path, model_type, model in model_cache.models()
+    ]
+    return jsonify(usage), 200
+
 # In the future, you can add routes for other models like /cnn, /xgboost ...
\ No newline at end of file
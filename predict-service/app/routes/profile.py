@@ -0,0 +1,156 @@
+from flask import Blueprint, jsonify, request, send_file
+
+from app.config.env import Config_env
+from app.config.swagger import swag_from
+from app.middlewares.auth import token_required
+from app.monitoring.profiling import PROFILE_MODES, profiler
+
+profile_bp = Blueprint('profile', __name__, url_prefix='/profile')
+
+
+def profiling_disabled():
+    return jsonify({'error': 'Profiling is disabled (PROFILING_ENABLED=false)'}), 404
+
+
+@profile_bp.route('', methods=['GET'])
+@token_required
+@swag_from({
+    'tags': ['Profiling'],
+    'summary': 'Profiling state and stored profiles',
+    'description': 'Arm state of the worker that answers, the slow-request threshold and the stored profiles of all workers, newest first.',
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {
+            'description': 'Profiling state',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'pid': {'type': 'integer'},
+                    'armed': {'type': 'object', 'description': 'remaining, mode, slower_than_ms, path_prefix, armed_at (null if not armed)'},
+                    'slow_ms': {'type': 'number'},
+                    'profile_dir': {'type': 'string'},
+                    'max_files': {'type': 'integer'},
+                    'profiles': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'name': {'type': 'string'},
+                                'mode': {'type': 'string', 'enum': PROFILE_MODES},
+                                'size_bytes': {'type': 'integer'},
+                                'created': {'type': 'number'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        404: {'description': 'Profiling is disabled'}
+    }
+})
+def profile_status():
+    """Profiling state of this worker and the stored profiles"""
+    if not Config_env.PROFILING_ENABLED:
+        return profiling_disabled()
+    return jsonify({**profiler.status(), 'profiles': profiler.list_profiles()})
+
+
+@profile_bp.route('/arm', methods=['POST'])
+@token_required
+@swag_from({
+    'tags': ['Profiling'],
+    'summary': 'Profile the next requests',
+    'description': 'Profile the next requests handled by the worker that receives this request (arms are per worker). '
+                   'cprofile writes a .pstats file, sample a flamegraph-collapsed .collapsed file. '
+                   'To profile one specific request instead, send it with an X-Profile: cprofile|sample header.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'required': False,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'requests': {'type': 'integer', 'default': 1, 'description': 'Number of requests to profile'},
+                    'mode': {'type': 'string', 'enum': PROFILE_MODES, 'default': 'cprofile'},
+                    'slower_than_ms': {'type': 'number', 'default': 0, 'description': 'Only keep profiles of requests slower than this'},
+                    'path_prefix': {'type': 'string', 'description': 'Only profile requests whose path starts with this, e.g. /predict/model'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Arm state'},
+        400: {'description': 'Invalid parameters'},
+        404: {'description': 'Profiling is disabled'}
+    }
+})
+def arm_profiling():
+    """Arm profiling of the next requests of this worker"""
+    if not Config_env.PROFILING_ENABLED:
+        return profiling_disabled()
+    try:
+        data = request.get_json(silent=True) or {}
+        requests = int(data.get('requests', 1))
+        mode = str(data.get('mode', 'cprofile')).lower()
+        slower_than_ms = float(data.get('slower_than_ms', 0))
+        path_prefix = data.get('path_prefix')
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+
+    if requests < 1:
+        return jsonify({'error': 'requests must be at least 1'}), 400
+    if mode not in PROFILE_MODES:
+        return jsonify({'error': f'Unsupported mode: {mode}. Supported modes: {PROFILE_MODES}'}), 400
+    if slower_than_ms < 0:
+        return jsonify({'error': 'slower_than_ms must not be negative'}), 400
+
+    armed = profiler.arm(requests, mode, slower_than_ms, path_prefix)
+    return jsonify({**profiler.status(), 'armed': armed})
+
+
+@profile_bp.route('/disarm', methods=['POST'])
+@token_required
+@swag_from({
+    'tags': ['Profiling'],
+    'summary': 'Stop profiling armed requests',
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {'description': 'Profiling state'},
+        404: {'description': 'Profiling is disabled'}
+    }
+})
+def disarm_profiling():
+    """Drop the arm of this worker"""
+    if not Config_env.PROFILING_ENABLED:
+        return profiling_disabled()
+    profiler.disarm()
+    return jsonify(profiler.status())
+
+
+@profile_bp.route('/files/<name>', methods=['GET'])
+@token_required
+@swag_from({
+    'tags': ['Profiling'],
+    'summary': 'Download a stored profile',
+    'description': '.pstats files open with python -m pstats or snakeviz; .collapsed files with flamegraph.pl, speedscope or inferno.',
+    'security': [{'Bearer': []}],
+    'produces': ['application/octet-stream', 'text/plain'],
+    'parameters': [
+        {'in': 'path', 'name': 'name', 'type': 'string', 'required': True}
+    ],
+    'responses': {
+        200: {'description': 'Profile file'},
+        404: {'description': 'Profile not found or profiling is disabled'}
+    }
+})
+def download_profile(name):
+    """A stored profile file"""
+    if not Config_env.PROFILING_ENABLED:
+        return profiling_disabled()
+    path = profiler.profile_path(name)
+    if path is None:
+        return jsonify({'error': f'Profile not found: {name}'}), 404
+    mimetype = 'text/plain' if name.endswith('.collapsed') else 'application/octet-stream'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=name)
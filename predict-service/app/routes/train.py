@@ -1,27 +1,56 @@
 from flask import Blueprint, request, jsonify
 from app.middlewares.auth import token_required
-import pandas as pd
 import os
-import joblib
+import time
 from datetime import datetime
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-from sklearn.preprocessing import StandardScaler
 import traceback
 
+from app.training.trainer import InvalidTrainingRequest, TRAINED_MODEL_DIR, TRAINING_STAGES, parse_training_params, train_random_forest
+from app.training.jobs import FINISHED_STATES, JobQueueFull, job_manager
+from app.training.search import SEARCH_SPACES, SEARCH_STRATEGIES, parse_search_params
+from app.config.swagger import swag_from
+from app.monitoring.metrics import training_seconds
+
 train_bp = Blueprint('train', __name__, url_prefix='/train')
 
-# Try to import swagger decorator
-try:
-    from flasgger import swag_from
-    HAS_SWAGGER = True
-except ImportError:
-    def swag_from(spec):
-        def decorator(f):
-            return f
-        return decorator
-    HAS_SWAGGER = False
+
+# Request body shared by /train/model and /train/jobs
+TRAINING_REQUEST_SCHEMA = {
+    'type': 'object',
+    'required': ['dataset_path'],
+    'properties': {
+        'dataset_path': {
+            'type': 'string',
+            'description': 'Absolute path to the dataset CSV file'
+        },
+        'model_name': {
+            'type': 'string',
+            'description': 'Custom name for the trained model (optional)'
+        },
+        'n_estimators': {
+            'type': 'integer',
+            'default': 100,
+            'description': 'Number of trees in the forest'
+        },
+        'max_depth': {
+            'type': 'integer',
+            'default': None,
+            'description': 'Maximum depth of trees'
+        },
+        'test_size': {
+            'type': 'number',
+            'default': 0.2,
+            'minimum': 0.1,
+            'maximum': 0.5,
+            'description': 'Proportion of dataset for testing'
+        },
+        'random_state': {
+            'type': 'integer',
+            'default': 42,
+            'description': 'Random state for reproducibility'
+        }
+    }
+}
 
 
 @train_bp.route('/model', methods=['POST'])
@@ -37,42 +66,7 @@ except ImportError:
             'name': 'body',
             'description': 'Training parameters',
             'required': True,
-            'schema': {
-                'type': 'object',
-                'required': ['dataset_path'],
-                'properties': {
-                    'dataset_path': {
-                        'type': 'string',
-                        'description': 'Absolute path to the dataset CSV file'
-                    },
-                    'model_name': {
-                        'type': 'string',
-                        'description': 'Custom name for the trained model (optional)'
-                    },
-                    'n_estimators': {
-                        'type': 'integer',
-                        'default': 100,
-                        'description': 'Number of trees in the forest'
-                    },
-                    'max_depth': {
-                        'type': 'integer',
-                        'default': None,
-                        'description': 'Maximum depth of trees'
-                    },
-                    'test_size': {
-                        'type': 'number',
-                        'default': 0.2,
-                        'minimum': 0.1,
-                        'maximum': 0.5,
-                        'description': 'Proportion of dataset for testing'
-                    },
-                    'random_state': {
-                        'type': 'integer',
-                        'default': 42,
-                        'description': 'Random state for reproducibility'
-                    }
-                }
-            }
+            'schema': TRAINING_REQUEST_SCHEMA
         }
     ],
     'responses': {
@@ -84,6 +78,8 @@ except ImportError:
                     'success': {'type': 'boolean'},
                     'message': {'type': 'string'},
                     'model_path': {'type': 'string'},
+                    'pipeline_path': {'type': 'string'},
+                    'model_version': {'type': 'string', 'description': 'Content-addressed version the names now point at'},
                     'metrics': {
                         'type': 'object',
                         'properties': {
@@ -123,148 +119,26 @@ def train_model():
         if hasattr(request, 'user'):
             trained_by = request.user.get('username', 'unknown')
         
-        # Validate required fields
-        if 'dataset_path' not in data:
-            return jsonify({'error': 'Missing required field: dataset_path'}), 400
-        
-        dataset_path = data['dataset_path']
-        
-        # Check if dataset file exists
-        if not os.path.exists(dataset_path):
-            return jsonify({'error': f'Dataset file not found: {dataset_path}'}), 404
-        
-        # Get training parameters with defaults and ensure correct types
-        n_estimators = int(data.get('n_estimators', 100))
-        
-        # Handle max_depth - can be None or integer
-        max_depth_value = data.get('max_depth', None)
-        if max_depth_value is not None and max_depth_value != '':
-            max_depth = int(max_depth_value)
-        else:
-            max_depth = None
-        
-        test_size = float(data.get('test_size', 0.2))
-        random_state = int(data.get('random_state', 42))
-        model_name = data.get('model_name', f'RF_Model_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
-        
-        # Validate parameters
-        if not (10 <= n_estimators <= 1000):
-            return jsonify({'error': 'n_estimators must be between 10 and 1000'}), 400
-        
-        if max_depth is not None and not (1 <= max_depth <= 50):
-            return jsonify({'error': 'max_depth must be between 1 and 50 or None'}), 400
-        
-        # Validate test_size
-        if not (0.1 <= test_size <= 0.5):
-            return jsonify({'error': 'test_size must be between 0.1 and 0.5'}), 400
-        
-        # Read dataset
-        print(f"📂 Reading dataset from: {dataset_path}")
-        df = pd.read_csv(dataset_path)
-        print(f"✅ Dataset loaded: {len(df)} rows, {len(df.columns)} columns")
-        
-        # Prepare features and target
-        # Define feature columns explicitly (exclude both target and intermediate viability column)
-        feature_columns = ['MXene (mg/mL)', 'Laminin peptide (ug/mL)', 'Electric stimulation (Hz)', 'Voltage (V)']
-        target_column = 'Cell viability (%)'
-        
-        # Check if columns exist
-        missing_cols = [col for col in feature_columns + [target_column] if col not in df.columns]
-        if missing_cols:
-            return jsonify({'error': f'Missing required columns: {missing_cols}'}), 400
-        
-        X = df[feature_columns]
-        y = df[target_column]
-        
-        print(f"🔢 Features: {X.shape[1]} columns")
-        print(f"🎯 Target: {y.name if hasattr(y, 'name') else 'Last column'}")
-        
-        # Split train/test
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=random_state
-        )
-        print(f"✂️ Train set: {len(X_train)} samples, Test set: {len(X_test)} samples")
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Train model
-        print("🚀 Training Random Forest model...")
-        model = RandomForestRegressor(
-            n_estimators=n_estimators,
-            max_depth=max_depth,
-            random_state=random_state,
-            n_jobs=-1
-        )
-        model.fit(X_train_scaled, y_train)
-        print("✅ Training completed!")
-        
-        # Evaluate model
-        y_pred = model.predict(X_test_scaled)
-        r2 = r2_score(y_test, y_pred)
-        
-        # Calculate RMSE (compatible with all sklearn versions)
-        mse = mean_squared_error(y_test, y_pred)
-        rmse = mse ** 0.5  # Square root of MSE
-        
-        mae = mean_absolute_error(y_test, y_pred)
-        
-        print(f"\n📈 Model Performance:")
-        print(f"   R² Score: {r2:.4f}")
-        print(f"   RMSE: {rmse:.4f}")
-        print(f"   MAE: {mae:.4f}")
-        
-        # Save model
-        model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml_model')
-        os.makedirs(model_dir, exist_ok=True)
-        
-        model_filename = f"{model_name}.pkl"
-        model_path = os.path.join(model_dir, model_filename)
-        
-        joblib.dump(model, model_path)
-        print(f"💾 Model saved: {model_path}")
-        
-        # Save scaler with model
-        scaler_path = os.path.join(model_dir, f"{model_name}_scaler.pkl")
-        joblib.dump(scaler, scaler_path)
-        print(f"💾 Scaler saved: {scaler_path}")
-        
-        # Also save as latest
-        latest_model_path = os.path.join(model_dir, 'latest_model.pkl')
-        latest_scaler_path = os.path.join(model_dir, 'latest_scaler.pkl')
-        joblib.dump(model, latest_model_path)
-        joblib.dump(scaler, latest_scaler_path)
-        
-        # IMPORTANT: Save as shared scaler for prediction endpoint
-        shared_scaler_path = os.path.join(model_dir, 'scaler.pkl')
-        joblib.dump(scaler, shared_scaler_path)
-        print(f"💾 Shared scaler saved: {shared_scaler_path}")
+        params = parse_training_params(data)
+        started = time.perf_counter()
+        try:
+            result = train_random_forest(params, trained_by=trained_by)
+        except Exception:
+            training_seconds.observe(time.perf_counter() - started, 'train', 'request', 'failed')
+            raise
+        training_seconds.observe(time.perf_counter() - started, 'train', 'request', 'succeeded')
         
         # Return success response
         return jsonify({
             'success': True,
             'message': 'Model trained successfully',
-            'model_path': model_path,
-            'scaler_path': scaler_path,
-            'model_name': model_name,
-            'metrics': {
-                'r2_score': round(r2, 4),
-                'rmse': round(rmse, 4),
-                'mae': round(mae, 4)
-            },
-            'training_info': {
-                'train_samples': len(X_train),
-                'test_samples': len(X_test),
-                'n_features': X.shape[1],
-                'n_estimators': n_estimators,
-                'max_depth': max_depth,
-                'trained_by': trained_by,
-                'trained_at': datetime.now().isoformat()
-            }
+            **result
         }), 200
         
+    except InvalidTrainingRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"\n❌ Training Error: {str(e)}")
         traceback.print_exc()
@@ -274,6 +148,319 @@ def train_model():
         }), 500
 
 
+@train_bp.route('/jobs', methods=['POST'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'Submit a background training job',
+    'description': 'Validate the parameters and return a job id right away. Training runs in a separate, '
+                   'lower-priority process; at most TRAIN_JOBS_MAX_CONCURRENT jobs train at the same time and '
+                   'the others wait in the queue. Poll GET /train/jobs/{job_id} for the outcome.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'description': 'Training parameters, same as /train/model',
+            'required': True,
+            'schema': TRAINING_REQUEST_SCHEMA
+        }
+    ],
+    'responses': {
+        '202': {
+            'description': 'Job accepted',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'job_id': {'type': 'string'},
+                    'state': {'type': 'string', 'enum': ['queued']},
+                    'status_url': {'type': 'string'}
+                }
+            }
+        },
+        '400': {'description': 'Bad request - invalid parameters'},
+        '404': {'description': 'Dataset file not found'},
+        '429': {'description': 'Too many queued or running jobs'}
+    }
+})
+def submit_training_job():
+    """
+    Queue a Random Forest training job
+    """
+    try:
+        data = request.get_json()
+        
+        trained_by = 'unknown'
+        if hasattr(request, 'user'):
+            trained_by = request.user.get('username', 'unknown')
+        
+        params = parse_training_params(data)
+        job = job_manager.submit(params, trained_by=trained_by)
+        
+        return jsonify({
+            'job_id': job['job_id'],
+            'kind': job['kind'],
+            'state': job['state'],
+            'submitted_at': job['submitted_at'],
+            'status_url': f"/train/jobs/{job['job_id']}"
+        }), 202
+        
+    except InvalidTrainingRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'error': f'Failed to submit training job: {str(e)}'}), 500
+
+
+@train_bp.route('/search', methods=['POST'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'Submit a hyperparameter search job',
+    'description': 'Searches the hyperparameters of the model classes in src/model_dev.py by k-fold cross-validation '
+                   'on the training split, in a process pool sized to the CPUs available to the container. '
+                   'Successive halving grows Random Forests with warm start, so surviving candidates only fit their new trees. '
+                   'Only the winner is refitted and saved, with a <model_name>_leaderboard.json of every trial. '
+                   'Runs as a training job: poll GET /train/jobs/{job_id}.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'description': 'Dataset and search settings',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['dataset_path'],
+                'properties': {
+                    'dataset_path': {'type': 'string', 'description': 'Absolute path to the dataset CSV file'},
+                    'model_name': {'type': 'string', 'description': 'Name of the saved winner (optional)'},
+                    'strategy': {'type': 'string', 'enum': SEARCH_STRATEGIES, 'default': 'halving'},
+                    'models': {
+                        'type': 'array',
+                        'items': {'type': 'string', 'enum': list(SEARCH_SPACES)},
+                        'description': 'Model classes to compare (default: ExperimentConfig.models_to_compare)'
+                    },
+                    'param_grid': {
+                        'type': 'object',
+                        'description': 'Per-model search space {model: {parameter: [values]}}, replaces the default space of that model',
+                        'example': {'RandomForest': {'n_estimators': [200, 400], 'max_depth': [None, 10]}}
+                    },
+                    'n_trials': {'type': 'integer', 'default': 20, 'description': 'Candidates drawn by random and halving search'},
+                    'cv_folds': {'type': 'integer', 'default': 5, 'description': 'Cross-validation folds (default: ExperimentConfig.cross_validation_folds)'},
+                    'halving_factor': {'type': 'integer', 'default': 3, 'description': 'Successive halving keeps 1/factor of the candidates per rung'},
+                    'test_size': {'type': 'number', 'default': 0.2, 'minimum': 0.1, 'maximum': 0.5},
+                    'random_state': {'type': 'integer', 'default': 42}
+                }
+            }
+        }
+    ],
+    'responses': {
+        '202': {'description': 'Job accepted (same body as POST /train/jobs)'},
+        '400': {'description': 'Bad request - invalid settings'},
+        '404': {'description': 'Dataset file not found'},
+        '429': {'description': 'Too many queued or running jobs'}
+    }
+})
+def submit_search_job():
+    """
+    Queue a hyperparameter search job
+    """
+    try:
+        data = request.get_json()
+        
+        trained_by = 'unknown'
+        if hasattr(request, 'user'):
+            trained_by = request.user.get('username', 'unknown')
+        
+        params = parse_search_params(data)
+        job = job_manager.submit(params, trained_by=trained_by, kind='search')
+        
+        return jsonify({
+            'job_id': job['job_id'],
+            'kind': job['kind'],
+            'state': job['state'],
+            'submitted_at': job['submitted_at'],
+            'status_url': f"/train/jobs/{job['job_id']}"
+        }), 202
+        
+    except InvalidTrainingRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'error': f'Failed to submit search job: {str(e)}'}), 500
+
+
+@train_bp.route('/jobs', methods=['GET'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'List training jobs',
+    'description': 'Most recently submitted jobs first',
+    'parameters': [
+        {'in': 'query', 'name': 'limit', 'type': 'integer', 'default': 50}
+    ],
+    'responses': {
+        '200': {'description': 'List of jobs (same fields as GET /train/jobs/{job_id})'}
+    }
+})
+def list_training_jobs():
+    """List training jobs"""
+    try:
+        limit = int(request.args.get('limit', 50))
+        return jsonify({'jobs': job_manager.list(limit=limit)}), 200
+    except ValueError as ve:
+        return jsonify({'error': f'Invalid parameter value: {str(ve)}'}), 400
+
+
+@train_bp.route('/jobs/<job_id>', methods=['GET'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'Training job status',
+    'description': 'State, current stage, per-stage timings and, once succeeded, the same result as /train/model. '
+                   f'Stages: {", ".join(TRAINING_STAGES)}.',
+    'parameters': [
+        {'in': 'path', 'name': 'job_id', 'type': 'string', 'required': True}
+    ],
+    'responses': {
+        '200': {
+            'description': 'Job state',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'job_id': {'type': 'string'},
+                    'state': {'type': 'string', 'enum': ['queued', 'running', 'succeeded', 'failed', 'cancelled']},
+                    'stage': {'type': 'string'},
+                    'progress': {'type': 'number', 'description': 'Fraction of stages completed'},
+                    'stages': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'name': {'type': 'string'},
+                                'started_at': {'type': 'string'},
+                                'seconds': {'type': 'number'}
+                            }
+                        }
+                    },
+                    'queue_seconds': {'type': 'number'},
+                    'elapsed_seconds': {'type': 'number'},
+                    'result': {'type': 'object', 'description': 'model_path, scaler_path, pipeline_path, model_version, model_name, metrics, training_info'},
+                    'error': {'type': 'string'}
+                }
+            }
+        },
+        '404': {'description': 'Job not found'}
+    }
+})
+def get_training_job(job_id):
+    """Status of one training job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Training job not found: {job_id}'}), 404
+    return jsonify(job), 200
+
+
+@train_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'Cancel a training job',
+    'description': 'Stops a queued or running job. A job that is already saving its model finishes instead.',
+    'parameters': [
+        {'in': 'path', 'name': 'job_id', 'type': 'string', 'required': True}
+    ],
+    'responses': {
+        '202': {'description': 'Cancellation requested'},
+        '404': {'description': 'Job not found'},
+        '409': {'description': 'Job already finished'}
+    }
+})
+def cancel_training_job(job_id):
+    """Cancel one training job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': f'Training job not found: {job_id}'}), 404
+    if job['state'] in FINISHED_STATES:
+        return jsonify({'error': f"Training job already {job['state']}", 'job_id': job_id, 'state': job['state']}), 409
+    return jsonify({'job_id': job_id, 'state': job['state'], 'cancel_requested': True}), 202
+
+
+@train_bp.route('/datasets', methods=['POST'])
+# @token_required  # Temporarily disabled for development, like /train/model
+@swag_from({
+    'tags': ['Training'],
+    'summary': 'Ingest a dataset into the dataset cache',
+    'description': 'Convert an uploaded CSV once into memory-mapped float64 columns (features and target), keyed by '
+                   'the hash of its content, and return the statistics computed at ingest. Training reads the cache '
+                   'either way; ingesting right after upload takes the CSV parsing off the first training run.',
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'required': ['dataset_path'],
+                'properties': {
+                    'dataset_path': {'type': 'string', 'description': 'Absolute path to the dataset CSV file'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Cached dataset',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'content_hash': {'type': 'string'},
+                    'rows': {'type': 'integer'},
+                    'columns': {'type': 'array', 'items': {'type': 'string'}},
+                    'stats': {'type': 'object', 'description': 'Per column: count, missing, min, max, median, mean'}
+                }
+            }
+        },
+        '400': {'description': 'Missing required columns or non-numeric column'},
+        '404': {'description': 'Dataset file not found'}
+    }
+})
+def ingest_dataset():
+    """Cache the training columns of a dataset and return their statistics"""
+    from app.training.dataset_cache import dataset_cache
+
+    data = request.get_json(silent=True)
+    if not data or 'dataset_path' not in data:
+        return jsonify({'error': 'Missing required field: dataset_path'}), 400
+    
+    dataset_path = data['dataset_path']
+    if not os.path.isfile(dataset_path):
+        return jsonify({'error': f'Dataset file not found: {dataset_path}'}), 404
+    
+    try:
+        dataset = dataset_cache.load(dataset_path)
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': e.args[0]}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to ingest dataset: {str(e)}'}), 500
+    
+    meta = dataset.meta
+    return jsonify({
+        'content_hash': meta['content_hash'],
+        'rows': meta['rows'],
+        'columns': meta['columns'],
+        'stats': meta['stats'],
+        'created_at': meta['created_at']
+    }), 200
+
+
 @train_bp.route('/status', methods=['GET'])
 @swag_from({
     'tags': ['Training'],
@@ -323,7 +510,8 @@ def training_status():
                                 'name': {'type': 'string'},
                                 'path': {'type': 'string'},
                                 'size': {'type': 'integer'},
-                                'created_at': {'type': 'string'}
+                                'created_at': {'type': 'string'},
+                                'version': {'type': 'string', 'description': 'Model version the name points at'}
                             }
                         }
                     }
@@ -335,7 +523,7 @@ def training_status():
 def list_models():
     """List all trained models"""
     try:
-        model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml_model')
+        model_dir = TRAINED_MODEL_DIR
         
         if not os.path.exists(model_dir):
             return jsonify({'models': []}), 200
@@ -345,12 +533,16 @@ def list_models():
             if filename.endswith('.pkl') and not filename.endswith('_scaler.pkl'):
                 filepath = os.path.join(model_dir, filename)
                 stat = os.stat(filepath)
-                models.append({
+                model = {
                     'name': filename,
                     'path': filepath,
                     'size': stat.st_size,
                     'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                })
+                }
+                # Names written by training point at a version directory (app/training/artifacts.py)
+                if os.path.islink(filepath):
+                    model['version'] = os.path.basename(os.path.dirname(os.path.realpath(filepath)))
+                models.append(model)
         
         return jsonify({'models': models}), 200
         
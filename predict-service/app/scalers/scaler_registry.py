@@ -0,0 +1,249 @@
+"""
+Scaler Registry
+Resolve the scaler that belongs to each model and cache it, reloading it when its
+file changes
+
+A model at <dir>/<name>.<ext> uses its sidecar <dir>/<name>_scaler.pkl (written by
+/train/model next to every trained model), a scaler embedded in the model object,
+or else the shared MODEL_DIR/scaler.pkl. Linear scikit-learn scalers are folded into
+an AffineScaler, so scaling a batch is a couple of in-place NumPy operations on the
+raw ndarray instead of a DataFrame round trip through scaler.transform.
+"""
+import os
+import threading
+
+import numpy as np
+
+from app.models.input_schema import FEATURE_COLUMNS
+from app.scalers.shared_scaler import SCALER_PATH
+
+SIDECAR_SUFFIX = '_scaler.pkl'
+
+
+class AffineScaler:
+    """
+    Feature-wise affine transform with a pinned column order
+
+    Reproduces the scikit-learn arithmetic exactly (same operations in the same order
+    on float64), so scaled values are bit-identical to scaler.transform:
+    'subtract_divide' is (X - offset) / scale (StandardScaler, RobustScaler, MaxAbsScaler),
+    'multiply_add' is X * scale + offset, then an optional clip (MinMaxScaler).
+    """
+
+    def __init__(self, offset, scale, order, clip=None, columns=None, source=None):
+        """
+        Args:
+            offset (numpy.ndarray): Per-feature offset
+            scale (numpy.ndarray): Per-feature scale
+            order (str): 'subtract_divide' or 'multiply_add'
+            clip (tuple): (low, high) applied after 'multiply_add', or None
+            columns (list): Input column indices in the scaler's feature order, None if
+                            it already is INPUT_FIELDS order
+            source: Original scaler object
+        """
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.order = order
+        self.clip = clip
+        self.columns = columns
+        self.source = source
+
+    @property
+    def n_features(self):
+        return len(self.scale)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        """
+        AffineScaler equivalent of a fitted scikit-learn scaler
+
+        Returns:
+            AffineScaler, or None for scalers that are not feature-wise affine
+
+        Raises:
+            ValueError: If the scaler was fitted on other feature columns
+        """
+        columns = None
+        feature_names = getattr(scaler, 'feature_names_in_', None)
+        if feature_names is not None:
+            feature_names = [str(name) for name in feature_names]
+            if sorted(feature_names) != sorted(FEATURE_COLUMNS):
+                raise ValueError(f"Scaler was fitted on columns {feature_names}, expected {FEATURE_COLUMNS}")
+            if feature_names != FEATURE_COLUMNS:
+                columns = [FEATURE_COLUMNS.index(name) for name in feature_names]
+        elif getattr(scaler, 'n_features_in_', len(FEATURE_COLUMNS)) != len(FEATURE_COLUMNS):
+            raise ValueError(f"Scaler expects {scaler.n_features_in_} features, expected {len(FEATURE_COLUMNS)}")
+
+        name = type(scaler).__name__
+        n_features = len(FEATURE_COLUMNS)
+        zeros, ones = np.zeros(n_features), np.ones(n_features)
+
+        if name == 'StandardScaler':
+            return cls(scaler.mean_ if scaler.with_mean else zeros, scaler.scale_ if scaler.with_std else ones,
+                       'subtract_divide', columns=columns, source=scaler)
+        if name == 'RobustScaler':
+            return cls(scaler.center_ if scaler.with_centering else zeros, scaler.scale_ if scaler.with_scaling else ones,
+                       'subtract_divide', columns=columns, source=scaler)
+        if name == 'MaxAbsScaler':
+            return cls(zeros, scaler.scale_, 'subtract_divide', columns=columns, source=scaler)
+        if name == 'MinMaxScaler':
+            clip = tuple(scaler.feature_range) if getattr(scaler, 'clip', False) else None
+            return cls(scaler.min_, scaler.scale_, 'multiply_add', clip=clip, columns=columns, source=scaler)
+        return None
+
+    def transform(self, matrix):
+        """
+        Scale raw inputs
+
+        Args:
+            matrix (numpy.ndarray): (n, 4) raw inputs in INPUT_FIELDS order
+
+        Returns:
+            numpy.ndarray: (n, 4) float64 scaled inputs in the scaler's feature order
+        """
+        X = np.array(matrix, dtype=np.float64)
+        if self.columns is not None:
+            X = X[:, self.columns]
+        if self.order == 'subtract_divide':
+            np.subtract(X, self.offset, out=X)
+            np.divide(X, self.scale, out=X)
+        else:
+            np.multiply(X, self.scale, out=X)
+            np.add(X, self.offset, out=X)
+            if self.clip is not None:
+                np.clip(X, self.clip[0], self.clip[1], out=X)
+        return X
+
+    def inverse_transform(self, scaled):
+        """Scaled values (in the scaler's feature order) back to raw units"""
+        X = np.array(scaled, dtype=np.float64)
+        if self.order == 'subtract_divide':
+            X *= self.scale
+            X += self.offset
+        else:
+            X -= self.offset
+            X /= self.scale
+        if self.columns is not None:
+            X = X[:, np.argsort(self.columns)]
+        return X
+
+
+class DataFrameScaler:
+    """Fallback for scalers that are not affine: calls transform on a named DataFrame"""
+
+    def __init__(self, scaler):
+        self.source = scaler
+
+    def transform(self, matrix):
+        import pandas as pd
+        return np.asarray(self.source.transform(pd.DataFrame(np.asarray(matrix), columns=FEATURE_COLUMNS)))
+
+    def inverse_transform(self, scaled):
+        return np.asarray(self.source.inverse_transform(np.asarray(scaled)))
+
+
+def bind_scaler(scaler):
+    """AffineScaler of a fitted scaler, or a DataFrameScaler if it cannot be folded"""
+    if isinstance(scaler, (AffineScaler, DataFrameScaler)):
+        return scaler
+    return AffineScaler.from_sklearn(scaler) or DataFrameScaler(scaler)
+
+
+class ScalerRegistry:
+    """Process-wide cache of scalers, keyed by file path and invalidated on file change"""
+
+    def __init__(self, shared_path):
+        """
+        Args:
+            shared_path (str): Scaler used by models without a sidecar or embedded scaler
+        """
+        self.shared_path = shared_path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @staticmethod
+    def sidecar_paths(model_path):
+        """
+        Candidate sidecars of a model at <dir>/<name>.<ext> (or a .npstore directory):
+        <dir>/<name>_scaler.pkl, and <dir>/<base>_scaler.pkl when name is <base>_model
+        (latest_model.pkl -> latest_scaler.pkl)
+        """
+        stem = os.path.splitext(model_path.rstrip('/\\'))[0]
+        paths = [stem + SIDECAR_SUFFIX]
+        if stem.endswith('_model'):
+            paths.append(stem[:-len('_model')] + SIDECAR_SUFFIX)
+        return paths
+
+    def resolve(self, model_path):
+        """
+        Scaler file of a model
+
+        Returns:
+            tuple: (scaler_path, 'sidecar' or 'shared')
+        """
+        for sidecar in self.sidecar_paths(model_path):
+            if os.path.isfile(sidecar):
+                return sidecar, 'sidecar'
+        return self.shared_path, 'shared'
+
+    def get(self, scaler_path):
+        """
+        Bound scaler loaded from a file, cached until the file changes
+
+        Returns:
+            AffineScaler or DataFrameScaler
+        """
+        stat = os.stat(scaler_path)
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        with self._lock:
+            entry = self._entries.get(scaler_path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+
+        import joblib
+        bound = bind_scaler(joblib.load(scaler_path))
+
+        with self._lock:
+            if scaler_path in self._entries:
+                self.reloads += 1
+            self.misses += 1
+            self._entries[scaler_path] = (key, bound)
+        return bound
+
+    def for_model(self, model_path, model=None):
+        """
+        Scaler to apply to the raw inputs of a model
+
+        Args:
+            model_path (str): Model file the request named
+            model: Loaded model; a model carrying its own input_scaler uses that one
+
+        Returns:
+            AffineScaler or DataFrameScaler
+        """
+        embedded = getattr(model, 'input_scaler', None)
+        if embedded is not None:
+            return bind_scaler(embedded)
+        return self.get(self.resolve(model_path)[0])
+
+    def stats(self):
+        """Cache counters and the scalers currently cached"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reloads': self.reloads,
+                'scalers': [
+                    {'path': path, 'type': type(bound.source).__name__, 'affine': isinstance(bound, AffineScaler)}
+                    for path, (_, bound) in self._entries.items()
+                ]
+            }
+
+
+# Shared by every request handled by this worker process
+scaler_registry = ScalerRegistry(SCALER_PATH)
@@ -0,0 +1,410 @@
+"""
+ASGI Serving Mode
+Serve the Flask app from an asyncio front end, with a bounded thread pool per request
+class instead of one blocked sync worker per request
+
+The blueprints are unchanged: every request is handed to the WSGI app in a thread of
+its pool, and the response (streamed ones included) is sent back chunk by chunk.
+
+Pools (ASGI_* settings):
+    predict  POST requests under ASGI_PREDICT_PATHS (/predict, /optimize)
+    train    POST requests under ASGI_TRAIN_PATHS (/train)
+    default  everything else (health, metrics, job status, Swagger)
+
+A pool admits at most threads + queue requests at a time; the next one is answered
+429 with a Retry-After header without reading its body. A slow Keras load or an
+in-request training run therefore occupies one thread of its own pool, while the
+other pools keep serving. NumPy, scikit-learn tree scoring and XGBoost release the
+GIL while they compute, so the predictions in flight in one process overlap.
+
+Threads rather than processes: the model, scaler and result caches live in the
+process and are shared by all threads of a pool. Run several processes for more CPU
+with gunicorn -k uvicorn.workers.UvicornWorker --workers N --preload asgi:app.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.env import Config_env
+from app.config.runtime import available_cpus
+from app.monitoring.metrics import asgi_queue_wait_seconds, asgi_rejected, metrics
+
+# Response body chunks buffered between a worker thread and a slow client
+STREAM_BUFFER_CHUNKS = 16
+
+# Seconds a worker thread waits for buffer space before checking for a disconnect
+STREAM_WAIT_SECONDS = 0.5
+
+# Methods that never run on the predict and train pools
+READ_METHODS = ['GET', 'HEAD', 'OPTIONS']
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its response was being produced"""
+
+
+class BoundedPool:
+    """Thread pool that admits at most threads + queue_size requests at a time"""
+
+    def __init__(self, name, threads, queue_size):
+        """
+        Args:
+            name (str): Pool name in stats, metrics and 429 responses
+            threads (int): Requests run at the same time
+            queue_size (int): Requests waiting for a thread before new ones are rejected
+        """
+        self.name = name
+        self.threads = max(1, threads)
+        self.queue_size = max(0, queue_size)
+        self.capacity = self.threads + self.queue_size
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """Threads do not survive a fork: every process starts its own executor on first use"""
+        self._lock = threading.Lock()
+        self._executor = None
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix=f'asgi-{self.name}')
+        return self._executor
+
+    def try_acquire(self):
+        """
+        Admit a request
+
+        Returns:
+            bool: False if the pool is full and the request must be rejected
+        """
+        with self._lock:
+            if self.admitted >= self.capacity:
+                self.rejected += 1
+                return False
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.admitted -= 1
+            self.completed += 1
+
+    def started(self):
+        with self._lock:
+            self.running += 1
+
+    def finished(self):
+        with self._lock:
+            self.running -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threads': self.threads,
+                'queue_size': self.queue_size,
+                'running': self.running,
+                'queued': self.admitted - self.running,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_paths(value):
+    return [path.strip().rstrip('/') for path in value.split(',') if path.strip()]
+
+
+def _matches(path, prefixes):
+    return any(path == prefix or path.startswith(prefix + '/') for prefix in prefixes)
+
+
+def build_environ(scope, body):
+    """
+    WSGI environ of an ASGI HTTP request
+
+    Args:
+        scope (dict): ASGI connection scope
+        body (bytes): Complete request body
+
+    Returns:
+        dict: PEP 3333 environ
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI carries paths as latin-1 decoded bytes
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class AsgiApp:
+    """ASGI application running a WSGI app on bounded per-class thread pools"""
+
+    def __init__(self, wsgi_app, pools, predict_paths, train_paths, max_body_bytes, retry_after_seconds=1):
+        """
+        Args:
+            wsgi_app (callable): The Flask app
+            pools (dict): 'predict', 'train' and 'default' BoundedPool
+            predict_paths (list): Path prefixes of POST requests run on the predict pool
+            train_paths (list): Path prefixes of POST requests run on the train pool
+            max_body_bytes (int): Larger request bodies are answered 413
+            retry_after_seconds (int): Retry-After of 429 responses
+        """
+        self.wsgi_app = wsgi_app
+        self.pools = pools
+        self.predict_paths = predict_paths
+        self.train_paths = train_paths
+        self.max_body_bytes = max_body_bytes
+        self.retry_after_seconds = retry_after_seconds
+
+    def pool_for(self, method, path):
+        if method not in READ_METHODS:
+            if _matches(path, self.predict_paths):
+                return self.pools['predict']
+            if _matches(path, self.train_paths):
+                return self.pools['train']
+        return self.pools['default']
+
+    def stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            # Only HTTP is served; refuse websocket connections
+            if scope['type'] == 'websocket':
+                await send({'type': 'websocket.close', 'code': 1003})
+            return
+
+        pool = self.pool_for(scope['method'], scope['path'])
+        if not pool.try_acquire():
+            asgi_rejected.inc(pool.name)
+            await self._send_json(send, 429, {'error': f'Server busy: the {pool.name} queue is full, retry later'},
+                                  [(b'retry-after', str(self.retry_after_seconds).encode())])
+            return
+
+        submitted = False
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                await self._send_json(send, 413, {'error': f'Request body larger than {self.max_body_bytes} bytes'})
+                return
+            environ = build_environ(scope, body)
+            submitted = True
+            await self._run(pool, environ, send)
+        finally:
+            if not submitted:
+                pool.release()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for pool in self.pools.values():
+                    pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        """Complete request body, or None if it exceeds max_body_bytes"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _run(self, pool, environ, send):
+        """
+        Run the WSGI app on a thread of the pool and send its response
+
+        The worker thread hands events to the event loop: ('start', status, headers),
+        ('body', chunk), then ('end',) or ('error', exception). Body chunks take a credit
+        from a semaphore the loop gives back once the chunk is sent, so a slow client
+        holds back a streaming response instead of buffering it in memory.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        credits = threading.Semaphore(STREAM_BUFFER_CHUNKS)
+        disconnected = threading.Event()
+        queued_at = time.perf_counter()
+
+        def emit(*event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def call():
+            pool.started()
+            asgi_queue_wait_seconds.observe(time.perf_counter() - queued_at, pool.name)
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                if exc_info is not None and response.get('sent'):
+                    raise exc_info[1].with_traceback(exc_info[2])
+                response['start'] = (int(status.split(' ', 1)[0]), headers)
+                return write
+
+            def write(chunk):
+                if not chunk:
+                    return
+                if disconnected.is_set():
+                    raise ClientDisconnected()
+                if not response.get('sent'):
+                    emit('start', *response['start'])
+                    response['sent'] = True
+                while not credits.acquire(timeout=STREAM_WAIT_SECONDS):
+                    if disconnected.is_set():
+                        raise ClientDisconnected()
+                emit('body', chunk)
+
+            last = ('end',)
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                try:
+                    for chunk in iterable:
+                        write(chunk)
+                finally:
+                    if hasattr(iterable, 'close'):
+                        iterable.close()
+                if not response.get('sent'):
+                    emit('start', *response['start'])
+            except ClientDisconnected:
+                pass
+            except Exception as e:
+                last = ('error', e, response.get('sent', False))
+            finally:
+                # The slot is free before the client sees the end of the response
+                pool.finished()
+                pool.release()
+            emit(*last)
+
+        future = pool.executor().submit(call)
+
+        try:
+            while True:
+                kind, *payload = await events.get()
+                if kind == 'start':
+                    status, headers = payload
+                    await send({
+                        'type': 'http.response.start',
+                        'status': status,
+                        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+                    })
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': payload[0], 'more_body': True})
+                    credits.release()
+                elif kind == 'end':
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                    return
+                else:
+                    error, sent = payload
+                    print(f"Error: {environ['REQUEST_METHOD']} {environ['PATH_INFO']} failed in the {pool.name} pool: {error}")
+                    if not sent:
+                        await self._send_json(send, 500, {'error': str(error)})
+                    return
+        finally:
+            # Stops a streaming response whose client went away (no-op once it ended)
+            disconnected.set()
+            if future.cancel():
+                # Never started: call() did not release the slot
+                pool.release()
+
+
+def build_asgi_app(wsgi_app):
+    """ASGI app configured by the ASGI_* settings"""
+    predict_threads = Config_env.ASGI_PREDICT_THREADS or 2 * available_cpus()
+    pools = {
+        'predict': BoundedPool('predict', predict_threads, Config_env.ASGI_PREDICT_QUEUE),
+        'train': BoundedPool('train', Config_env.ASGI_TRAIN_THREADS, Config_env.ASGI_TRAIN_QUEUE),
+        'default': BoundedPool('default', Config_env.ASGI_DEFAULT_THREADS, Config_env.ASGI_DEFAULT_QUEUE)
+    }
+    app = AsgiApp(
+        wsgi_app,
+        pools,
+        _parse_paths(Config_env.ASGI_PREDICT_PATHS),
+        _parse_paths(Config_env.ASGI_TRAIN_PATHS),
+        Config_env.ASGI_MAX_BODY_BYTES,
+        Config_env.ASGI_RETRY_AFTER_SECONDS
+    )
+
+    def pool_collector():
+        values = []
+        for name, stats in app.stats().items():
+            values.append(('asgi_pool_running', (name,), stats['running']))
+            values.append(('asgi_pool_queued', (name,), stats['queued']))
+        return values
+
+    metrics.add_collector(pool_collector)
+
+    if hasattr(os, 'register_at_fork'):
+        for pool in pools.values():
+            os.register_at_fork(after_in_child=pool.reset_after_fork)
+
+    print(f"⚡ ASGI mode: predict {pools['predict'].threads} threads, train {pools['train'].threads}, "
+          f"default {pools['default'].threads}")
+    return app
@@ -0,0 +1,302 @@
+"""
+Versioned Artifact Store
+Publish trained models so that concurrent trainings and in-flight predictions never
+see a torn file or a mismatched model/scaler pair
+
+Every training writes an immutable, content-addressed version directory:
+
+    <root>/versions/<version>/model.pkl          # version: SHA-256 of model and scaler
+    <root>/versions/<version>/model_scaler.pkl   # sidecar of model.pkl
+    <root>/versions/<version>/model.pipeline/
+    <root>/versions/<version>/version.json
+
+Files are written to a staging directory, fsynced, and the directory is renamed into
+place. The names clients use are relative symbolic links switched with an atomic
+rename, under a lock shared by all processes:
+
+    <root>/<name>.pkl, <name>_scaler.pkl, <name>.pipeline
+    <root>/latest_model.pkl, latest_scaler.pkl, latest_model.pipeline
+
+Readers resolve a name once (ModelLoader.resolve_path) and use the resolved version
+for both the model and its sidecar scaler, so a switch between the two reads cannot
+pair a model with another version's scaler. Versions are never rewritten, so the
+model cache reloads a name only when it points at a new version.
+
+Old versions no name points at are deleted beyond ARTIFACT_KEEP_VERSIONS, once they
+are older than PRUNE_GRACE_SECONDS. Where
+symbolic links are unavailable (Windows without the privilege), names are atomically
+replaced copies instead.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.config.env import Config_env
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+VERSIONS_DIR = 'versions'
+VERSION_MANIFEST = 'version.json'
+LOCK_FILE = '.artifacts.lock'
+
+# Hex characters of the SHA-256 used as version id
+VERSION_ID_LENGTH = 16
+
+# Versions younger than this are never pruned: a request may still read the one it resolved
+PRUNE_GRACE_SECONDS = 60
+
+# Files of a version directory
+MODEL_FILE = 'model.pkl'
+SCALER_FILE = 'model_scaler.pkl'
+PIPELINE_DIR = 'model.pipeline'
+
+
+def fsync_dir(path):
+    """Persist a directory's entries (renames into it); a no-op where unsupported"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_tree(path):
+    """fsync every file and directory below path"""
+    for root, _, names in os.walk(path):
+        for name in names:
+            with open(os.path.join(root, name), 'rb') as f:
+                os.fsync(f.fileno())
+        fsync_dir(root)
+
+
+def dump_durable(obj, path):
+    """joblib.dump to path and fsync it before returning"""
+    import joblib
+
+    with open(path, 'wb') as f:
+        joblib.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def switch_pointer(link_path, target_path):
+    """
+    Point link_path at target_path with one atomic rename
+
+    Args:
+        link_path (str): Name clients use (<root>/latest_model.pkl)
+        target_path (str): File or directory inside a version
+    """
+    temp_path = f'{link_path}.tmp{os.getpid()}'
+    if os.path.lexists(temp_path):
+        if os.path.isdir(temp_path) and not os.path.islink(temp_path):
+            shutil.rmtree(temp_path)
+        else:
+            os.remove(temp_path)
+
+    # A real directory (a pipeline written before versioning) cannot be renamed over
+    if os.path.isdir(link_path) and not os.path.islink(link_path):
+        shutil.rmtree(link_path)
+
+    try:
+        os.symlink(os.path.relpath(target_path, os.path.dirname(link_path)), temp_path)
+    except (OSError, NotImplementedError):
+        # No symbolic links: an atomically replaced copy (directories are swapped non-atomically)
+        if os.path.isdir(target_path):
+            shutil.copytree(target_path, temp_path)
+            if os.path.lexists(link_path):
+                shutil.rmtree(link_path)
+        else:
+            shutil.copy2(target_path, temp_path)
+    os.replace(temp_path, link_path)
+
+
+class ArtifactStore:
+    """Content-addressed model versions and the names pointing at them, in one directory"""
+
+    def __init__(self, root, keep_versions=20, grace_seconds=PRUNE_GRACE_SECONDS):
+        """
+        Args:
+            root (str): Directory of the names; versions live in <root>/versions
+            keep_versions (int): Unreferenced versions kept (newest first); 0 keeps all
+            grace_seconds (float): Minimum age of a pruned version
+        """
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        self.keep_versions = keep_versions
+        self.grace_seconds = grace_seconds
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across processes while names are switched and versions pruned"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                import msvcrt
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    import msvcrt
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def version_path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def publish(self, model, scaler, model_name, output_rule, model_type='sklearn', metadata=None):
+        """
+        Write a new version and switch model_name and latest to it
+
+        Args:
+            model: Fitted model
+            scaler: Fitted scaler of the model's inputs
+            model_name (str): Name to point at the version
+            output_rule (OutputRule): Output conversion bundled into the pipeline
+            model_type (str): Library type of the model
+            metadata (dict): Extra fields recorded in version.json
+
+        Returns:
+            dict: version, version_dir and the model_path, scaler_path and pipeline_path names
+        """
+        from app.models.pipeline import save_pipeline
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.versions_dir, f'.staging-{os.getpid()}-{uuid.uuid4().hex[:8]}')
+        os.makedirs(staging)
+        try:
+            dump_durable(model, os.path.join(staging, MODEL_FILE))
+            dump_durable(scaler, os.path.join(staging, SCALER_FILE))
+            model_sha256 = file_sha256(os.path.join(staging, MODEL_FILE))
+            scaler_sha256 = file_sha256(os.path.join(staging, SCALER_FILE))
+            version = hashlib.sha256(f'{model_sha256}:{scaler_sha256}'.encode()).hexdigest()[:VERSION_ID_LENGTH]
+            version_dir = self.version_path(version)
+
+            source = {'model_path': os.path.join(version_dir, MODEL_FILE), 'scaler_path': os.path.join(version_dir, SCALER_FILE)}
+            save_pipeline(os.path.join(staging, PIPELINE_DIR), model, scaler, model_type, output_rule, source)
+            with open(os.path.join(staging, VERSION_MANIFEST), 'w') as f:
+                json.dump({
+                    'version': version,
+                    'model_name': model_name,
+                    'model_type': model_type,
+                    'created_at': datetime.now().isoformat(),
+                    'model_sha256': model_sha256,
+                    'scaler_sha256': scaler_sha256,
+                    **(metadata or {})
+                }, f, indent=2)
+            fsync_tree(staging)
+
+            names = {
+                'model_path': os.path.join(self.root, f'{model_name}.pkl'),
+                'scaler_path': os.path.join(self.root, f'{model_name}_scaler.pkl'),
+                'pipeline_path': os.path.join(self.root, f'{model_name}.pipeline')
+            }
+            pointers = [
+                # Scalers and pipelines first: a reader of <name>.pkl finds its sidecar in the version anyway
+                (names['scaler_path'], SCALER_FILE),
+                (names['pipeline_path'], PIPELINE_DIR),
+                (names['model_path'], MODEL_FILE),
+                (os.path.join(self.root, 'latest_scaler.pkl'), SCALER_FILE),
+                (os.path.join(self.root, 'latest_model.pipeline'), PIPELINE_DIR),
+                (os.path.join(self.root, 'latest_model.pkl'), MODEL_FILE)
+            ]
+            # Existence check, rename and pointer switch under one lock: another publisher's
+            # prune could otherwise delete an unreferenced version with the same content
+            # between the check and the switch
+            with self._locked():
+                if os.path.isdir(version_dir):
+                    # Identical content published before: restart its prune grace period
+                    os.utime(version_dir)
+                else:
+                    os.rename(staging, version_dir)
+                    fsync_dir(self.versions_dir)
+                for link_path, file_name in pointers:
+                    switch_pointer(link_path, os.path.join(version_dir, file_name))
+                fsync_dir(self.root)
+                self.prune()
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return {'version': version, 'version_dir': version_dir, **names}
+
+    def referenced_versions(self):
+        """Versions some name in root points at"""
+        versions_dir = os.path.realpath(self.versions_dir)
+        referenced = set()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.islink(path):
+                target = os.path.realpath(path)
+                if os.path.dirname(os.path.dirname(target)) == versions_dir:
+                    referenced.add(os.path.basename(os.path.dirname(target)))
+        return referenced
+
+    def versions(self):
+        """
+        Published versions, newest first
+
+        Returns:
+            list: version.json contents, with 'referenced' set for versions a name points at
+        """
+        if not os.path.isdir(self.versions_dir):
+            return []
+        referenced = self.referenced_versions()
+        versions = []
+        for version in os.listdir(self.versions_dir):
+            if version.startswith('.'):
+                # Staging directory of a publish in progress
+                continue
+            manifest = os.path.join(self.versions_dir, version, VERSION_MANIFEST)
+            try:
+                with open(manifest) as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                continue
+            info['referenced'] = version in referenced
+            versions.append(info)
+        versions.sort(key=lambda info: info.get('created_at', ''), reverse=True)
+        return versions
+
+    def prune(self):
+        """Delete the oldest unreferenced versions beyond keep_versions (lock held)"""
+        if self.keep_versions <= 0:
+            return
+        unreferenced = [info['version'] for info in self.versions() if not info['referenced']]
+        cutoff = time.time() - self.grace_seconds
+        for version in unreferenced[self.keep_versions:]:
+            try:
+                if os.path.getmtime(self.version_path(version)) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+
+
+def artifact_store(root):
+    return ArtifactStore(root, Config_env.ARTIFACT_KEEP_VERSIONS)
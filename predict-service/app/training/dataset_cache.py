@@ -0,0 +1,204 @@
+"""
+Dataset Cache
+Convert training CSVs once into a columnar binary copy that later runs memory-map
+instead of re-parsing the CSV
+
+Entries are keyed by the SHA-256 of the CSV content, so a dataset uploaded again under
+another path is still a hit. Each entry is a directory <cache_dir>/<hash>/ holding one
+float64 .npy per used column (the features and the target) and a meta.json with the
+row count and per-column statistics computed at ingest.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from app.config.env import Config_env
+from app.models.input_schema import FEATURE_COLUMNS
+from app.training.trainer import TARGET_COLUMN, TRAINED_MODEL_DIR
+
+# Bytes read at a time while hashing a CSV
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def column_stats(values):
+    """Row count and min/max/median/mean of a column, ignoring missing values"""
+    present = values[~np.isnan(values)]
+    if len(present) == 0:
+        return {'count': 0, 'missing': int(len(values)), 'min': None, 'max': None, 'median': None, 'mean': None}
+    return {
+        'count': int(len(present)),
+        'missing': int(len(values) - len(present)),
+        'min': float(present.min()),
+        'max': float(present.max()),
+        'median': float(np.median(present)),
+        'mean': float(present.mean())
+    }
+
+
+class CachedDataset:
+    """Memory-mapped columns of one cache entry"""
+
+    def __init__(self, path, meta, mmap_mode='r'):
+        self.path = path
+        self.meta = meta
+        self.columns = {
+            name: np.load(os.path.join(path, f'col{i}.npy'), mmap_mode=mmap_mode)
+            for i, name in enumerate(meta['columns'])
+        }
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def stats(self):
+        return self.meta['stats']
+
+    def frame(self, columns=None):
+        """
+        DataFrame of the cached columns
+
+        Args:
+            columns (list): Column names, in order (default: all cached columns)
+
+        Returns:
+            pd.DataFrame
+        """
+        import pandas as pd
+
+        columns = columns or self.meta['columns']
+        return pd.DataFrame({name: self.columns[name] for name in columns}, columns=columns)
+
+
+class DatasetCache:
+    """Content-addressed cache of the training columns of CSV datasets"""
+
+    def __init__(self, cache_dir, columns, max_entries=32):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache entries
+            columns (list): Columns converted from every CSV, in order
+            max_entries (int): Entries kept; the least recently used are removed
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.columns = list(columns)
+        self.max_entries = max_entries
+
+    def entry_path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash)
+
+    def load(self, dataset_path):
+        """
+        Cached columns of a CSV, converting it on first use
+
+        Args:
+            dataset_path (str): CSV file
+
+        Returns:
+            CachedDataset
+
+        Raises:
+            KeyError: If the CSV lacks some of the cached columns
+            ValueError: If a cached column is not numeric
+        """
+        content_hash = file_sha256(dataset_path)
+        path = self.entry_path(content_hash)
+        meta = self._read_meta(path)
+        if meta is None:
+            meta = self._ingest(dataset_path, content_hash)
+            print(f"🗃️ Dataset cached: {path} ({meta['rows']} rows)")
+        else:
+            # Mark as recently used for pruning
+            os.utime(path)
+            print(f"🗃️ Dataset cache hit: {path} ({meta['rows']} rows)")
+        return CachedDataset(path, meta)
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('columns') == self.columns else None
+
+    def _ingest(self, dataset_path, content_hash):
+        """Parse the CSV, write its columns and statistics, and rename the entry into place"""
+        import pandas as pd
+
+        df = pd.read_csv(dataset_path)
+        missing_cols = [col for col in self.columns if col not in df.columns]
+        if missing_cols:
+            raise KeyError(f'Missing required columns: {missing_cols}')
+
+        arrays = []
+        for col in self.columns:
+            try:
+                arrays.append(df[col].to_numpy(dtype=np.float64))
+            except (TypeError, ValueError):
+                raise ValueError(f"Column '{col}' is not numeric")
+
+        meta = {
+            'format': 'columns_npy',
+            'content_hash': content_hash,
+            'source_path': os.path.abspath(dataset_path),
+            'source_bytes': os.path.getsize(dataset_path),
+            'columns': self.columns,
+            'dtype': 'float64',
+            'rows': len(df),
+            'stats': {col: column_stats(values) for col, values in zip(self.columns, arrays)},
+            'created_at': datetime.now().isoformat()
+        }
+
+        path = self.entry_path(content_hash)
+        temp_path = f'{path}.tmp{os.getpid()}'
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        try:
+            for i, values in enumerate(arrays):
+                np.save(os.path.join(temp_path, f'col{i}.npy'), values)
+            with open(os.path.join(temp_path, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+
+            # Another process may have cached the same content meanwhile
+            if self._read_meta(path) is None:
+                shutil.rmtree(path, ignore_errors=True)
+                try:
+                    os.rename(temp_path, path)
+                except OSError:
+                    pass
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+        self._prune()
+        return meta
+
+    def _prune(self):
+        """Remove the least recently used entries beyond max_entries"""
+        entries = [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if '.tmp' not in name and os.path.isdir(os.path.join(self.cache_dir, name))
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# Features and target used by training, shared by every run in this process
+dataset_cache = DatasetCache(
+    cache_dir=Config_env.DATASET_CACHE_DIR or os.path.join(TRAINED_MODEL_DIR, 'datasets'),
+    columns=FEATURE_COLUMNS + [TARGET_COLUMN],
+    max_entries=Config_env.DATASET_CACHE_MAX_ENTRIES
+)
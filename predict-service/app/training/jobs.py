@@ -0,0 +1,415 @@
+"""
+Training Jobs
+Run training in background processes, with a bounded number of concurrently running
+jobs, stage timings and cancellation
+
+Each job is a separate Python process (python -m app.training.run_job <jobs_dir> <job_id>)
+that records its state in <jobs_dir>/<job_id>.json, so any gunicorn worker can report on
+or cancel any job. Running jobs hold one of max_concurrent slot locks, shared by all
+workers; queued jobs wait for a free slot. Jobs run at a lower CPU priority (nice) with
+a bounded number of tree builders, so training does not starve the prediction workers.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from app.config.env import Config_env
+from app.training.trainer import TRAINED_MODEL_DIR, TRAINING_STAGES
+from app.training.search import SEARCH_STAGES
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FINISHED_STATES = ['succeeded', 'failed', 'cancelled']
+
+# Job kind -> stages it reports, in order
+JOB_STAGES = {
+    'train': TRAINING_STAGES,
+    'search': SEARCH_STAGES
+}
+
+# Seconds between two attempts of a queued job to take a slot
+SLOT_POLL_INTERVAL = 0.5
+
+
+class JobQueueFull(Exception):
+    """Too many queued and running jobs"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job process when it is cancelled"""
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _pid_alive(pid):
+    """True if a process with this pid exists (always True where it cannot be checked)"""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_json(path, data):
+    """Write JSON atomically so readers never see a partial file"""
+    temp_path = f'{path}.tmp{os.getpid()}'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _try_lock(f):
+    """Take an exclusive, non-blocking lock on an open file, released when the process exits"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            import msvcrt
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class TrainingJobManager:
+    """Submit, inspect and cancel training jobs stored in one jobs directory"""
+
+    def __init__(self, jobs_dir, max_concurrent=1, max_active=8, n_jobs=2, nice=10, history=100):
+        """
+        Args:
+            jobs_dir (str): Directory holding job state, pid, log and slot lock files
+            max_concurrent (int): Jobs allowed to train at the same time, across all workers
+            max_active (int): Queued plus running jobs accepted before submit is refused
+            n_jobs (int): Parallel tree builders per job
+            nice (int): Niceness increment applied to job processes
+            history (int): Finished jobs kept on disk
+        """
+        self.jobs_dir = os.path.abspath(jobs_dir)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_active = max(1, int(max_active))
+        self.n_jobs = int(n_jobs)
+        self.nice = int(nice)
+        self.history = int(history)
+        self._lock = threading.Lock()
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.jobs_dir, f'{job_id}{suffix}')
+
+    def _read_pid(self, job_id):
+        try:
+            with open(self._path(job_id, '.pid')) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, job_id):
+        try:
+            with open(self._path(job_id, '.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, job_id):
+        """
+        Current state of a job
+
+        Returns:
+            dict: Job state, or None if the job does not exist
+        """
+        if not job_id or os.path.basename(job_id) != job_id:
+            return None
+
+        state = self._load(job_id)
+        if state is None or state['state'] in FINISHED_STATES:
+            return state
+
+        pid = self._read_pid(job_id)
+        if pid is not None and not _pid_alive(pid):
+            # The process is gone; its worker records the outcome unless the worker died too
+            state = self._load(job_id)
+            if state is None:
+                # Pruned meanwhile
+                return None
+            if state['state'] not in FINISHED_STATES:
+                state['state'] = 'failed'
+                state['error'] = 'Job process is no longer running'
+        return state
+
+    def list(self, limit=50):
+        """Most recently submitted jobs first"""
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        job_ids = [name[:-5] for name in os.listdir(self.jobs_dir) if name.endswith('.json')]
+        jobs = [job for job in (self.get(job_id) for job_id in job_ids) if job is not None]
+        jobs.sort(key=lambda job: job['submitted_at'], reverse=True)
+        return jobs[:limit]
+
+    def submit(self, params, trained_by='unknown', kind='train'):
+        """
+        Queue a training job and start its process
+
+        Args:
+            params (dict): Output of parse_training_params ('train') or parse_search_params ('search')
+            trained_by (str): Username recorded with the model
+            kind (str): 'train' (one Random Forest) or 'search' (hyperparameter search)
+
+        Returns:
+            dict: Initial job state
+
+        Raises:
+            JobQueueFull: If max_active jobs are already queued or running
+        """
+        with self._lock:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            self._prune()
+
+            active = [job for job in self.list(limit=None) if job['state'] not in FINISHED_STATES]
+            if len(active) >= self.max_active:
+                raise JobQueueFull(f'{len(active)} training jobs are already queued or running (limit {self.max_active})')
+
+            job_id = uuid.uuid4().hex
+            state = {
+                'job_id': job_id,
+                'kind': kind,
+                'state': 'queued',
+                'stage': None,
+                'progress': 0.0,
+                'params': params,
+                'trained_by': trained_by,
+                'resources': {'n_jobs': self.n_jobs, 'nice': self.nice, 'max_concurrent': self.max_concurrent},
+                'submitted_at': _now(),
+                'started_at': None,
+                'finished_at': None,
+                'queue_seconds': None,
+                'elapsed_seconds': None,
+                'stages': [],
+                'result': None,
+                'error': None
+            }
+            _write_json(self._path(job_id, '.json'), state)
+
+            project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            with open(self._path(job_id, '.log'), 'w') as log:
+                process = subprocess.Popen(
+                    [sys.executable, '-m', 'app.training.run_job', self.jobs_dir, job_id],
+                    cwd=project_dir,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    env={**os.environ, 'PYTHONUNBUFFERED': '1'}
+                )
+            with open(self._path(job_id, '.pid'), 'w') as f:
+                f.write(str(process.pid))
+
+        threading.Thread(target=self._monitor, args=(job_id, process), daemon=True).start()
+        print(f"🧵 Training job {job_id} submitted (pid {process.pid})")
+        return state
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+
+        Returns:
+            dict: Job state at the time of the request, or None if the job does not exist
+        """
+        state = self.get(job_id)
+        if state is None or state['state'] in FINISHED_STATES:
+            return state
+
+        # The marker tells the job (or its worker, where signals cannot be caught) it was cancelled
+        open(self._path(job_id, '.cancel'), 'w').close()
+        pid = self._read_pid(job_id)
+        if pid is not None and _pid_alive(pid):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        return state
+
+    def _monitor(self, job_id, process):
+        """Reap the job process, record its outcome if the process could not, and export its timings"""
+        returncode = process.wait()
+        state = self._load(job_id)
+        if state is None:
+            return
+
+        if state['state'] not in FINISHED_STATES:
+            if os.path.exists(self._path(job_id, '.cancel')):
+                state['state'] = 'cancelled'
+            else:
+                state['state'] = 'failed'
+                state['error'] = f'Job process exited with code {returncode}'
+            state['finished_at'] = _now()
+            _write_json(self._path(job_id, '.json'), state)
+
+        self._record_metrics(state)
+
+    @staticmethod
+    def _record_metrics(state):
+        """Export the duration of a finished job and of its stages (recorded by the submitting worker)"""
+        from app.monitoring.metrics import training_seconds, training_stage_seconds
+
+        if state.get('elapsed_seconds') is not None:
+            training_seconds.observe(state['elapsed_seconds'], state['kind'], 'job', state['state'])
+        for stage in state.get('stages', []):
+            if stage.get('seconds') is not None:
+                training_stage_seconds.observe(stage['seconds'], state['kind'], stage['name'])
+
+    def _prune(self):
+        """Delete the files of the oldest finished jobs beyond history (lock held)"""
+        finished = [job for job in self.list(limit=None) if job['state'] in FINISHED_STATES]
+        for job in finished[self.history:]:
+            for suffix in ['.json', '.pid', '.log', '.cancel']:
+                try:
+                    os.remove(self._path(job['job_id'], suffix))
+                except OSError:
+                    pass
+
+
+def run_job(jobs_dir, job_id):
+    """
+    Body of a job process: wait for a slot, train, and record state and stage timings
+
+    Returns:
+        int: Process exit code
+    """
+    from app.training.trainer import InvalidTrainingRequest, train_random_forest
+    from app.training.search import run_search
+
+    state_path = os.path.join(jobs_dir, f'{job_id}.json')
+    cancel_path = os.path.join(jobs_dir, f'{job_id}.cancel')
+    with open(state_path) as f:
+        state = json.load(f)
+    resources = state['resources']
+    started = time.monotonic()
+    stage_started = None
+    cancel_requested = []
+
+    def on_sigterm(signum, frame):
+        # Never leave half-written model files behind: finish saving instead
+        if state['stage'] == 'saving':
+            cancel_requested.append(True)
+            return
+        raise JobCancelled()
+
+    def close_stage():
+        if state['stages'] and stage_started is not None:
+            state['stages'][-1]['seconds'] = round(time.monotonic() - stage_started, 3)
+
+    def on_stage(name):
+        nonlocal stage_started
+        close_stage()
+        stage_started = time.monotonic()
+        state['stage'] = name
+        stages = JOB_STAGES[state['kind']]
+        state['progress'] = round(stages.index(name) / len(stages), 3)
+        state['stages'].append({'name': name, 'started_at': _now(), 'seconds': None})
+        _write_json(state_path, state)
+
+    last_progress_write = [0.0]
+
+    def on_progress(done, total):
+        state['fits'] = {'done': done, 'total': total}
+        # At most two state writes per second for fine-grained progress
+        if done == total or time.monotonic() - last_progress_write[0] >= 0.5:
+            last_progress_write[0] = time.monotonic()
+            _write_json(state_path, state)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    if resources['nice'] and hasattr(os, 'nice'):
+        os.nice(resources['nice'])
+
+    slot_file = None
+    try:
+        # Wait for one of the shared slots; the lock is held until this process exits
+        while slot_file is None:
+            if os.path.exists(cancel_path):
+                raise JobCancelled()
+            for slot in range(resources['max_concurrent']):
+                f = open(os.path.join(jobs_dir, f'slot-{slot}.lock'), 'a+')
+                if _try_lock(f):
+                    slot_file = f
+                    break
+                f.close()
+            else:
+                time.sleep(SLOT_POLL_INTERVAL)
+
+        state['state'] = 'running'
+        state['started_at'] = _now()
+        state['queue_seconds'] = round(time.monotonic() - started, 3)
+        _write_json(state_path, state)
+        print(f"🧵 Training job {job_id} started")
+
+        if state['kind'] == 'search':
+            state['result'] = run_search(
+                state['params'],
+                trained_by=state['trained_by'],
+                n_jobs=resources['n_jobs'],
+                on_stage=on_stage,
+                on_progress=on_progress
+            )
+        else:
+            state['result'] = train_random_forest(
+                state['params'],
+                trained_by=state['trained_by'],
+                n_jobs=resources['n_jobs'],
+                on_stage=on_stage
+            )
+        state['progress'] = 1.0
+        if cancel_requested or os.path.exists(cancel_path):
+            # Cancelled while saving: the save completed and the model is published
+            print(f"🛑 Training job {job_id} cancelled while saving, model kept")
+            state['state'] = 'cancelled'
+            state['error'] = 'Cancelled while saving; the model was already published and is kept'
+            exit_code = 1
+        else:
+            state['state'] = 'succeeded'
+            exit_code = 0
+    except JobCancelled:
+        print(f"🛑 Training job {job_id} cancelled")
+        state['state'] = 'cancelled'
+        exit_code = 1
+    except InvalidTrainingRequest as e:
+        state['state'] = 'failed'
+        state['error'] = str(e)
+        exit_code = 1
+    except Exception as e:
+        import traceback
+        print(f"\n❌ Training Error: {str(e)}")
+        traceback.print_exc()
+        state['state'] = 'failed'
+        state['error'] = f'Training failed: {str(e)}'
+        exit_code = 1
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    close_stage()
+    state['finished_at'] = _now()
+    state['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    _write_json(state_path, state)
+    return exit_code
+
+
+# Shared by every request handled by this worker process
+job_manager = TrainingJobManager(
+    jobs_dir=Config_env.TRAIN_JOBS_DIR or os.path.join(TRAINED_MODEL_DIR, 'jobs'),
+    max_concurrent=Config_env.TRAIN_JOBS_MAX_CONCURRENT,
+    max_active=Config_env.TRAIN_JOBS_MAX_ACTIVE,
+    n_jobs=Config_env.TRAIN_JOB_N_JOBS,
+    nice=Config_env.TRAIN_JOB_NICE,
+    history=Config_env.TRAIN_JOBS_HISTORY
+)
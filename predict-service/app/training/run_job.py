@@ -0,0 +1,12 @@
+"""
+Training job process entry point, started by TrainingJobManager.submit
+
+Usage:
+    python -m app.training.run_job <jobs_dir> <job_id>
+"""
+import sys
+
+from app.training.jobs import run_job
+
+if __name__ == '__main__':
+    sys.exit(run_job(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,440 @@
+"""
+Hyperparameter Search
+Grid, random and successive-halving search over the model classes of src/model_dev.py,
+scored by k-fold cross-validation in a process pool sized to the container's CPU quota
+
+Only the winner is refitted and saved, together with a leaderboard of every trial.
+"""
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.config.env import Config_env
+from app.config.runtime import available_cpus
+from app.training.trainer import (
+    InvalidTrainingRequest, TRAINED_MODEL_DIR, evaluate_regression, load_training_data,
+    parse_training_params, save_trained_model
+)
+
+SEARCH_STRATEGIES = ['grid', 'random', 'halving']
+
+# Stages reported by run_search, in order
+SEARCH_STAGES = ['loading_data', 'splitting', 'searching', 'refitting', 'evaluating', 'saving']
+
+# Default search space of every model class
+SEARCH_SPACES = {
+    'RandomForest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': [1.0, 0.5, 'sqrt']
+    },
+    'LinearRegression': {
+        'fit_intercept': [True, False]
+    }
+}
+
+# Smallest warm-start budget (e.g. trees) of a successive-halving rung
+MIN_HALVING_BUDGET = 10
+
+
+def _model_classes():
+    from src.model_dev import LinearRegressionModel, RandomForestModel
+    return {
+        'LinearRegression': LinearRegressionModel,
+        'RandomForest': RandomForestModel
+    }
+
+
+def parse_search_params(data):
+    """
+    Validate a search request body
+
+    Args:
+        data (dict): Request JSON: the /train/model fields plus strategy, models, param_grid,
+                     n_trials, cv_folds and halving_factor
+
+    Returns:
+        dict: Normalized search parameters
+
+    Raises:
+        InvalidTrainingRequest: If a parameter is invalid
+        FileNotFoundError: If the dataset does not exist
+    """
+    from steps.config import ExperimentConfig
+
+    params = parse_training_params(data)
+    del params['n_estimators'], params['max_depth']
+    experiment = ExperimentConfig()
+
+    try:
+        strategy = str(data.get('strategy', 'halving')).lower()
+        models = data.get('models') or experiment.models_to_compare
+        cv_folds = int(data.get('cv_folds', experiment.cross_validation_folds))
+        n_trials = int(data.get('n_trials', 20))
+        halving_factor = int(data.get('halving_factor', 3))
+    except (TypeError, ValueError) as e:
+        raise InvalidTrainingRequest(f'Invalid parameter value: {e}')
+    param_grid = data.get('param_grid') or {}
+
+    classes = _model_classes()
+    if strategy not in SEARCH_STRATEGIES:
+        raise InvalidTrainingRequest(f'Unsupported strategy: {strategy}. Supported strategies: {SEARCH_STRATEGIES}')
+    unknown = [name for name in list(models) + list(param_grid) if name not in classes]
+    if unknown:
+        raise InvalidTrainingRequest(f'Unknown models: {unknown}. Available models: {list(classes)}')
+    if not (2 <= cv_folds <= 20):
+        raise InvalidTrainingRequest('cv_folds must be between 2 and 20')
+    if not (1 <= n_trials <= Config_env.SEARCH_MAX_TRIALS):
+        raise InvalidTrainingRequest(f'n_trials must be between 1 and {Config_env.SEARCH_MAX_TRIALS}')
+    if halving_factor < 2:
+        raise InvalidTrainingRequest('halving_factor must be at least 2')
+
+    spaces = {}
+    for name in models:
+        space = param_grid.get(name, SEARCH_SPACES[name])
+        if not isinstance(space, dict) or not all(isinstance(values, list) and values for values in space.values()):
+            raise InvalidTrainingRequest(f'param_grid for {name} must map parameter names to non-empty lists')
+        spaces[name] = space
+
+    params.update({
+        'strategy': strategy,
+        'spaces': spaces,
+        'cv_folds': cv_folds,
+        'n_trials': n_trials,
+        'halving_factor': halving_factor
+    })
+
+    # Grid search is exhaustive: refuse grids that exceed the trial limit up front
+    if strategy == 'grid':
+        n_candidates = len(build_candidates(params))
+        if n_candidates > Config_env.SEARCH_MAX_TRIALS:
+            raise InvalidTrainingRequest(f'Grid has {n_candidates} candidates, more than SEARCH_MAX_TRIALS ({Config_env.SEARCH_MAX_TRIALS})')
+    return params
+
+
+def build_candidates(params):
+    """
+    Enumerate the candidate (model, hyperparameters) pairs of a search
+
+    Grid search keeps every combination; random and halving search draw n_trials of
+    them without replacement (all of them if the space is smaller).
+
+    Returns:
+        list: [{'model': name, 'params': {...}}, ...]
+    """
+    candidates = []
+    for name, space in params['spaces'].items():
+        keys = list(space)
+        for values in itertools.product(*(space[key] for key in keys)):
+            candidates.append({'model': name, 'params': dict(zip(keys, values))})
+
+    if params['strategy'] != 'grid' and len(candidates) > params['n_trials']:
+        candidates = random.Random(params['random_state']).sample(candidates, params['n_trials'])
+    return candidates
+
+
+# Fold data of a pool worker, set once by _init_worker
+_X = _y = _FOLDS = None
+
+
+def _init_worker(X, y, folds):
+    global _X, _y, _FOLDS
+    _X, _y, _FOLDS = X, y, folds
+    # Forked workers inherit the job's cancellation handler; Pool.terminate() must just stop them
+    if multiprocessing.current_process().name != 'MainProcess':
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _fit_fold(task):
+    """
+    Fit and score one candidate on one CV fold (runs in a pool worker)
+
+    Args:
+        task (dict): trial, fold, model, params, budget (warm-start budget or None),
+                     warm_model (model of the previous rung to grow) and keep_model
+
+    Returns:
+        dict: trial, fold, r2, rmse, seconds and the fitted model if keep_model
+    """
+    from sklearn.preprocessing import StandardScaler
+    from src.evaluation import R2Score, RMSE
+
+    start = time.perf_counter()
+    train_index, val_index = _FOLDS[task['fold']]
+
+    # The scaler is fitted inside the fold, like the final scaler on the training split
+    scaler = StandardScaler().fit(_X[train_index])
+    X_train, X_val = scaler.transform(_X[train_index]), scaler.transform(_X[val_index])
+    y_train, y_val = _y[train_index], _y[val_index]
+
+    model_class = _model_classes()[task['model']]()
+    if model_class.warm_start_param is not None and task['warm_model'] is not None:
+        model = model_class.grow(task['warm_model'], X_train, y_train, task['budget'])
+    elif model_class.warm_start_param is not None and task['budget'] is not None:
+        model = model_class.train(X_train, y_train, **{**task['params'], model_class.warm_start_param: task['budget'], 'warm_start': True})
+    else:
+        model = model_class.train(X_train, y_train, **task['params'])
+
+    y_pred = model.predict(X_val)
+    return {
+        'trial': task['trial'],
+        'fold': task['fold'],
+        'r2': float(R2Score().calculate_score(y_val, y_pred)),
+        'rmse': float(RMSE().calculate_score(y_val, y_pred)),
+        'seconds': time.perf_counter() - start,
+        'model': model if task['keep_model'] else None
+    }
+
+
+class CrossValidationSearch:
+    """Run the trials of one search, fold by fold, on a process pool"""
+
+    def __init__(self, X, y, params, n_workers, on_progress=None):
+        """
+        Args:
+            X (numpy.ndarray): Unscaled training features
+            y (numpy.ndarray): Training target
+            params (dict): Output of parse_search_params
+            n_workers (int): Pool size (1 runs the folds in this process)
+            on_progress (callable): Called with (fold fits done, fold fits planned)
+        """
+        from sklearn.model_selection import KFold
+
+        self.X = X
+        self.y = y
+        self.params = params
+        self.n_workers = n_workers
+        self.on_progress = on_progress
+        self.folds = list(KFold(n_splits=params['cv_folds'], shuffle=True, random_state=params['random_state']).split(X))
+        self.classes = _model_classes()
+        self.fits_done = 0
+        self.fits_planned = 0
+
+    def run(self):
+        """
+        Returns:
+            list: Leaderboard, best first
+        """
+        candidates = build_candidates(self.params)
+        trials = [
+            {
+                'trial': index,
+                'model': candidate['model'],
+                'params': candidate['params'],
+                'budget': None,
+                'rung': 0,
+                'fold_r2': [],
+                'fold_rmse': [],
+                'wall_seconds': 0.0
+            }
+            for index, candidate in enumerate(candidates)
+        ]
+
+        if self.n_workers > 1:
+            with multiprocessing.get_context().Pool(self.n_workers, _init_worker, (self.X, self.y, self.folds)) as pool:
+                self._map = lambda tasks: pool.imap_unordered(_fit_fold, tasks)
+                self._search(trials)
+        else:
+            _init_worker(self.X, self.y, self.folds)
+            self._map = lambda tasks: map(_fit_fold, tasks)
+            self._search(trials)
+
+        return self._leaderboard(trials)
+
+    def _search(self, trials):
+        if self.params['strategy'] != 'halving':
+            self.fits_planned = len(trials) * len(self.folds)
+            self._evaluate(trials, budgets={}, warm_models={})
+            return
+
+        # Successive halving: warm-startable candidates (trees) start with a small budget that
+        # grows by halving_factor per rung while only the best 1/halving_factor survive;
+        # other candidates are fitted once at full size and keep their score
+        factor = self.params['halving_factor']
+        n_rungs = max(1, math.ceil(math.log(len(trials), factor)) + 1) if len(trials) > 1 else 1
+        warm_models = {}
+        alive = trials
+        self.fits_planned = sum(math.ceil(len(trials) / factor ** rung) for rung in range(n_rungs)) * len(self.folds)
+
+        for rung in range(n_rungs):
+            budgets = {}
+            for trial in alive:
+                param = self.classes[trial['model']].warm_start_param
+                if param is not None:
+                    full = trial['params'].get(param, 100)
+                    budgets[trial['trial']] = max(min(MIN_HALVING_BUDGET, full), int(full / factor ** (n_rungs - 1 - rung)))
+
+            # A budget that did not grow (small budgets are clamped to MIN_HALVING_BUDGET)
+            # would refit the same model: such trials keep their previous scores
+            pending = [
+                trial for trial in alive
+                if rung == 0 or (trial['trial'] in budgets and budgets[trial['trial']] > trial['budget'])
+            ]
+            self.fits_planned -= (len(alive) - len(pending)) * len(self.folds)
+            keep = rung < n_rungs - 1
+            self._evaluate(pending, budgets, warm_models, keep_models=keep)
+            for trial in alive:
+                trial['rung'] = rung
+
+            if not keep:
+                break
+            alive = sorted(alive, key=lambda trial: -np.mean(trial['fold_r2']))[:max(1, math.ceil(len(alive) / factor))]
+            survivors = {trial['trial'] for trial in alive}
+            warm_models = {key: model for key, model in warm_models.items() if key[0] in survivors}
+
+    def _evaluate(self, trials, budgets, warm_models, keep_models=False):
+        """Score trials on every fold; scores of earlier rungs are replaced"""
+        tasks = []
+        for trial in trials:
+            trial['fold_r2'] = [None] * len(self.folds)
+            trial['fold_rmse'] = [None] * len(self.folds)
+            trial['budget'] = budgets.get(trial['trial'])
+            for fold in range(len(self.folds)):
+                tasks.append({
+                    'trial': trial['trial'],
+                    'fold': fold,
+                    'model': trial['model'],
+                    'params': trial['params'],
+                    'budget': trial['budget'],
+                    'warm_model': warm_models.pop((trial['trial'], fold), None),
+                    'keep_model': keep_models and trial['budget'] is not None
+                })
+
+        by_id = {trial['trial']: trial for trial in trials}
+        for result in self._map(tasks):
+            trial = by_id[result['trial']]
+            trial['fold_r2'][result['fold']] = result['r2']
+            trial['fold_rmse'][result['fold']] = result['rmse']
+            trial['wall_seconds'] += result['seconds']
+            if result['model'] is not None:
+                warm_models[(result['trial'], result['fold'])] = result['model']
+            self.fits_done += 1
+            if self.on_progress is not None:
+                self.on_progress(self.fits_done, self.fits_planned)
+
+    def _leaderboard(self, trials):
+        """Rank by furthest rung reached, then by mean CV R²"""
+        leaderboard = []
+        for trial in trials:
+            params = dict(trial['params'])
+            param = self.classes[trial['model']].warm_start_param
+            if trial['budget'] is not None:
+                params[param] = trial['budget']
+            leaderboard.append({
+                'trial': trial['trial'],
+                'model': trial['model'],
+                'params': params,
+                'rung': trial['rung'],
+                'cv_r2_mean': round(float(np.mean(trial['fold_r2'])), 4),
+                'cv_r2_std': round(float(np.std(trial['fold_r2'])), 4),
+                'cv_rmse_mean': round(float(np.mean(trial['fold_rmse'])), 4),
+                'fold_r2': [round(score, 4) for score in trial['fold_r2']],
+                'wall_seconds': round(trial['wall_seconds'], 3)
+            })
+        leaderboard.sort(key=lambda entry: (-entry['rung'], -entry['cv_r2_mean']))
+        for rank, entry in enumerate(leaderboard, start=1):
+            entry['rank'] = rank
+        return leaderboard
+
+
+def run_search(params, trained_by='unknown', n_jobs=-1, on_stage=None, on_progress=None):
+    """
+    Search hyperparameters by cross-validation, then refit and save only the winner
+
+    Args:
+        params (dict): Output of parse_search_params
+        trained_by (str): Username recorded in training_info
+        n_jobs (int): Parallel tree builders for the final refit
+        on_stage (callable): Called with each SEARCH_STAGES name as the stage starts
+        on_progress (callable): Called with (fold fits done, fold fits planned)
+
+    Returns:
+        dict: Same fields as train_random_forest, plus search (winner, leaderboard, timings)
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    def stage(name):
+        if on_stage is not None:
+            on_stage(name)
+
+    stage('loading_data')
+    X, y = load_training_data(params['dataset_path'])
+
+    stage('splitting')
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=params['test_size'], random_state=params['random_state']
+    )
+    print(f"✂️ Train set: {len(X_train)} samples, Test set: {len(X_test)} samples")
+
+    stage('searching')
+    n_workers = min(Config_env.SEARCH_MAX_WORKERS or available_cpus(), available_cpus())
+    print(f"🔎 {params['strategy']} search, {params['cv_folds']}-fold CV on {n_workers} process(es)")
+    search_started = time.perf_counter()
+    search = CrossValidationSearch(
+        np.ascontiguousarray(X_train, dtype=np.float64),
+        np.ascontiguousarray(y_train, dtype=np.float64),
+        params, n_workers, on_progress
+    )
+    leaderboard = search.run()
+    search_seconds = time.perf_counter() - search_started
+    winner = leaderboard[0]
+    print(f"🏆 Best: {winner['model']} {winner['params']} (CV R² {winner['cv_r2_mean']})")
+
+    stage('refitting')
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    winner_params = dict(winner['params'])
+    if winner['model'] == 'RandomForest':
+        winner_params['n_jobs'] = n_jobs
+    model = _model_classes()[winner['model']]().train(X_train_scaled, y_train, **winner_params)
+
+    stage('evaluating')
+    metrics = evaluate_regression(model, X_test_scaled, y_test)
+
+    stage('saving')
+    model_path, scaler_path, pipeline_path, model_version = save_trained_model(model, scaler, params['model_name'])
+    leaderboard_path = os.path.join(TRAINED_MODEL_DIR, f"{params['model_name']}_leaderboard.json")
+    search_info = {
+        'strategy': params['strategy'],
+        'cv_folds': params['cv_folds'],
+        'n_trials': len(leaderboard),
+        'fold_fits': search.fits_done,
+        'n_workers': n_workers,
+        'search_seconds': round(search_seconds, 3),
+        'winner': winner,
+        'leaderboard_path': leaderboard_path
+    }
+    with open(leaderboard_path, 'w') as f:
+        json.dump({**search_info, 'leaderboard': leaderboard}, f, indent=2)
+    print(f"💾 Leaderboard saved: {leaderboard_path}")
+
+    return {
+        'model_path': model_path,
+        'scaler_path': scaler_path,
+        'pipeline_path': pipeline_path,
+        'model_version': model_version,
+        'model_name': params['model_name'],
+        'metrics': metrics,
+        'training_info': {
+            'train_samples': len(X_train),
+            'test_samples': len(X_test),
+            'n_features': X.shape[1],
+            'model': winner['model'],
+            'hyperparameters': winner['params'],
+            'trained_by': trained_by,
+            'trained_at': datetime.now().isoformat()
+        },
+        'search': {**search_info, 'leaderboard': leaderboard[:10]}
+    }
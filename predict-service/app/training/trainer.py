@@ -0,0 +1,257 @@
+"""
+Random Forest Trainer
+Train, evaluate and save a Random Forest on a viability dataset; shared by the
+synchronous /train/model route and background training jobs
+"""
+import os
+from datetime import datetime
+
+from app.config.env import Config_env
+from app.models.input_schema import FEATURE_COLUMNS
+
+TARGET_COLUMN = 'Cell viability (%)'
+
+# Models and scalers written by training (default: app/ml_model)
+TRAINED_MODEL_DIR = Config_env.TRAINED_MODEL_DIR or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml_model')
+
+# Stages reported by train_random_forest, in order
+TRAINING_STAGES = ['loading_data', 'splitting', 'scaling', 'training', 'evaluating', 'saving']
+
+
+class InvalidTrainingRequest(Exception):
+    """Training parameters or dataset are invalid (reported as 400, not 500)"""
+
+
+def parse_training_params(data):
+    """
+    Validate a training request body
+
+    Args:
+        data (dict): Request JSON with dataset_path and optional model_name, n_estimators,
+                     max_depth, test_size, random_state
+
+    Returns:
+        dict: Normalized training parameters
+
+    Raises:
+        InvalidTrainingRequest: If a parameter is missing or out of range
+        FileNotFoundError: If the dataset does not exist
+    """
+    if not data or 'dataset_path' not in data:
+        raise InvalidTrainingRequest('Missing required field: dataset_path')
+
+    dataset_path = data['dataset_path']
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f'Dataset file not found: {dataset_path}')
+
+    try:
+        n_estimators = int(data.get('n_estimators', 100))
+
+        # Handle max_depth - can be None or integer
+        max_depth_value = data.get('max_depth', None)
+        if max_depth_value is not None and max_depth_value != '':
+            max_depth = int(max_depth_value)
+        else:
+            max_depth = None
+
+        test_size = float(data.get('test_size', 0.2))
+        random_state = int(data.get('random_state', 42))
+    except (TypeError, ValueError) as e:
+        raise InvalidTrainingRequest(f'Invalid parameter value: {e}')
+
+    model_name = data.get('model_name') or f'RF_Model_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+
+    if not (10 <= n_estimators <= 1000):
+        raise InvalidTrainingRequest('n_estimators must be between 10 and 1000')
+    if max_depth is not None and not (1 <= max_depth <= 50):
+        raise InvalidTrainingRequest('max_depth must be between 1 and 50 or None')
+    if not (0.1 <= test_size <= 0.5):
+        raise InvalidTrainingRequest('test_size must be between 0.1 and 0.5')
+    if os.path.basename(model_name) != model_name:
+        raise InvalidTrainingRequest('model_name must not contain path separators')
+
+    return {
+        'dataset_path': dataset_path,
+        'model_name': model_name,
+        'n_estimators': n_estimators,
+        'max_depth': max_depth,
+        'test_size': test_size,
+        'random_state': random_state
+    }
+
+
+def load_training_data(dataset_path):
+    """
+    Read a dataset and select the feature and target columns
+
+    With DATASET_CACHE enabled the columns come memory-mapped from the dataset cache,
+    so the CSV is parsed only the first time its content is seen.
+
+    Returns:
+        tuple: (X DataFrame in FEATURE_COLUMNS order, y Series)
+
+    Raises:
+        InvalidTrainingRequest: If the dataset lacks the required columns
+    """
+    if Config_env.DATASET_CACHE:
+        from app.training.dataset_cache import dataset_cache
+
+        print(f"📂 Reading dataset from: {dataset_path}")
+        try:
+            df = dataset_cache.load(dataset_path).frame()
+        except (KeyError, ValueError) as e:
+            raise InvalidTrainingRequest(e.args[0])
+        print(f"✅ Dataset loaded: {len(df)} rows, {len(df.columns)} columns")
+    else:
+        import pandas as pd
+
+        print(f"📂 Reading dataset from: {dataset_path}")
+        df = pd.read_csv(dataset_path)
+        print(f"✅ Dataset loaded: {len(df)} rows, {len(df.columns)} columns")
+
+        # Feature columns are listed explicitly (exclude both target and intermediate viability column)
+        missing_cols = [col for col in FEATURE_COLUMNS + [TARGET_COLUMN] if col not in df.columns]
+        if missing_cols:
+            raise InvalidTrainingRequest(f'Missing required columns: {missing_cols}')
+
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET_COLUMN]
+
+    print(f"🔢 Features: {X.shape[1]} columns")
+    print(f"🎯 Target: {y.name if hasattr(y, 'name') else 'Last column'}")
+    return X, y
+
+
+def evaluate_regression(model, X_test, y_test):
+    """
+    Score a fitted model on held-out data
+
+    Returns:
+        dict: r2_score, rmse and mae rounded to 4 decimals
+    """
+    from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+
+    y_pred = model.predict(X_test)
+    r2 = r2_score(y_test, y_pred)
+
+    # Calculate RMSE (compatible with all sklearn versions)
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = mse ** 0.5  # Square root of MSE
+
+    mae = mean_absolute_error(y_test, y_pred)
+
+    print(f"\n📈 Model Performance:")
+    print(f"   R² Score: {r2:.4f}")
+    print(f"   RMSE: {rmse:.4f}")
+    print(f"   MAE: {mae:.4f}")
+
+    return {
+        'r2_score': round(r2, 4),
+        'rmse': round(rmse, 4),
+        'mae': round(mae, 4)
+    }
+
+
+def save_trained_model(model, scaler, model_name):
+    """
+    Publish a model with its sidecar scaler as a new version, named model_name and latest
+
+    The version also bundles both into a pipeline with the output rule /predict/model
+    applies to the bare .pkl (see app/models/pipeline.py), so both answer alike. Names are switched atomically to
+    the new version (see app/training/artifacts.py), so concurrent trainings and
+    predictions never see a torn file or a mismatched model and scaler.
+
+    Returns:
+        tuple: (model_path, scaler_path, pipeline_path, version); the paths are the names
+               <model_name>.pkl, <model_name>_scaler.pkl and <model_name>.pipeline
+    """
+    from app.models.pipeline import OutputRule
+    from app.training.artifacts import artifact_store
+
+    output_rule = OutputRule.for_model_type('sklearn')
+    published = artifact_store(TRAINED_MODEL_DIR).publish(model, scaler, model_name, output_rule)
+    print(f"💾 Model saved: {published['model_path']} (version {published['version']})")
+    print(f"💾 Scaler saved: {published['scaler_path']}")
+    print(f"💾 Pipeline saved: {published['pipeline_path']}")
+
+    return published['model_path'], published['scaler_path'], published['pipeline_path'], published['version']
+
+
+def train_random_forest(params, trained_by='unknown', n_jobs=-1, on_stage=None):
+    """
+    Train a Random Forest regressor and save it with its scaler
+
+    Args:
+        params (dict): Output of parse_training_params
+        trained_by (str): Username recorded in training_info
+        n_jobs (int): Parallel tree builders (-1 for all CPUs)
+        on_stage (callable): Called with each TRAINING_STAGES name as the stage starts
+
+    Returns:
+        dict: model_path, scaler_path, pipeline_path, model_version, model_name, metrics and training_info
+
+    Raises:
+        InvalidTrainingRequest: If the dataset lacks the required columns
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    def stage(name):
+        if on_stage is not None:
+            on_stage(name)
+
+    # Read dataset
+    stage('loading_data')
+    X, y = load_training_data(params['dataset_path'])
+
+    # Split train/test
+    stage('splitting')
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=params['test_size'], random_state=params['random_state']
+    )
+    print(f"✂️ Train set: {len(X_train)} samples, Test set: {len(X_test)} samples")
+
+    # Scale features
+    stage('scaling')
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Train model
+    stage('training')
+    print("🚀 Training Random Forest model...")
+    model = RandomForestRegressor(
+        n_estimators=params['n_estimators'],
+        max_depth=params['max_depth'],
+        random_state=params['random_state'],
+        n_jobs=n_jobs
+    )
+    model.fit(X_train_scaled, y_train)
+    print("✅ Training completed!")
+
+    # Evaluate model
+    stage('evaluating')
+    metrics = evaluate_regression(model, X_test_scaled, y_test)
+
+    # Save model
+    stage('saving')
+    model_path, scaler_path, pipeline_path, model_version = save_trained_model(model, scaler, params['model_name'])
+
+    return {
+        'model_path': model_path,
+        'scaler_path': scaler_path,
+        'pipeline_path': pipeline_path,
+        'model_version': model_version,
+        'model_name': params['model_name'],
+        'metrics': metrics,
+        'training_info': {
+            'train_samples': len(X_train),
+            'test_samples': len(X_test),
+            'n_features': X.shape[1],
+            'n_estimators': params['n_estimators'],
+            'max_depth': params['max_depth'],
+            'trained_by': trained_by,
+            'trained_at': datetime.now().isoformat()
+        }
+    }
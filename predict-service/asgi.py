@@ -0,0 +1,5 @@
+from app import create_app
+from app.serving.asgi import build_asgi_app
+
+# ASGI entry point: uvicorn asgi:app, or gunicorn -k uvicorn.workers.UvicornWorker --preload asgi:app
+app = build_asgi_app(create_app())
@@ -0,0 +1,593 @@
+"""
+Benchmark Suite
+Measure the prediction and training hot paths offline on CPU and write the results to
+JSON, so two runs (before and after a change) can be compared
+
+Suites:
+    models  Synthetic models of every type ModelLoader supports: load time, memory,
+            single-row latency and batch throughput through the same scaler and
+            ModelPredictor path as the routes
+    http    End-to-end Flask test-client requests (/predict/model, /predict/batch,
+            /predict/sweep, /predict/health)
+    train   /train/model wall time on data/Dataset.new3.csv scaled up synthetically,
+            with a cold (CSV parse) and a warm (dataset cache hit) run
+    xgboost A trained XGBoost model (--xgboost-model, default the web app's
+            xgb_augmented_model.json) scored through DMatrix + Booster.predict,
+            inplace_predict with one and with all threads, and the CompiledForest
+
+Everything the run writes (models, trained models, dataset cache, metrics) goes to a
+temporary directory, so the tracked ml_model directories are left untouched.
+
+Usage (from predict-service/):
+    python -m benchmarks.bench run -o before.json
+    python -m benchmarks.bench run --quick --suites models,http -o after.json
+    python -m benchmarks.bench compare before.json after.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(PROJECT_DIR, 'data', 'Dataset.new3.csv')
+XGBOOST_MODEL_PATH = os.path.join(os.path.dirname(PROJECT_DIR), 'WebApp', 'public', 'models', 'xgb_augmented_model.json')
+
+SUITES = ['models', 'http', 'train', 'xgboost']
+
+# Suite sizes: full runs take a few minutes, quick runs well under one
+PROFILES = {
+    'full': {
+        'forests': [(10, None), (100, None), (300, None), (100, 8), (300, 8)],
+        'xgboost': (200, 6),
+        'mlp_hidden': (64, 32),
+        'load_repeats': 5,
+        'single_row_iterations': 1000,
+        'batch_sizes': [100, 1000, 10000],
+        'batch_repeats': 5,
+        'http_requests': 300,
+        'train_scales': [1, 10, 50],
+        'train_estimators': 100
+    },
+    'quick': {
+        'forests': [(10, None), (100, 8)],
+        'xgboost': (50, 4),
+        'mlp_hidden': (32, 16),
+        'load_repeats': 2,
+        'single_row_iterations': 200,
+        'batch_sizes': [1000],
+        'batch_repeats': 2,
+        'http_requests': 50,
+        'train_scales': [1, 5],
+        'train_estimators': 20
+    }
+}
+
+# Metrics where a larger value is better (everything else: lower is better)
+HIGHER_IS_BETTER_SUFFIXES = ('rows_per_second', 'requests_per_second')
+
+
+def summarize(samples, scale=1e3):
+    """
+    Distribution of timing samples
+
+    Args:
+        samples (list): Durations in seconds
+        scale (float): Output unit per second (1e3: milliseconds, 1e6: microseconds)
+
+    Returns:
+        dict: n, mean, min, p50, p95 and p99 in the output unit
+    """
+    values = np.asarray(samples, dtype=np.float64) * scale
+    return {
+        'n': int(len(values)),
+        'mean': round(float(values.mean()), 3),
+        'min': round(float(values.min()), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3)
+    }
+
+
+def rss_kb():
+    """Resident memory of this process in kB"""
+    from app.models.model_store import process_memory
+    memory = process_memory()
+    return memory.get('rss_kb', memory.get('max_rss_kb'))
+
+
+def path_bytes(path):
+    """Size of a model file, or of all files of a store/pipeline directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def environment_info(args):
+    """Machine, library versions and source revision of a run"""
+    import importlib.metadata
+
+    versions = {}
+    for package in ['numpy', 'scikit-learn', 'xgboost', 'keras', 'torch', 'pandas', 'flask']:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--', '.'], cwd=PROJECT_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+    except OSError:
+        commit, dirty = None, None
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    return {
+        'started_at': datetime.now().isoformat(),
+        'profile': 'quick' if args.quick else 'full',
+        'suites': args.suites,
+        'seed': args.seed,
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': cpus,
+        'thread_env': {name: os.environ.get(name) for name in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']},
+        'versions': versions
+    }
+
+
+def build_models(factory, profile):
+    """
+    Write every synthetic model whose library is installed
+
+    Returns:
+        list: (name, model_path, model_type) tuples, or (name, None, skip reason) for missing libraries
+    """
+    from benchmarks.synthetic import is_installed
+
+    models = []
+    for n_estimators, max_depth in profile['forests']:
+        path, model_type = factory.random_forest(n_estimators, max_depth)
+        models.append((f"sklearn_rf_{n_estimators}_{max_depth or 'full'}", path, model_type))
+    models.append(('sklearn_linear',) + factory.linear_regression())
+
+    optional = [
+        ('xgboost', 'xgboost', lambda: factory.xgboost(*profile['xgboost'])),
+        ('keras_mlp', 'keras', lambda: factory.keras_mlp(profile['mlp_hidden'])),
+        ('pytorch_mlp', 'torch', lambda: factory.pytorch_mlp(profile['mlp_hidden']))
+    ]
+    for name, package, build in optional:
+        if not is_installed(package):
+            models.append((name, None, f'{package} is not installed'))
+            continue
+        try:
+            models.append((name,) + build())
+        except Exception as e:
+            models.append((name, None, f'Could not build model: {e}'))
+
+    # Store and pipeline variants of the first forest (and of the other convertible models)
+    first_forest = models[0][1]
+    for name, path, model_type in list(models):
+        if path is not None and (path == first_forest or model_type in ['xgboost', 'keras']):
+            try:
+                models.append((f'{name}_npstore',) + factory.npstore(path))
+            except Exception as e:
+                models.append((f'{name}_npstore', None, f'No store format: {e}'))
+    models.append(('sklearn_rf_pipeline',) + factory.pipeline(first_forest))
+    return models
+
+
+def bench_model(name, model_path, model_type, profile, seed):
+    """Load time, memory, single-row latency and batch throughput of one model"""
+    from app.models.dynamic_loader import ModelLoader, ModelPredictor
+    from app.scalers.scaler_registry import scaler_registry
+    from benchmarks.synthetic import synthetic_inputs
+
+    result = {'name': name, 'model_type': model_type, 'path_bytes': path_bytes(model_path)}
+
+    # First load imports the library; memory and timings are taken on later loads
+    ModelLoader.load_model(model_path, model_type)
+    gc.collect()
+    before = rss_kb()
+    model = ModelLoader.load_model(model_path, model_type)
+    gc.collect()
+    result['rss_delta_kb'] = rss_kb() - before
+    result['model_class'] = type(model).__name__
+
+    load_times = []
+    for _ in range(profile['load_repeats']):
+        started = time.perf_counter()
+        ModelLoader.load_model(model_path, model_type)
+        load_times.append(time.perf_counter() - started)
+    result['load_ms'] = summarize(load_times)
+
+    scaler = scaler_registry.for_model(model_path, model)
+    rows = synthetic_inputs(max(profile['batch_sizes'] + [profile['single_row_iterations']]), seed + 2)
+
+    # Single row, as /predict/model scores it
+    iterations = profile['single_row_iterations']
+    for index in range(min(20, iterations)):
+        ModelPredictor.predict(model, scaler.transform(rows[index:index + 1]), model_type)
+    latencies = []
+    for index in range(iterations):
+        started = time.perf_counter()
+        ModelPredictor.predict(model, scaler.transform(rows[index:index + 1]), model_type)
+        latencies.append(time.perf_counter() - started)
+    result['single_row_us'] = summarize(latencies, scale=1e6)
+
+    # Batches, as /predict/batch scores them
+    result['batch'] = []
+    for batch_size in profile['batch_sizes']:
+        matrix = rows[:batch_size]
+        timings = []
+        for _ in range(profile['batch_repeats']):
+            started = time.perf_counter()
+            ModelPredictor.predict_rows(model, scaler, matrix, model_type)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        result['batch'].append({
+            'rows': batch_size,
+            'best_ms': round(best * 1e3, 3),
+            'median_ms': round(float(np.median(timings)) * 1e3, 3),
+            'rows_per_second': round(batch_size / best, 1)
+        })
+    return result
+
+
+def run_models_suite(models, profile, seed):
+    results = []
+    for name, model_path, model_type in models:
+        if model_path is None:
+            results.append({'name': name, 'skipped': model_type})
+            print(f"⏭️ {name}: {model_type}")
+            continue
+        try:
+            result = bench_model(name, model_path, model_type, profile, seed)
+            print(f"⏱️ {name}: load {result['load_ms']['p50']} ms, single row p50 {result['single_row_us']['p50']} us, "
+                  f"{result['batch'][-1]['rows_per_second']:.0f} rows/s")
+        except Exception as e:
+            result = {'name': name, 'model_type': model_type, 'error': str(e)}
+            print(f"❌ {name}: {e}")
+        results.append(result)
+    return results
+
+
+def time_requests(client, method, path, headers, body, n_requests):
+    """Latency of n_requests identical requests after one warm-up request"""
+    send = getattr(client, method)
+    send(path, headers=headers, json=body)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(n_requests):
+        request_started = time.perf_counter()
+        response = send(path, headers=headers, json=body)
+        # Streamed responses (sweep) are only produced while the body is read
+        response.get_data()
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code != 200:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return {
+        'latency_ms': summarize(latencies),
+        'requests_per_second': round(n_requests / elapsed, 1),
+        'errors': errors
+    }
+
+
+def run_http_suite(app, models, profile, seed):
+    import jwt
+
+    from app.config.env import Config_env
+    from benchmarks.synthetic import synthetic_inputs
+
+    client = app.test_client()
+    token = jwt.encode({'username': 'benchmark', 'exp': int(time.time()) + 3600}, Config_env.SECRET_KEY, algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+    n_requests = profile['http_requests']
+    inputs = {'pc_mxene_loading': 0.1, 'laminin_peptide_loading': 60, 'stimulation_frequency': 1, 'applied_voltage': 1}
+
+    # One model per type, plus the pipeline bundle
+    picked = {}
+    for name, model_path, model_type in models:
+        if model_path is not None and model_type not in picked:
+            picked[model_type] = (name, model_path)
+
+    results = [{'name': 'health', **time_requests(client, 'get', '/predict/health', None, None, n_requests)}]
+    for model_type, (name, model_path) in picked.items():
+        body = {**inputs, 'model_path': model_path, 'model_type': model_type}
+        results.append({'name': f'predict_model/{name}', **time_requests(client, 'post', '/predict/model', headers, body, n_requests)})
+
+    name, model_path = picked['sklearn']
+    rows = synthetic_inputs(1000, seed + 3).tolist()
+    batch_body = {'model_path': model_path, 'model_type': 'sklearn', 'rows': rows}
+    results.append({'name': f'predict_batch_1000/{name}',
+                    **time_requests(client, 'post', '/predict/batch', headers, batch_body, max(5, n_requests // 10))})
+
+    sweep_body = {
+        'model_path': model_path, 'model_type': 'sklearn',
+        'axes': {'pc_mxene_loading': {'min': 0, 'max': 0.3, 'steps': 100},
+                 'laminin_peptide_loading': {'min': 0, 'max': 150, 'steps': 100},
+                 'stimulation_frequency': {'value': 1}, 'applied_voltage': {'value': 1}}
+    }
+    results.append({'name': f'predict_sweep_10000/{name}',
+                    **time_requests(client, 'post', '/predict/sweep', headers, sweep_body, max(5, n_requests // 10))})
+
+    for result in results:
+        print(f"🌐 {result['name']}: p50 {result['latency_ms']['p50']} ms, {result['requests_per_second']} req/s"
+              + (f", {result['errors']} errors" if result['errors'] else ''))
+    return results
+
+
+def run_train_suite(app, work_dir, profile, seed):
+    import jwt
+
+    from app.config.env import Config_env
+    from benchmarks.synthetic import scaled_dataset
+
+    client = app.test_client()
+    token = jwt.encode({'username': 'benchmark', 'exp': int(time.time()) + 3600}, Config_env.SECRET_KEY, algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    results = []
+    for scale in profile['train_scales']:
+        dataset_path = os.path.join(work_dir, f'dataset_x{scale}.csv')
+        rows = scaled_dataset(DATASET_PATH, scale, dataset_path, seed)
+        body = {'dataset_path': dataset_path, 'model_name': f'bench_x{scale}',
+                'n_estimators': profile['train_estimators'], 'random_state': seed}
+
+        result = {'scale': scale, 'rows': rows, 'n_estimators': profile['train_estimators']}
+        # Cold: the CSV is parsed and ingested into the dataset cache; warm: cache hit
+        for run in ['cold', 'warm']:
+            started = time.perf_counter()
+            response = client.post('/train/model', headers=headers, json=body)
+            result[f'{run}_seconds'] = round(time.perf_counter() - started, 3)
+            if response.status_code != 200:
+                result['error'] = response.get_json().get('error')
+                break
+            result['r2_score'] = response.get_json()['metrics']['r2_score']
+        print(f"🏋️ x{scale} ({rows} rows): cold {result['cold_seconds']} s, warm {result.get('warm_seconds')} s")
+        results.append(result)
+    return results
+
+
+def xgboost_variants(model_path):
+    """
+    Ways to score one XGBoost model file
+
+    Returns:
+        list: (name, predict function taking a float64 row matrix)
+    """
+    import xgboost as xgb
+
+    from app.models.dynamic_loader import CompiledForest, ModelPredictor
+
+    def booster(nthread):
+        loaded = xgb.Booster()
+        loaded.load_model(model_path)
+        if nthread is not None:
+            loaded.set_param({'nthread': nthread})
+        return loaded
+
+    # The path before inplace_predict: a DMatrix per call, XGBoost's default thread count
+    default_booster = booster(None)
+    pinned_booster = booster(1)
+    all_cores_booster = booster(0)
+    variants = [
+        ('dmatrix_predict', lambda X: default_booster.predict(xgb.DMatrix(X))),
+        ('inplace_1_thread', lambda X: ModelPredictor._predict_raw(pinned_booster, X, 'xgboost')),
+        ('inplace_all_threads', lambda X: ModelPredictor._predict_raw(all_cores_booster, X, 'xgboost'))
+    ]
+    if CompiledForest.supports_xgboost(default_booster):
+        compiled = CompiledForest.from_xgboost(default_booster)
+        variants.append(('compiled_forest', lambda X: ModelPredictor._predict_raw(compiled, X, 'xgboost')))
+    return variants
+
+
+def run_xgboost_suite(model_path, profile, seed):
+    """Single-row latency and batch throughput of every XGBoost scoring path, on standardized synthetic rows"""
+    from benchmarks.synthetic import is_installed, synthetic_inputs
+
+    if not is_installed('xgboost'):
+        print("⏭️ xgboost: xgboost is not installed")
+        return [{'name': 'xgboost', 'skipped': 'xgboost is not installed'}]
+    if not os.path.isfile(model_path):
+        print(f"⏭️ xgboost: {model_path} not found")
+        return [{'name': 'xgboost', 'skipped': f'{model_path} not found'}]
+
+    rows = synthetic_inputs(max(profile['batch_sizes'] + [profile['single_row_iterations']]), seed + 4)
+    rows = (rows - rows.mean(axis=0)) / rows.std(axis=0)
+    variants = xgboost_variants(model_path)
+    reference = np.asarray(variants[0][1](rows), dtype=np.float64).reshape(-1)
+
+    results = []
+    iterations = profile['single_row_iterations']
+    for name, predict in variants:
+        result = {'name': name, 'model': os.path.basename(model_path),
+                  'identical': bool(np.array_equal(np.asarray(predict(rows), dtype=np.float64).reshape(-1), reference))}
+        for index in range(min(20, iterations)):
+            predict(rows[index:index + 1])
+        latencies = []
+        for index in range(iterations):
+            started = time.perf_counter()
+            predict(rows[index:index + 1])
+            latencies.append(time.perf_counter() - started)
+        result['single_row_us'] = summarize(latencies, scale=1e6)
+
+        result['batch'] = []
+        for batch_size in profile['batch_sizes']:
+            timings = []
+            for _ in range(profile['batch_repeats']):
+                started = time.perf_counter()
+                predict(rows[:batch_size])
+                timings.append(time.perf_counter() - started)
+            result['batch'].append({'rows': batch_size, 'best_ms': round(min(timings) * 1e3, 3),
+                                    'rows_per_second': round(batch_size / min(timings), 1)})
+        print(f"🌲 {name}: single row p50 {result['single_row_us']['p50']} us, "
+              f"{result['batch'][-1]['rows_per_second']:.0f} rows/s" + ('' if result['identical'] else ', predictions differ'))
+        results.append(result)
+    return results
+
+
+def run(args):
+    profile = PROFILES['quick' if args.quick else 'full']
+    work_dir = tempfile.mkdtemp(prefix='predict-bench-')
+
+    # Keep everything the app writes out of the tracked directories; no startup preload, and
+    # no result cache (the http suite repeats identical requests)
+    os.environ.update({
+        'RESULT_CACHE': 'false',
+        'TRAINED_MODEL_DIR': os.path.join(work_dir, 'trained'),
+        'DATASET_CACHE_DIR': os.path.join(work_dir, 'datasets'),
+        'TRAIN_JOBS_DIR': os.path.join(work_dir, 'jobs'),
+        'METRICS_DIR': os.path.join(work_dir, 'metrics'),
+        'MODEL_PRELOAD': '',
+        'MODEL_PRELOAD_MANIFEST': ''
+    })
+    os.chdir(PROJECT_DIR)
+    sys.path.insert(0, PROJECT_DIR)
+
+    from app import create_app
+    from benchmarks.synthetic import SyntheticModelFactory
+
+    results = {'environment': environment_info(args)}
+    try:
+        models = []
+        if 'models' in args.suites or 'http' in args.suites:
+            print(f"🧪 Building synthetic models in {work_dir}")
+            models = build_models(SyntheticModelFactory(os.path.join(work_dir, 'models'), seed=args.seed), profile)
+        if 'models' in args.suites:
+            results['models'] = run_models_suite(models, profile, args.seed)
+
+        if 'http' in args.suites or 'train' in args.suites:
+            app = create_app()
+            if 'http' in args.suites:
+                results['http'] = run_http_suite(app, models, profile, args.seed)
+            if 'train' in args.suites:
+                results['train'] = run_train_suite(app, work_dir, profile, args.seed)
+        if 'xgboost' in args.suites:
+            results['xgboost'] = run_xgboost_suite(args.xgboost_model, profile, args.seed)
+    finally:
+        if args.keep:
+            print(f"📁 Kept {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results['environment']['finished_at'] = datetime.now().isoformat()
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved: {args.output}")
+    return 0
+
+
+def flatten(results):
+    """
+    Comparable numbers of a results file
+
+    Returns:
+        dict: 'suite/name/metric' -> value
+    """
+    flat = {}
+    for model in results.get('models', []):
+        if 'load_ms' not in model:
+            continue
+        prefix = f"models/{model['name']}"
+        flat[f'{prefix}/load_ms_p50'] = model['load_ms']['p50']
+        flat[f'{prefix}/rss_delta_kb'] = model['rss_delta_kb']
+        flat[f'{prefix}/single_row_us_p50'] = model['single_row_us']['p50']
+        flat[f'{prefix}/single_row_us_p99'] = model['single_row_us']['p99']
+        for batch in model['batch']:
+            flat[f"{prefix}/batch_{batch['rows']}_rows_per_second"] = batch['rows_per_second']
+    for request in results.get('http', []):
+        prefix = f"http/{request['name']}"
+        flat[f'{prefix}/latency_ms_p50'] = request['latency_ms']['p50']
+        flat[f'{prefix}/latency_ms_p99'] = request['latency_ms']['p99']
+        flat[f'{prefix}/requests_per_second'] = request['requests_per_second']
+    for variant in results.get('xgboost', []):
+        if 'single_row_us' not in variant:
+            continue
+        prefix = f"xgboost/{variant['name']}"
+        flat[f'{prefix}/single_row_us_p50'] = variant['single_row_us']['p50']
+        flat[f'{prefix}/single_row_us_p99'] = variant['single_row_us']['p99']
+        for batch in variant['batch']:
+            flat[f"{prefix}/batch_{batch['rows']}_rows_per_second"] = batch['rows_per_second']
+    for training in results.get('train', []):
+        prefix = f"train/x{training['scale']}"
+        for run in ['cold', 'warm']:
+            if f'{run}_seconds' in training:
+                flat[f'{prefix}/{run}_seconds'] = training[f'{run}_seconds']
+    return flat
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = flatten(json.load(f))
+    with open(args.candidate) as f:
+        candidate = flatten(json.load(f))
+
+    regressions = 0
+    width = max((len(key) for key in baseline), default=10)
+    print(f"{'metric':<{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}")
+    for key in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[key], candidate[key]
+        if not old:
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if key.endswith(HIGHER_IS_BETTER_SUFFIXES) else change
+        flag = ''
+        if worse > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif worse < -args.threshold:
+            flag = '  improved'
+        print(f"{key:<{width}}  {old:>12}  {new:>12}  {change:>+8.1%}{flag}")
+
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print(f"{key:<{width}}  only in {'baseline' if key in baseline else 'candidate'}")
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the prediction and training hot paths')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run benchmark suites and write the results to JSON')
+    run_parser.add_argument('-o', '--output', default='bench-results.json', help='Results file (default: bench-results.json)')
+    run_parser.add_argument('--suites', default=','.join(SUITES), help=f"Comma-separated suites (default: {','.join(SUITES)})")
+    run_parser.add_argument('--quick', action='store_true', help='Smaller models and fewer iterations')
+    run_parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data and models (default: 0)')
+    run_parser.add_argument('--keep', action='store_true', help='Keep the temporary directory with the models')
+    run_parser.add_argument('--xgboost-model', default=XGBOOST_MODEL_PATH,
+                            help='XGBoost model of the xgboost suite (default: WebApp/public/models/xgb_augmented_model.json)')
+
+    compare_parser = commands.add_parser('compare', help='Compare two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='Relative change reported as a regression (default: 0.1)')
+    compare_parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 if anything regressed')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        return compare(args)
+
+    args.output = os.path.abspath(args.output)
+    args.xgboost_model = os.path.abspath(args.xgboost_model)
+    args.suites = [suite.strip() for suite in args.suites.split(',') if suite.strip()]
+    unknown = [suite for suite in args.suites if suite not in SUITES]
+    if unknown:
+        parser.error(f'Unknown suites: {unknown}. Available suites: {SUITES}')
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
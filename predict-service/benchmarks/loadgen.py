@@ -0,0 +1,435 @@
+"""
+Load Generator
+Replay recorded requests, or synthetic prediction traffic, against a running
+predict-service (--url) or an in-process app (--in-process), and report throughput,
+latency percentiles and error rates per endpoint and model
+
+Replay files are JSONL, one request per line:
+
+    {"method": "POST", "path": "/predict/model", "json": {"pc_mxene_loading": 0.1, ..., "model_path": "...", "model_type": "sklearn"}}
+
+"method" defaults to POST when a "json" body is present and GET otherwise, and an optional
+"headers" object is sent along. Lines without a "path" (such as the change requests in
+the repository's requests.jsonl) are skipped and counted.
+
+Closed loop (default): --concurrency workers each send their next request as soon as the
+previous one finished, which finds the peak throughput.
+Open loop (--rate): requests arrive at --rate per second (Poisson arrivals) whatever the
+service's speed, served by up to --concurrency workers. Latency is measured from the
+scheduled arrival, so time spent queueing in front of a saturated service is counted.
+
+Usage (from predict-service/):
+    python -m benchmarks.loadgen --url http://localhost:5000 --replay traffic.jsonl --concurrency 8 --duration 60
+    python -m benchmarks.loadgen --url http://localhost:5000 --model /var/www/html/public/models/rf_augmented_model.pkl:sklearn --rate 200
+    python -m benchmarks.loadgen --in-process --model ml_model/model.pkl --mix model=0.9,batch=0.1 --warmup 5 -o load.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from app.models.input_schema import INPUT_FIELDS, LOWER_BOUNDS, UPPER_BOUNDS
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Model type of a --model path without an explicit :type
+MODEL_TYPE_BY_EXTENSION = {
+    '.pkl': 'sklearn', '.joblib': 'joblib', '.json': 'xgboost', '.ubj': 'xgboost', '.keras': 'keras',
+    '.h5': 'keras', '.pt': 'pytorch', '.pth': 'pytorch', '.npstore': 'npstore', '.pipeline': 'pipeline'
+}
+
+# Endpoints of synthetic traffic, selected with --mix
+SYNTHETIC_ENDPOINTS = {
+    'model': '/predict/model',
+    'batch': '/predict/batch',
+    'health': '/predict/health'
+}
+
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+
+def load_replay(replay_path):
+    """
+    Requests of a replay file
+
+    Returns:
+        tuple: (list of request dicts, number of skipped lines)
+    """
+    replayed, skipped = [], 0
+    with open(replay_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict) or not isinstance(entry.get('path'), str):
+                skipped += 1
+                continue
+            body = entry.get('json')
+            replayed.append({
+                'method': entry.get('method', 'POST' if body is not None else 'GET').upper(),
+                'path': entry['path'],
+                'json': body,
+                'headers': entry.get('headers') or {}
+            })
+    return replayed, skipped
+
+
+def parse_model(spec):
+    """'path[:type]' -> (path, model_type), the type guessed from the extension if missing"""
+    model_path, separator, model_type = spec.rpartition(':')
+    if not separator or not model_path or '/' in model_type:
+        model_path, model_type = spec, ''
+    if not model_type:
+        model_type = MODEL_TYPE_BY_EXTENSION.get(os.path.splitext(model_path)[1].lower(), 'sklearn')
+    return model_path, model_type
+
+
+def parse_mix(mix):
+    """'model=0.9,batch=0.1' -> (endpoint names, normalized weights)"""
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SYNTHETIC_ENDPOINTS:
+            raise ValueError(f'Unknown endpoint in --mix: {name}. Available endpoints: {list(SYNTHETIC_ENDPOINTS)}')
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError('--mix weights must add up to more than 0')
+    return list(weights), np.array(list(weights.values())) / total
+
+
+def synthetic_requests(models, mix, batch_rows, seed):
+    """
+    Endless synthetic traffic: inputs drawn uniformly from the validated ranges, models
+    picked uniformly, endpoints by the --mix weights
+
+    Args:
+        models (list): (model_path, model_type) tuples
+        mix (str): Endpoint weights, e.g. 'model=0.9,batch=0.1'
+        batch_rows (int): Rows per /predict/batch request
+        seed (int): Random seed
+
+    Yields:
+        dict: method, path, json and headers of the next request
+    """
+    names, weights = parse_mix(mix)
+    rng = np.random.default_rng(seed)
+    while True:
+        endpoint = names[rng.choice(len(names), p=weights)]
+        if endpoint == 'health':
+            yield {'method': 'GET', 'path': SYNTHETIC_ENDPOINTS[endpoint], 'json': None, 'headers': {}}
+            continue
+        model_path, model_type = models[rng.integers(len(models))]
+        body = {'model_path': model_path, 'model_type': model_type}
+        if endpoint == 'model':
+            body.update(zip(INPUT_FIELDS, rng.uniform(LOWER_BOUNDS, UPPER_BOUNDS).round(4).tolist()))
+        else:
+            body['rows'] = rng.uniform(LOWER_BOUNDS, UPPER_BOUNDS, size=(batch_rows, len(INPUT_FIELDS))).round(4).tolist()
+        yield {'method': 'POST', 'path': SYNTHETIC_ENDPOINTS[endpoint], 'json': body, 'headers': {}}
+
+
+class HttpTransport:
+    """Sends requests to a running service, one keep-alive connection per worker thread"""
+
+    def __init__(self, url, headers, timeout):
+        parts = urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.headers = headers
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'connection', None) is None:
+            self._local.connection = self.connection_class(self.host, timeout=self.timeout)
+        return self._local.connection
+
+    def send(self, req):
+        """Send one request and read the whole response; returns the status code"""
+        headers = {**self.headers, **req['headers']}
+        body = None
+        if req['json'] is not None:
+            body = json.dumps(req['json'])
+            headers['Content-Type'] = 'application/json'
+        connection = self._connection()
+        try:
+            connection.request(req['method'], self.prefix + req['path'], body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except Exception:
+            # Reconnect on the next request
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+class InProcessTransport:
+    """Sends requests to an in-process Flask app through a test client per worker thread"""
+
+    def __init__(self, app, headers):
+        self.app = app
+        self.headers = headers
+        self._local = threading.local()
+
+    def send(self, req):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(req['path'], method=req['method'], json=req['json'], headers={**self.headers, **req['headers']})
+        # Streamed responses (sweep) are only produced while the body is read
+        response.get_data()
+        return response.status_code
+
+
+class LoadRecorder:
+    """Collects (endpoint, model, latency, outcome) samples from the worker threads"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self._lock = threading.Lock()
+        self.samples = []
+        self.warmup_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def record(self, req, started_at, finished_at, outcome):
+        """Keep the sample unless the request started during the warm-up"""
+        body = req['json'] if isinstance(req['json'], dict) else {}
+        model = os.path.basename(str(body['model_path'])) if 'model_path' in body else '-'
+        with self._lock:
+            self.in_flight -= 1
+            if started_at < self.measure_from:
+                self.warmup_requests += 1
+                return
+            self.samples.append((req['path'], model, finished_at - started_at, outcome))
+
+
+def send_and_record(transport, recorder, req, started_at):
+    """Send one request; latency counts from started_at (the scheduled arrival in open loop)"""
+    recorder.started()
+    try:
+        outcome = transport.send(req)
+    except Exception as e:
+        outcome = type(e).__name__
+    recorder.record(req, started_at, time.perf_counter(), outcome)
+
+
+def run_closed_loop(transport, source, recorder, concurrency, deadline):
+    """concurrency workers sending back to back until the deadline or the source runs out"""
+    source_lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with source_lock:
+                req = next(source, None)
+            if req is None:
+                return
+            send_and_record(transport, recorder, req, time.perf_counter())
+
+    threads = [threading.Thread(target=worker, name=f'loadgen-{index}', daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(transport, source, recorder, concurrency, deadline, rate, seed):
+    """Poisson arrivals at rate per second, each handed to one of concurrency workers"""
+    rng = np.random.default_rng(seed + 1)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadgen') as executor:
+        next_arrival = time.perf_counter()
+        while next_arrival < deadline:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            req = next(source, None)
+            if req is None:
+                break
+            executor.submit(send_and_record, transport, recorder, req, next_arrival)
+            next_arrival += rng.exponential(1.0 / rate)
+
+
+def latency_summary(latencies):
+    values = np.asarray(latencies, dtype=np.float64) * 1e3
+    summary = {'mean': round(float(values.mean()), 3)}
+    for percentile in LATENCY_PERCENTILES:
+        summary[f'p{percentile}'] = round(float(np.percentile(values, percentile)), 3)
+    summary['max'] = round(float(values.max()), 3)
+    return summary
+
+
+def summarize_group(samples, seconds):
+    latencies = [sample[2] for sample in samples]
+    status_counts = {}
+    for sample in samples:
+        status_counts[str(sample[3])] = status_counts.get(str(sample[3]), 0) + 1
+    errors = sum(1 for sample in samples if not (isinstance(sample[3], int) and sample[3] < 400))
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / seconds, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4),
+        'status_counts': status_counts,
+        'latency_ms': latency_summary(latencies)
+    }
+
+
+def build_report(recorder, seconds):
+    """
+    Per (endpoint, model) and overall throughput, error rate and latency percentiles
+
+    Args:
+        recorder (LoadRecorder): Samples of the measured window
+        seconds (float): Length of the measured window
+
+    Returns:
+        dict: overall, groups, warmup_requests and max_in_flight
+    """
+    groups = {}
+    for sample in recorder.samples:
+        groups.setdefault((sample[0], sample[1]), []).append(sample)
+    return {
+        'measured_seconds': round(seconds, 3),
+        'warmup_requests': recorder.warmup_requests,
+        'max_in_flight': recorder.max_in_flight,
+        'overall': summarize_group(recorder.samples, seconds) if recorder.samples else None,
+        'groups': [
+            {'endpoint': endpoint, 'model': model, **summarize_group(samples, seconds)}
+            for (endpoint, model), samples in sorted(groups.items())
+        ]
+    }
+
+
+def print_report(report):
+    rows = [('endpoint', 'model', 'requests', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms')]
+    for group in report['groups'] + ([{'endpoint': 'all', 'model': '', **report['overall']}] if report['overall'] else []):
+        latency = group['latency_ms']
+        rows.append((group['endpoint'], group['model'], group['requests'], group['throughput_rps'],
+                     f"{group['errors']} ({group['error_rate']:.1%})", latency['p50'], latency['p95'], latency['p99'], latency['max']))
+    widths = [max(len(str(row[column])) for row in rows) for column in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
+    print(f"\n⏱️ {report['measured_seconds']} s measured, {report['warmup_requests']} warm-up requests, "
+          f"max {report['max_in_flight']} in flight")
+
+
+def make_token(secret, ttl):
+    import jwt
+    return jwt.encode({'username': 'loadgen', 'exp': int(time.time()) + ttl}, secret, algorithm='HS256')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay or synthesize prediction traffic and report latency and throughput')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a running service, e.g. http://localhost:5000')
+    target.add_argument('--in-process', action='store_true', help='Serve the requests with an in-process create_app()')
+
+    parser.add_argument('--replay', help='JSONL file of recorded requests (replayed in order, looping)')
+    parser.add_argument('--model', action='append', default=[], help='path[:model_type] for synthetic traffic (repeatable)')
+    parser.add_argument('--mix', default='model=1', help="Synthetic endpoint weights (default: model=1), e.g. 'model=0.9,batch=0.1'")
+    parser.add_argument('--batch-rows', type=int, default=100, help='Rows per synthetic /predict/batch request (default: 100)')
+
+    parser.add_argument('--concurrency', type=int, default=4, help='Worker threads (default: 4)')
+    parser.add_argument('--rate', type=float, help='Open loop: arrivals per second (default: closed loop)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to send for, warm-up included (default: 30)')
+    parser.add_argument('--warmup', type=float, default=0, help='Leading seconds excluded from the report (default: 0)')
+    parser.add_argument('--max-requests', type=int, help='Stop after sending this many requests')
+    parser.add_argument('--no-loop', action='store_true', help='Replay the file once instead of looping over it')
+
+    parser.add_argument('--token', help='JWT to send (default: one signed with --jwt-secret)')
+    parser.add_argument('--jwt-secret', default=os.environ.get('JWT_SECRET', 'jwt_secret'), help='Secret to sign a token with (default: $JWT_SECRET)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds for --url (default: 60)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic traffic and arrivals (default: 0)')
+    parser.add_argument('-o', '--output', help='Write the report (with the run configuration) to this JSON file')
+    args = parser.parse_args(argv)
+
+    if bool(args.replay) == bool(args.model):
+        parser.error('Pass either --replay or at least one --model')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.rate is not None and args.rate <= 0:
+        parser.error('--rate must be greater than 0')
+    if args.warmup >= args.duration:
+        parser.error('--warmup must be shorter than --duration')
+
+    if args.replay:
+        replayed, skipped = load_replay(args.replay)
+        if skipped:
+            print(f"⏭️ Skipped {skipped} lines of {args.replay} without a request path")
+        if not replayed:
+            print(f"❌ No requests in {args.replay}")
+            return 1
+        source = iter(replayed) if args.no_loop else itertools.cycle(replayed)
+    else:
+        try:
+            source = synthetic_requests([parse_model(spec) for spec in args.model], args.mix, args.batch_rows, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.max_requests:
+        source = itertools.islice(source, args.max_requests)
+
+    if args.in_process:
+        os.chdir(PROJECT_DIR)
+        sys.path.insert(0, PROJECT_DIR)
+        from app import create_app
+        from app.config.env import Config_env
+        from app.models.warmup import model_warmup
+
+        app = create_app()
+        model_warmup.wait()
+        secret = Config_env.SECRET_KEY
+    else:
+        secret = args.jwt_secret
+
+    headers = {'Authorization': f'Bearer {args.token or make_token(secret, int(args.duration) + 3600)}'}
+    transport = InProcessTransport(app, headers) if args.in_process else HttpTransport(args.url, headers, args.timeout)
+
+    mode = f'open loop at {args.rate}/s' if args.rate else 'closed loop'
+    print(f"🚦 {mode}, {args.concurrency} workers, {args.duration} s ({args.warmup} s warm-up)")
+    started = time.perf_counter()
+    recorder = LoadRecorder(started + args.warmup)
+    deadline = started + args.duration
+    if args.rate:
+        run_open_loop(transport, source, recorder, args.concurrency, deadline, args.rate, args.seed)
+    else:
+        run_closed_loop(transport, source, recorder, args.concurrency, deadline)
+    measured_seconds = time.perf_counter() - started - args.warmup
+
+    report = build_report(recorder, measured_seconds)
+    if report['overall'] is None:
+        print("❌ No requests completed after the warm-up")
+        return 1
+    print_report(report)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ['token', 'jwt_secret']}
+        with open(args.output, 'w') as f:
+            json.dump({'finished_at': datetime.now().isoformat(), 'config': config, **report}, f, indent=2)
+        print(f"💾 Report saved: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Synthetic Benchmark Fixtures
+Deterministic training data, a scaled-up copy of the real dataset, and models of every
+type ModelLoader supports, built offline on CPU
+
+Every model is written with a sidecar <name>_scaler.pkl, so the prediction path resolves
+the same scaler the benchmark fitted.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+from app.models.input_schema import FEATURE_COLUMNS, LOWER_BOUNDS, UPPER_BOUNDS
+from app.training.trainer import TARGET_COLUMN
+
+
+def synthetic_inputs(n_rows, seed=0):
+    """(n_rows, 4) raw inputs drawn uniformly from the validated input ranges"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(LOWER_BOUNDS, UPPER_BOUNDS, size=(n_rows, len(FEATURE_COLUMNS)))
+
+
+def synthetic_target(X, seed=0):
+    """Smooth viability-like response (fraction in [0, 1]) with noise"""
+    rng = np.random.default_rng(seed + 1)
+    mxene = X[:, 0] / UPPER_BOUNDS[0]
+    laminin = X[:, 1] / UPPER_BOUNDS[1]
+    stimulation = X[:, 2] / UPPER_BOUNDS[2]
+    voltage = X[:, 3] / UPPER_BOUNDS[3]
+    y = (0.55 + 0.25 * np.sin(np.pi * mxene) + 0.15 * laminin * (1 - laminin)
+         + 0.1 * stimulation * voltage - 0.08 * voltage ** 2)
+    return np.clip(y + rng.normal(scale=0.03, size=len(y)), 0, 1)
+
+
+def scaled_dataset(source_csv, scale, output_csv, seed=0):
+    """
+    Write a synthetic dataset scale times the size of source_csv
+
+    Rows are resampled from the source and jittered by 2% of each column's spread,
+    clipped to the validated input ranges, so the scaled data keeps its distribution.
+
+    Args:
+        source_csv (str): Dataset with FEATURE_COLUMNS and TARGET_COLUMN
+        scale (int): Size multiplier
+        output_csv (str): File to write
+
+    Returns:
+        int: Rows written
+    """
+    import pandas as pd
+
+    df = pd.read_csv(source_csv)[FEATURE_COLUMNS + [TARGET_COLUMN]].dropna()
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(df), size=len(df) * scale)
+    values = df.to_numpy(dtype=np.float64)[rows]
+    if scale > 1:
+        spread = values.std(axis=0) * 0.02
+        values = values + rng.normal(size=values.shape) * spread
+        values[:, :4] = np.clip(values[:, :4], LOWER_BOUNDS, UPPER_BOUNDS)
+    pd.DataFrame(values, columns=FEATURE_COLUMNS + [TARGET_COLUMN]).to_csv(output_csv, index=False)
+    return len(values)
+
+
+def is_installed(package):
+    return importlib.util.find_spec(package) is not None
+
+
+class SyntheticModelFactory:
+    """Fits models on one shared synthetic training set and writes them to a directory"""
+
+    def __init__(self, output_dir, n_rows=2000, seed=0):
+        from sklearn.preprocessing import StandardScaler
+
+        self.output_dir = output_dir
+        self.seed = seed
+        os.makedirs(output_dir, exist_ok=True)
+        X = synthetic_inputs(n_rows, seed)
+        self.y = synthetic_target(X, seed)
+        self.scaler = StandardScaler().fit(X)
+        self.X_scaled = self.scaler.transform(X)
+
+    def _write_scaler(self, model_path):
+        import joblib
+        joblib.dump(self.scaler, os.path.splitext(model_path)[0] + '_scaler.pkl')
+
+    def random_forest(self, n_estimators, max_depth=None):
+        """scikit-learn RandomForestRegressor saved with joblib"""
+        import joblib
+        from sklearn.ensemble import RandomForestRegressor
+
+        model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=self.seed, n_jobs=-1)
+        model.fit(self.X_scaled, self.y)
+        path = os.path.join(self.output_dir, f"rf_{n_estimators}_{max_depth or 'full'}.pkl")
+        joblib.dump(model, path)
+        self._write_scaler(path)
+        return path, 'sklearn'
+
+    def linear_regression(self):
+        """scikit-learn LinearRegression saved with joblib"""
+        import joblib
+        from sklearn.linear_model import LinearRegression
+
+        path = os.path.join(self.output_dir, 'linear.pkl')
+        joblib.dump(LinearRegression().fit(self.X_scaled, self.y), path)
+        self._write_scaler(path)
+        return path, 'sklearn'
+
+    def xgboost(self, n_estimators=200, max_depth=6):
+        """XGBoost booster saved as JSON"""
+        import xgboost as xgb
+
+        booster = xgb.train(
+            {'max_depth': max_depth, 'eta': 0.1, 'objective': 'reg:squarederror', 'seed': self.seed, 'nthread': 1},
+            xgb.DMatrix(self.X_scaled, label=self.y), num_boost_round=n_estimators
+        )
+        path = os.path.join(self.output_dir, f'xgb_{n_estimators}_{max_depth}.json')
+        booster.save_model(path)
+        self._write_scaler(path)
+        return path, 'xgboost'
+
+    def keras_mlp(self, hidden=(64, 32), epochs=5):
+        """Small Sequential Dense MLP saved as .keras"""
+        import keras
+
+        keras.utils.set_random_seed(self.seed)
+        layers = [keras.Input(shape=(len(FEATURE_COLUMNS),))]
+        layers += [keras.layers.Dense(units, activation='relu') for units in hidden]
+        layers.append(keras.layers.Dense(1, activation='sigmoid'))
+        model = keras.Sequential(layers)
+        model.compile(optimizer='adam', loss='mse')
+        model.fit(self.X_scaled, self.y, epochs=epochs, batch_size=64, verbose=0)
+        path = os.path.join(self.output_dir, f"keras_mlp_{'x'.join(map(str, hidden))}.keras")
+        model.save(path)
+        self._write_scaler(path)
+        return path, 'keras'
+
+    def pytorch_mlp(self, hidden=(64, 32), epochs=20):
+        """Small torch.nn.Sequential MLP saved whole with torch.save"""
+        import torch
+
+        torch.manual_seed(self.seed)
+        modules = []
+        width = len(FEATURE_COLUMNS)
+        for units in hidden:
+            modules += [torch.nn.Linear(width, units), torch.nn.ReLU()]
+            width = units
+        modules += [torch.nn.Linear(width, 1), torch.nn.Sigmoid()]
+        model = torch.nn.Sequential(*modules)
+
+        X = torch.tensor(self.X_scaled, dtype=torch.float32)
+        y = torch.tensor(self.y, dtype=torch.float32).reshape(-1, 1)
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+        for _ in range(epochs):
+            optimizer.zero_grad()
+            loss = torch.nn.functional.mse_loss(model(X), y)
+            loss.backward()
+            optimizer.step()
+        model.eval()
+
+        path = os.path.join(self.output_dir, f"torch_mlp_{'x'.join(map(str, hidden))}.pt")
+        torch.save(model, path)
+        self._write_scaler(path)
+        return path, 'pytorch'
+
+    def npstore(self, model_path):
+        """Memory-mapped .npstore conversion of a forest, XGBoost or Keras model"""
+        from app.models.model_store import convert_model
+
+        # <name>.npstore shares the <name>_scaler.pkl sidecar of its source
+        return convert_model(model_path), 'npstore'
+
+    def pipeline(self, model_path):
+        """.pipeline bundle of a model and its sidecar scaler"""
+        from app.models.pipeline import build_pipeline
+
+        return build_pipeline(model_path), 'pipeline'
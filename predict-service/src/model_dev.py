@@ -11,6 +11,10 @@ class Model(ABC):
     Abstract base class for all models.
     """
 
+    # Hyperparameter that warm_start can grow without refitting (None if not supported);
+    # models that set it implement grow(model, X_train, y_train, budget)
+    warm_start_param = None
+
     @abstractmethod
     def train(self, x_train, y_train):
         """
@@ -43,6 +47,8 @@ class RandomForestModel(Model):
     """
     Random Forest Regression Model cho bài toán Cell Viability (Hồi quy).
     """
+    warm_start_param = 'n_estimators'
+
     def train(self, X_train, y_train, **kwargs) -> RegressorMixin: # SỬA: Đổi kiểu trả về sang RegressorMixin
         try:
             # Default parameters cho Random Forest Regressor
@@ -63,4 +69,26 @@ class RandomForestModel(Model):
             return rf
         except Exception as e:
             logging.error(f"Error in Random Forest Regression training: {e}")
+            raise e
+
+    def grow(self, model, X_train, y_train, budget):
+        """
+        Continue training a model returned by train(..., warm_start=True) up to budget
+        trees, keeping the trees already fitted
+        Args:
+            model: Model returned by train
+            X_train: Training data
+            y_train: Target data
+            budget: New n_estimators
+        Returns:
+            RegressorMixin
+        """
+        try:
+            # Only the trees beyond the current n_estimators are fitted
+            model.set_params(n_estimators=budget, warm_start=True)
+            model.fit(X_train, y_train)
+            logging.info(f"Random Forest Regressor grown to {budget} trees.")
+            return model
+        except Exception as e:
+            logging.error(f"Error in Random Forest Regression warm start: {e}")
             raise e
\ No newline at end of file
@@ -3,6 +3,9 @@ import logging
 import pandas as pd
 from zenml import step
 
+from app.config.env import Config_env
+from app.training.dataset_cache import dataset_cache
+
 
 class IngestData:
     """
@@ -25,6 +28,9 @@ class IngestData:
         """
 
         logging.info(f"Ingesting data from {self.data_path}")
+        if Config_env.DATASET_CACHE:
+            # Feature and target columns, memory-mapped from the dataset cache
+            return dataset_cache.load(self.data_path).frame()
         return pd.read_csv(self.data_path)
 
 @step